@@ -0,0 +1,105 @@
+"""
+Compare the motion detector strategies on synthetic footage.
+
+For each strategy this reports the mean per-frame detection cost, the number
+of frames between each injected motion onset and the first trigger, and the
+number of triggers outside the injected motion.
+
+    python -m benchmarks.detectors --width 640 --height 480 --json out.json
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from src.python.frame_sources import SyntheticSource
+from src.python.motion_detectors import DETECTORS
+from src.python.response_detection import ResponseDetectionModule
+
+def run_strategy(detector: str, frames: List[np.ndarray], motion_frames: List[int],
+                 motion_duration: int, threshold: float) -> Dict[str, object]:
+    """
+    Run one detector strategy over pre-generated frames.
+
+    Args:
+        detector (str): Strategy name from DETECTORS
+        frames (List[np.ndarray]): Frames to process
+        motion_frames (List[int]): Frame indices where motion starts
+        motion_duration (int): Frames each motion lasts
+        threshold (float): Movement threshold in full-resolution pixels
+
+    Returns:
+        Dict[str, object]: Cost, latency-to-trigger and false trigger counts
+    """
+    module = ResponseDetectionModule(movement_threshold=threshold, visualize=False,
+                                     detector=detector)
+    triggers = []
+    durations = np.empty(len(frames))
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        detected, _ = module.detect_movement(frame, timestamp=float(index))
+        durations[index] = time.perf_counter() - start
+        if detected:
+            triggers.append(index)
+
+    # Allow the motion to linger for one buffer length after it stops
+    in_motion = set()
+    for onset in motion_frames:
+        in_motion.update(range(onset, onset + motion_duration + module.frame_buffer_size))
+
+    latencies = []
+    for onset in motion_frames:
+        hits = [t for t in triggers if onset <= t < onset + motion_duration]
+        latencies.append(hits[0] - onset if hits else None)
+
+    return {
+        "detector": detector,
+        "mean_ms_per_frame": float(durations.mean() * 1000),
+        "p99_ms_per_frame": float(np.percentile(durations, 99) * 1000),
+        "latency_frames": latencies,
+        "missed": sum(1 for latency in latencies if latency is None),
+        "false_triggers": sum(1 for t in triggers if t not in in_motion)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=400)
+    parser.add_argument("--motion-step", type=int, default=2,
+                        help="pixels the target moves per frame; small values model slow movement")
+    parser.add_argument("--noise", type=float, default=4.0,
+                        help="standard deviation of the synthetic sensor noise")
+    parser.add_argument("--threshold", type=float, default=1000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    motion_frames = list(range(50, args.frames - 20, 80))
+    motion_duration = 15
+    source = SyntheticSource(width=args.width, height=args.height, num_frames=args.frames,
+                             motion_frames=motion_frames, motion_duration=motion_duration,
+                             motion_step=args.motion_step, noise_level=args.noise)
+    source.open()
+    frames = []
+    while True:
+        success, frame, _ = source.read()
+        if not success:
+            break
+        frames.append(frame)
+
+    results = [run_strategy(name, frames, motion_frames, motion_duration, args.threshold)
+               for name in DETECTORS]
+
+    print(f"{'detector':<16}{'ms/frame':>10}{'p99 ms':>10}{'missed':>8}{'false':>8}  latency (frames)")
+    for r in results:
+        print(f"{r['detector']:<16}{r['mean_ms_per_frame']:>10.3f}{r['p99_ms_per_frame']:>10.3f}"
+              f"{r['missed']:>8}{r['false_triggers']:>8}  {r['latency_frames']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
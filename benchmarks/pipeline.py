@@ -0,0 +1,213 @@
+"""
+Benchmark the capture -> detect -> overlay -> timing pipeline on synthetic frames.
+
+For each resolution this drives VideoCaptureModule (over a SyntheticSource),
+ResponseDetectionModule.detect_movement, StimuliDisplayModule.overlay_stimulus
+and TimingModule event logging, and reports the latency distribution of each
+stage, the sustained frame rate, and the bytes allocated per frame by each
+stage. Results can be written as JSON tagged with the git commit so runs can
+be compared between commits.
+
+    python -m benchmarks.pipeline --resolutions 320x240 1920x1080 --json out.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.python.frame_sources import SyntheticSource
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.timing import TimingModule, EVENT_CAPTURE, EVENT_DETECT
+
+STAGES = ("capture", "detect", "overlay", "timing")
+DEFAULT_RESOLUTIONS = ("320x240", "640x480", "1280x720", "1920x1080")
+
+def parse_resolution(text: str) -> Tuple[int, int]:
+    """Parse a WIDTHxHEIGHT string."""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def environment() -> Dict[str, object]:
+    """
+    Describe the code and machine the benchmark ran on.
+
+    Returns:
+        Dict[str, object]: Git commit and dirty flag, interpreter, library
+        versions and CPU information
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    cwd=root, capture_output=True, text=True,
+                                    check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    return {
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+def _distribution(seconds: np.ndarray) -> Dict[str, float]:
+    ms = seconds * 1000
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max())
+    }
+
+def _log_events(timing: TimingModule, timestamp: float) -> None:
+    timing.record_event(EVENT_CAPTURE, timestamp)
+    timing.events.record_now(EVENT_DETECT)
+
+def _traced(call, *args) -> Tuple[object, int]:
+    # Bytes a call allocated at its peak, including what it returns
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = call(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    return result, peak - before
+
+def _build(width: int, height: int, num_frames: int, args: argparse.Namespace):
+    motion_frames = list(range(20, num_frames, 60))
+    source = SyntheticSource(width=width, height=height, num_frames=num_frames,
+                             motion_frames=motion_frames, motion_duration=10,
+                             noise_level=args.noise, seed=args.seed)
+    capture = VideoCaptureModule(source=source)
+    response = ResponseDetectionModule(movement_threshold=args.threshold, visualize=False,
+                                       detector=args.detector, pyramid_level=args.pyramid_level)
+    stimuli = StimuliDisplayModule(window_size=(width, height),
+                                   schedule=StimulusSchedule(num_trials=1, seed=args.seed))
+    stimuli.activate_random_stimulus(0.0)
+    timing = TimingModule()
+    if not capture.start():
+        raise RuntimeError("Synthetic source failed to start")
+    return capture, response, stimuli, timing
+
+def run_resolution(width: int, height: int, args: argparse.Namespace) -> Dict[str, object]:
+    """
+    Benchmark the pipeline at one resolution.
+
+    Latencies are measured in a first pass without tracing; allocations are
+    measured in a second, shorter pass under tracemalloc, which would
+    otherwise inflate the latencies.
+
+    Args:
+        width (int): Frame width
+        height (int): Frame height
+        args (argparse.Namespace): Benchmark options
+
+    Returns:
+        Dict[str, object]: Per-stage latency distributions and allocations,
+        plus the overall frame rate
+    """
+    capture, response, stimuli, timing = _build(width, height, args.warmup + args.frames, args)
+    durations = np.empty((len(STAGES), args.frames))
+    measured_start = 0.0
+    for index in range(args.warmup + args.frames):
+        if index == args.warmup:
+            measured_start = time.perf_counter()
+        t0 = time.perf_counter()
+        _, frame, timestamp = capture.get_timestamped_frame()
+        t1 = time.perf_counter()
+        response.detect_movement(frame, timestamp, False)
+        t2 = time.perf_counter()
+        stimuli.overlay_stimulus(frame, in_place=True)
+        t3 = time.perf_counter()
+        _log_events(timing, timestamp)
+        t4 = time.perf_counter()
+
+        measured = index - args.warmup
+        if measured >= 0:
+            durations[:, measured] = (t1 - t0, t2 - t1, t3 - t2, t4 - t3)
+    elapsed = time.perf_counter() - measured_start
+    capture.stop()
+
+    capture, response, stimuli, timing = _build(width, height, args.warmup + args.alloc_frames,
+                                                args)
+    allocations = np.zeros((len(STAGES), args.alloc_frames))
+    for _ in range(args.warmup):
+        _, frame, timestamp = capture.get_timestamped_frame()
+        response.detect_movement(frame, timestamp, False)
+        stimuli.overlay_stimulus(frame, in_place=True)
+    tracemalloc.start()
+    try:
+        for index in range(args.alloc_frames):
+            (_, frame, timestamp), allocations[0, index] = _traced(capture.get_timestamped_frame)
+            _, allocations[1, index] = _traced(response.detect_movement, frame, timestamp, False)
+            _, allocations[2, index] = _traced(stimuli.overlay_stimulus, frame, True)
+            _, allocations[3, index] = _traced(_log_events, timing, timestamp)
+    finally:
+        tracemalloc.stop()
+    capture.stop()
+
+    stages = {}
+    for i, name in enumerate(STAGES):
+        stages[name] = _distribution(durations[i])
+        stages[name]["alloc_bytes_per_frame"] = float(allocations[i].mean())
+    total = durations.sum(axis=0)
+    return {
+        "width": width,
+        "height": height,
+        "frames": args.frames,
+        "fps": args.frames / elapsed,
+        "total": _distribution(total),
+        "alloc_bytes_per_frame": float(allocations.sum(axis=0).mean()),
+        "stages": stages
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolutions", nargs="+", default=list(DEFAULT_RESOLUTIONS),
+                        help="WIDTHxHEIGHT values to benchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--alloc-frames", type=int, default=50,
+                        help="frames traced with tracemalloc for allocation counts")
+    parser.add_argument("--detector", default="difference")
+    parser.add_argument("--pyramid-level", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=1000)
+    parser.add_argument("--noise", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = [run_resolution(*parse_resolution(r), args) for r in args.resolutions]
+
+    print(f"{'resolution':<12}{'fps':>9}{'total p50':>11}{'p99':>8}"
+          + "".join(f"{name + ' p50':>14}" for name in STAGES) + f"{'alloc/frame':>14}")
+    for r in results:
+        print(f"{r['width']}x{r['height']:<7}{r['fps']:>9.1f}{r['total']['p50_ms']:>11.3f}"
+              f"{r['total']['p99_ms']:>8.3f}"
+              + "".join(f"{r['stages'][name]['p50_ms']:>14.3f}" for name in STAGES)
+              + f"{r['alloc_bytes_per_frame']:>14.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "config": vars(args),
+                       "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -8,4 +8,32 @@ PYBIND11_MODULE(cpp_timing, m) {
         .def(py::init<>())
         .def("start", &HighPrecisionTimer::start)
         .def("stop", &HighPrecisionTimer::stop);
-}
\ No newline at end of file
+
+    m.def("now_ns", &monotonic_now_ns,
+          "Monotonic clock reading in nanoseconds, on the time.perf_counter() timeline");
+
+    m.attr("EVENT_CAPTURE") = static_cast<int64_t>(EVENT_CAPTURE);
+    m.attr("EVENT_DETECT") = static_cast<int64_t>(EVENT_DETECT);
+    m.attr("EVENT_STIMULUS_ON") = static_cast<int64_t>(EVENT_STIMULUS_ON);
+    m.attr("EVENT_DISPLAY") = static_cast<int64_t>(EVENT_DISPLAY);
+
+    // Exposes the recorded events as an (n, 2) int64 buffer without copying:
+    // numpy.asarray(log) gives columns [event type, timestamp ns]
+    py::class_<EventLog>(m, "EventLog", py::buffer_protocol())
+        .def(py::init<size_t>(), py::arg("capacity"))
+        .def("record", &EventLog::record, py::arg("event_type"), py::arg("timestamp_ns"))
+        .def("record_now", &EventLog::record_now, py::arg("event_type"))
+        .def("clear", &EventLog::clear)
+        .def("__len__", &EventLog::size)
+        .def_property_readonly("capacity", &EventLog::capacity)
+        .def_property_readonly("dropped", &EventLog::dropped)
+        .def_buffer([](EventLog& log) -> py::buffer_info {
+            return py::buffer_info(
+                log.data(),
+                sizeof(int64_t),
+                py::format_descriptor<int64_t>::format(),
+                2,
+                {log.size(), static_cast<size_t>(2)},
+                {sizeof(int64_t) * 2, sizeof(int64_t)});
+        });
+}
@@ -1,10 +1,26 @@
 #pragma once
 #include <chrono>
+#include <cstdint>
 #include <stdexcept>
+#include <vector>
+
+// Nanoseconds on the monotonic clock. steady_clock reads the same source as
+// Python's time.perf_counter() (CLOCK_MONOTONIC on Linux, QPC on Windows).
+inline int64_t monotonic_now_ns() {
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+enum EventType : int64_t {
+    EVENT_CAPTURE = 0,
+    EVENT_DETECT = 1,
+    EVENT_STIMULUS_ON = 2,
+    EVENT_DISPLAY = 3
+};
 
 class HighPrecisionTimer {
 private:
-    std::chrono::high_resolution_clock::time_point start_time;
+    std::chrono::steady_clock::time_point start_time;
     bool is_running;
 
 public:
@@ -14,7 +30,7 @@ public:
         if (is_running) {
             throw std::runtime_error("Timer is already running");
         }
-        start_time = std::chrono::high_resolution_clock::now();
+        start_time = std::chrono::steady_clock::now();
         is_running = true;
     }
 
@@ -22,9 +38,50 @@ public:
         if (!is_running) {
             throw std::runtime_error("Timer is not running");
         }
-        auto end_time = std::chrono::high_resolution_clock::now();
+        auto end_time = std::chrono::steady_clock::now();
         is_running = false;
         return std::chrono::duration<double, std::milli>(
             end_time - start_time).count();
     }
-};
\ No newline at end of file
+};
+
+// Fixed-capacity log of (event type, timestamp ns) pairs stored row-major in
+// one preallocated block. The block never reallocates, so buffer views
+// handed out to Python stay valid; records past capacity are counted and
+// discarded.
+class EventLog {
+private:
+    std::vector<int64_t> events;
+    size_t max_events;
+    size_t count;
+    size_t dropped_count;
+
+public:
+    explicit EventLog(size_t capacity)
+        : events(capacity * 2, 0), max_events(capacity), count(0), dropped_count(0) {}
+
+    bool record(int64_t event_type, int64_t timestamp_ns) {
+        if (count == max_events) {
+            ++dropped_count;
+            return false;
+        }
+        events[count * 2] = event_type;
+        events[count * 2 + 1] = timestamp_ns;
+        ++count;
+        return true;
+    }
+
+    bool record_now(int64_t event_type) {
+        return record(event_type, monotonic_now_ns());
+    }
+
+    void clear() {
+        count = 0;
+        dropped_count = 0;
+    }
+
+    size_t size() const { return count; }
+    size_t capacity() const { return max_events; }
+    size_t dropped() const { return dropped_count; }
+    int64_t* data() { return events.data(); }
+};
@@ -0,0 +1,157 @@
+import numpy as np
+from typing import Optional
+
+class StreamingQuantile:
+    """
+    Tracking estimate of a quantile of a drifting stream.
+
+    The first warmup samples are kept and their exact quantile seeds the
+    estimate. After that each sample nudges the estimate up by step * q when
+    it lies above and down by step * (1 - q) when it lies below, which
+    settles where a fraction 1 - q of the samples are larger. The step is
+    a fixed fraction of an exponentially weighted mean absolute deviation,
+    so it follows the spread of the data. Deviations enter that mean clipped
+    to max_deviation times the current spread, so a burst of outliers cannot
+    inflate the step. Old samples are forgotten at the same rate, and the
+    estimate keeps following slow drift. Each update is O(1) and allocates
+    nothing.
+    """
+
+    def __init__(self, quantile: float = 0.95, adaptation: float = 0.01, warmup: int = 30,
+                 max_deviation: float = 4.0):
+        """
+        Initialize the estimator.
+
+        Args:
+            quantile (float): Quantile to track, in (0, 1)
+            adaptation (float): Fraction of the spread the estimate moves per
+                sample; higher adapts faster but is noisier
+            warmup (int): Samples collected before the first estimate
+            max_deviation (float): Largest deviation, in multiples of the spread,
+                a single sample contributes to the spread
+        """
+        if not 0 < quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        if adaptation <= 0:
+            raise ValueError("adaptation must be positive")
+        if warmup < 1:
+            raise ValueError("warmup must be at least 1")
+        self.quantile = quantile
+        self.adaptation = adaptation
+        self.warmup = warmup
+        self.max_deviation = max_deviation
+        self.estimate: Optional[float] = None
+        self.spread = 0.0
+        self.count = 0
+        self._warmup_samples = np.empty(self.warmup)
+
+    def update(self, value: float) -> Optional[float]:
+        """
+        Add one sample.
+
+        Args:
+            value (float): The sample
+
+        Returns:
+            Optional[float]: The current estimate, or None during warmup
+        """
+        self.count += 1
+        if self.estimate is None:
+            self._warmup_samples[self.count - 1] = value
+            if self.count == self.warmup:
+                self.estimate = float(np.quantile(self._warmup_samples, self.quantile))
+                self.spread = float(np.mean(np.abs(self._warmup_samples - self.estimate)))
+            return self.estimate
+
+        deviation = value - self.estimate
+        step = self.adaptation * self.spread
+        # Ties leave the estimate alone, so a stream of identical values
+        # (e.g. an idle score of exactly zero) holds it in place
+        if deviation > 0:
+            self.estimate += step * self.quantile
+        elif deviation < 0:
+            self.estimate -= step * (1 - self.quantile)
+        deviation = abs(deviation)
+        if self.spread > 0:
+            # A zero spread (a constant warmup) is left free to grow
+            deviation = min(deviation, self.max_deviation * self.spread)
+        self.spread += self.adaptation * (deviation - self.spread)
+        return self.estimate
+
+    def reset(self) -> None:
+        """Forget all samples and start a new warmup."""
+        self.estimate = None
+        self.spread = 0.0
+        self.count = 0
+
+
+class AdaptiveThreshold:
+    """
+    Movement threshold derived from the motion score of an idle scene.
+
+    The threshold is multiplier times a high quantile of the idle score. This
+    quantile is the noise floor from sensor noise, flicker and compression
+    artifacts. Lighting drift is followed at O(1) cost per frame. Because it
+    is a quantile and not a mean, the odd fidget barely moves the estimate.
+    After hold() the next holdoff_frames scores are not learned from, so the
+    motion that goes on after a response does not count as noise.
+    """
+
+    def __init__(self, multiplier: float = 3.0, quantile: float = 0.95,
+                 adaptation: float = 0.01, warmup: int = 30, min_threshold: float = 100.0,
+                 holdoff_frames: int = 15):
+        """
+        Initialize the calibration.
+
+        Args:
+            multiplier (float): Threshold as a multiple of the idle score quantile
+            quantile (float): Quantile of the idle score taken as the noise floor
+            adaptation (float): Adaptation rate of the quantile estimate
+            warmup (int): Idle frames observed before the threshold is set
+            min_threshold (float): Lower bound on the threshold, in pixels of
+                motion area; keeps a perfectly still, noise-free scene from
+                triggering on a few pixels
+            holdoff_frames (int): Frames skipped after each hold()
+        """
+        self.multiplier = multiplier
+        self.min_threshold = min_threshold
+        self.holdoff_frames = holdoff_frames
+        self.baseline = StreamingQuantile(quantile, adaptation, warmup)
+        self._holdoff = 0
+
+    @property
+    def ready(self) -> bool:
+        """Whether enough idle frames were seen to set a threshold."""
+        return self.baseline.estimate is not None
+
+    @property
+    def threshold(self) -> Optional[float]:
+        """The current threshold, or None during warmup."""
+        if self.baseline.estimate is None:
+            return None
+        return max(self.min_threshold, self.multiplier * self.baseline.estimate)
+
+    def update(self, idle_score: float) -> Optional[float]:
+        """
+        Learn from the motion score of a frame without an expected response.
+
+        Args:
+            idle_score (float): Motion score of the frame
+
+        Returns:
+            Optional[float]: The current threshold, or None during warmup
+        """
+        if self._holdoff > 0:
+            self._holdoff -= 1
+        else:
+            self.baseline.update(idle_score)
+        return self.threshold
+
+    def hold(self) -> None:
+        """Skip the next holdoff_frames updates, e.g. while motion settles."""
+        self._holdoff = self.holdoff_frames
+
+    def reset(self) -> None:
+        """Start learning the baseline again, e.g. after moving the camera."""
+        self.baseline.reset()
+        self._holdoff = 0
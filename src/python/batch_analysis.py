@@ -0,0 +1,361 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import cv2
+import numpy as np
+from typing import NamedTuple, Optional, Sequence, List, Dict, Tuple, Iterator
+from src.python.frame_sources import VideoFileSource
+from src.python.response_detection import ResponseDetectionModule
+from src.python.session_recorder import SessionReader
+
+class DetectionParameters(NamedTuple):
+    """One point of the parameter sweep."""
+    movement_threshold: float
+    diff_threshold: int = 25
+    detector: str = 'difference'
+
+
+class TrialResult(NamedTuple):
+    """Re-analyzed outcome of one recorded trial under one parameter set."""
+    session: str
+    parameters: DetectionParameters
+    trial: int
+    onset: float
+    reaction_time: Optional[float]
+
+
+def parameter_grid(movement_thresholds: Sequence[float],
+                   diff_thresholds: Sequence[int] = (25,),
+                   detectors: Sequence[str] = ('difference',)) -> List[DetectionParameters]:
+    """
+    Build every combination of the given parameter values.
+
+    Args:
+        movement_thresholds (Sequence[float]): Motion area thresholds
+        diff_thresholds (Sequence[int]): Per-pixel binarization levels
+        detectors (Sequence[str]): Change detection strategies
+
+    Returns:
+        List[DetectionParameters]: The full grid
+    """
+    return [DetectionParameters(float(m), int(d), detector)
+            for m, d, detector in itertools.product(movement_thresholds, diff_thresholds,
+                                                    detectors)]
+
+
+def load_onsets(path: str) -> np.ndarray:
+    """
+    Read stimulus onset times from a session log kept next to a video.
+
+    Accepts a StimulusSchedule export (onsets taken from its trials), an
+    object with an "onsets" list, or a bare list. Schedule onsets are on the
+    perf_counter timeline, so the log has to give the timestamp of the first
+    video frame as "video_start" for them to line up with the video; the
+    schedule export does not include it. Sessions recorded with
+    SessionRecorder carry their own timeline, see load_recorded_onsets().
+
+    Args:
+        path (str): Path of the JSON log
+
+    Returns:
+        np.ndarray: Ascending onset times in seconds
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    video_start = 0.0
+    if isinstance(data, dict):
+        video_start = float(data.get("video_start", 0.0))
+        if "trials" in data:
+            data = [trial["onset"] for trial in data["trials"] if trial["onset"] is not None]
+        else:
+            data = data["onsets"]
+    return np.sort(np.asarray(data, dtype=np.float64)) - video_start
+
+
+def is_recorded_session(path: str) -> bool:
+    """Whether path is the base path of a session written by SessionRecorder."""
+    return os.path.exists(path + '.index')
+
+
+def load_recorded_onsets(path: str) -> np.ndarray:
+    """
+    Read stimulus onset times from a session written by SessionRecorder.
+
+    The onset of a trial is the capture time of the first frame recorded with
+    its stimulus, which is the frame the live test opened the response window
+    on. Times are taken from the index and returned in seconds from the
+    first recorded frame, the same origin analyze_session() uses for the
+    frames of a recorded session.
+
+    Args:
+        path (str): Base path the session was recorded to
+
+    Returns:
+        np.ndarray: Ascending onset times in seconds
+    """
+    reader = SessionReader(path)
+    if not len(reader):
+        return np.zeros(0)
+    timestamps = reader.index['timestamp']
+    firsts = [reader.trial_frames(trial)[0] for trial in reader.trials()]
+    return np.sort(timestamps[firsts] - timestamps[0]).astype(np.float64)
+
+
+def _session_frames(path: str) -> Iterator[Tuple[np.ndarray, float]]:
+    # Frames with their time in seconds from the first frame
+    if is_recorded_session(path):
+        reader = SessionReader(path)
+        origin = float(reader.index['timestamp'][0]) if len(reader) else 0.0
+        for frame, record in reader.iter_frames():
+            yield frame, float(record['timestamp']) - origin
+        return
+
+    source = VideoFileSource(path, start_time=0.0)
+    if not source.open():
+        raise IOError(f"Cannot open session video {path}")
+    try:
+        while True:
+            ret, frame, timestamp = source.read()
+            if not ret:
+                break
+            yield frame, timestamp
+    finally:
+        source.release()
+
+
+def analyze_session(video_path: str, onsets: Optional[Sequence[float]],
+                    parameters: Sequence[DetectionParameters],
+                    timeout_ms: float = 2000.0) -> List[TrialResult]:
+    """
+    Replay one recorded session under several parameter sets.
+
+    The session is decoded once and every frame is fed to one
+    ResponseDetectionModule per parameter set. The trial logic follows
+    ReactionTestEngine: the frame at or after each onset opens a response
+    window, movement on that frame itself is ignored, and the window closes
+    on the first later frame with movement or once it is longer than
+    timeout_ms.
+
+    Args:
+        video_path (str): Recorded session video, or the base path of a
+            session written by SessionRecorder
+        onsets (Optional[Sequence[float]]): Stimulus onsets in seconds from the
+            first frame; read from the recorder's index if None
+        parameters (Sequence[DetectionParameters]): Parameter sets to evaluate
+        timeout_ms (float): Response window length in milliseconds
+
+    Returns:
+        List[TrialResult]: One result per trial and parameter set
+    """
+    if onsets is None:
+        onsets = load_recorded_onsets(video_path)
+
+    modules = [ResponseDetectionModule(p.movement_threshold, visualize=False,
+                                       detector=p.detector, diff_threshold=p.diff_threshold)
+               for p in parameters]
+    results: List[TrialResult] = []
+    next_trial = 0
+    active_trial = -1
+
+    def close_windows() -> None:
+        for p, module in zip(parameters, modules):
+            if module.waiting_for_response:
+                results.append(TrialResult(video_path, p, active_trial,
+                                           float(onsets[active_trial]),
+                                           module.stop_response_window()))
+
+    for frame, timestamp in _session_frames(video_path):
+        # Detection runs before the window for a new onset is opened, so
+        # movement on the onset frame is not a response, as in the live test
+        for p, module in zip(parameters, modules):
+            movement_detected, _ = module.detect_movement(frame, timestamp, False)
+            if movement_detected and module.waiting_for_response:
+                results.append(TrialResult(video_path, p, active_trial,
+                                           float(onsets[active_trial]),
+                                           module.stop_response_window()))
+
+        if active_trial >= 0 and (timestamp - onsets[active_trial]) * 1000 > timeout_ms:
+            close_windows()
+            active_trial = -1
+
+        if next_trial < len(onsets) and timestamp >= onsets[next_trial]:
+            close_windows()
+            active_trial = next_trial
+            next_trial += 1
+            for module in modules:
+                module.start_response_window(float(onsets[active_trial]))
+    close_windows()
+
+    return results
+
+
+def _init_worker() -> None:
+    # One OpenCV thread per process; the pool already uses every core
+    cv2.setNumThreads(1)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _run_job(job: Tuple[str, Optional[List[float]], List[DetectionParameters],
+                        float]) -> List[TrialResult]:
+    video_path, onsets, parameters, timeout_ms = job
+    return analyze_session(video_path, onsets, parameters, timeout_ms)
+
+
+def run_batch(sessions: Sequence[Tuple[str, Optional[Sequence[float]]]],
+              parameters: Sequence[DetectionParameters],
+              processes: Optional[int] = None,
+              timeout_ms: float = 2000.0) -> List[TrialResult]:
+    """
+    Re-analyze many sessions across a process pool.
+
+    Work is split into (session, parameter chunk) jobs. With fewer sessions
+    than processes the parameter grid is chunked so every process gets work;
+    otherwise each job decodes a video once for the whole grid.
+
+    Args:
+        sessions (Sequence[Tuple[str, Optional[Sequence[float]]]]): Video or
+            recorded session paths with their onsets; None reads the onsets
+            of a recorded session from its index
+        parameters (Sequence[DetectionParameters]): Parameter grid
+        processes (Optional[int]): Pool size; defaults to the CPU count
+        timeout_ms (float): Response window length in milliseconds
+
+    Returns:
+        List[TrialResult]: All results, ordered by session, parameters and trial
+    """
+    processes = processes or os.cpu_count() or 1
+    chunks = max(1, min(len(parameters), -(-processes // max(1, len(sessions)))))
+    jobs = [(video_path, None if onsets is None else list(onsets),
+             list(parameters[i::chunks]), timeout_ms)
+            for video_path, onsets in sessions for i in range(chunks)]
+
+    results: List[TrialResult] = []
+    if processes == 1 or len(jobs) == 1:
+        for job in jobs:
+            results.extend(_run_job(job))
+    else:
+        with multiprocessing.Pool(min(processes, len(jobs)), initializer=_init_worker) as pool:
+            for job_results in pool.imap_unordered(_run_job, jobs):
+                results.extend(job_results)
+
+    order = {p: i for i, p in enumerate(parameters)}
+    results.sort(key=lambda r: (r.session, order[r.parameters], r.trial))
+    return results
+
+
+def summarize(results: Sequence[TrialResult], anticipation_ms: float = 100.0,
+              lapse_ms: float = 1000.0) -> List[Dict[str, object]]:
+    """
+    Build the parameter-sweep table.
+
+    Reaction times below anticipation_ms or above lapse_ms are counted but
+    left out of the averages, as in the live statistics.
+
+    Args:
+        results (Sequence[TrialResult]): Output of run_batch()
+        anticipation_ms (float): Lower bound of valid reaction times
+        lapse_ms (float): Upper bound of valid reaction times
+
+    Returns:
+        List[Dict[str, object]]: One row per parameter set, in first-seen order
+    """
+    groups: Dict[DetectionParameters, List[TrialResult]] = {}
+    for result in results:
+        groups.setdefault(result.parameters, []).append(result)
+
+    table = []
+    for parameters, group in groups.items():
+        times = np.array([r.reaction_time for r in group if r.reaction_time is not None])
+        valid = times[(times >= anticipation_ms) & (times <= lapse_ms)]
+        row: Dict[str, object] = dict(parameters._asdict())
+        row.update({
+            "trials": len(group),
+            "responses": len(times),
+            "timeouts": len(group) - len(times),
+            "anticipations": int(np.count_nonzero(times < anticipation_ms)),
+            "lapses": int(np.count_nonzero(times > lapse_ms)),
+            "mean": float(valid.mean()) if valid.size else None,
+            "std": float(valid.std(ddof=1)) if valid.size > 1 else None,
+            "p50": float(np.percentile(valid, 50)) if valid.size else None,
+            "p90": float(np.percentile(valid, 90)) if valid.size else None
+        })
+        table.append(row)
+    return table
+
+
+def write_trials_csv(path: str, results: Sequence[TrialResult]) -> None:
+    """
+    Write per-trial reaction times.
+
+    Args:
+        path (str): Output CSV path
+        results (Sequence[TrialResult]): Output of run_batch()
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["session", *DetectionParameters._fields, "trial", "onset",
+                         "reaction_time"])
+        for r in results:
+            writer.writerow([r.session, *r.parameters, r.trial, f"{r.onset:.6f}",
+                             "" if r.reaction_time is None else f"{r.reaction_time:.3f}"])
+
+
+def write_sweep_csv(path: str, table: Sequence[Dict[str, object]]) -> None:
+    """
+    Write the parameter-sweep table.
+
+    Args:
+        path (str): Output CSV path
+        table (Sequence[Dict[str, object]]): Output of summarize()
+    """
+    if not table:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(table[0]))
+        writer.writeheader()
+        for row in table:
+            writer.writerow({k: "" if v is None else v for k, v in row.items()})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-analyze recorded sessions over a grid of detection parameters")
+    parser.add_argument("sessions", nargs="+",
+                        help="session videos, or base paths of sessions recorded with --record")
+    parser.add_argument("--log-suffix", default=".json",
+                        help="onset log next to each video, replacing its extension")
+    parser.add_argument("--movement-thresholds", type=float, nargs="+", default=[1000])
+    parser.add_argument("--diff-thresholds", type=int, nargs="+", default=[25])
+    parser.add_argument("--detectors", nargs="+", default=["difference"])
+    parser.add_argument("--timeout-ms", type=float, default=2000.0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--trials-csv", default="trials.csv")
+    parser.add_argument("--sweep-csv", default="sweep.csv")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    sessions = [(path, None) if is_recorded_session(path)
+                else (path, load_onsets(os.path.splitext(path)[0] + args.log_suffix))
+                for path in args.sessions]
+    grid = parameter_grid(args.movement_thresholds, args.diff_thresholds, args.detectors)
+
+    results = run_batch(sessions, grid, args.processes, args.timeout_ms)
+    table = summarize(results)
+    write_trials_csv(args.trials_csv, results)
+    write_sweep_csv(args.sweep_csv, table)
+
+    print(f"{len(sessions)} sessions x {len(grid)} parameter sets, {len(results)} trials")
+    for row in table:
+        mean = "-" if row["mean"] is None else f"{row['mean']:.1f} ms"
+        print(f"threshold={row['movement_threshold']:<8g} diff={row['diff_threshold']:<4} "
+              f"{row['detector']:<16} responses={row['responses']}/{row['trials']} "
+              f"mean={mean}")
+
+
+if __name__ == "__main__":
+    main()
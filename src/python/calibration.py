@@ -0,0 +1,324 @@
+import argparse
+import bisect
+import json
+import logging
+import time
+import numpy as np
+from typing import Optional, List, Dict, Tuple
+from src.python.frame_sources import SyntheticSource
+from src.python.response_detection import ResponseDetectionModule
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.reaction_engine import (ReactionTestEngine, TrialEvent, TRIAL_STIMULUS_ON,
+                                        TRIAL_RESPONSE, TRIAL_TIMEOUT)
+
+class LoopbackSource(SyntheticSource):
+    """
+    Synthetic source whose motion is triggered by the test itself.
+
+    trigger() schedules a movement of the square at a given time; it starts
+    on the first frame captured at or after that time. This closes the loop
+    from stimulus onset to motion with a known offset.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30,
+                 motion_duration: int = 3, noise_level: float = 0.0, seed: int = 0,
+                 target_fps: Optional[float] = None, start_time: Optional[float] = None):
+        """
+        Initialize the loopback source.
+
+        Args:
+            width (int): Frame width in pixels
+            height (int): Frame height in pixels
+            fps (float): Nominal frame rate of the virtual timeline
+            motion_duration (int): Frames each triggered movement lasts
+            noise_level (float): Standard deviation of the added sensor noise
+            seed (int): Seed for the texture and noise generator
+            target_fps (Optional[float]): Delivery rate to pace reads to; None runs
+                as fast as possible on the virtual timeline
+            start_time (Optional[float]): Timestamp of the first frame on the virtual timeline
+        """
+        super().__init__(width, height, fps, motion_duration=motion_duration,
+                         noise_level=noise_level, seed=seed, target_fps=target_fps,
+                         start_time=start_time)
+        self._pending: List[float] = []
+
+    def trigger(self, motion_time: float) -> None:
+        """
+        Schedule a movement.
+
+        Args:
+            motion_time (float): Time at which the movement starts
+        """
+        bisect.insort(self._pending, motion_time)
+
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._pending:
+            if self.target_fps is None:
+                frame_time = self._origin + self.frame_index / self.nominal_fps
+            else:
+                frame_time = time.perf_counter()
+            while self._pending and self._pending[0] <= frame_time:
+                self._pending.pop(0)
+                self.motion_frames.append(self.frame_index)
+        return super()._read_frame()
+
+
+class LatencyProfile:
+    """
+    Measured detection latency of the system, used to correct reaction times.
+
+    The correction is the median latency, which is robust to the occasional
+    slow detection. The full distribution and the detection settings it was
+    measured with are kept, so a profile can be checked against the setup it
+    is applied to.
+    """
+
+    # Settings that change the latency, and the tolerance for numeric ones
+    _MATCHED_SETTINGS = ("detector", "subframe_onset", "pyramid_level", "frame_buffer_size")
+    _FPS_TOLERANCE = 0.05
+
+    def __init__(self, latencies_ms: List[float], misses: int = 0,
+                 settings: Optional[Dict[str, object]] = None):
+        """
+        Args:
+            latencies_ms (List[float]): Measured latency of each detected trial
+            misses (int): Trials whose injected motion was not detected
+            settings (Optional[Dict[str, object]]): Detection and source settings
+        """
+        self.latencies_ms = [float(v) for v in latencies_ms]
+        self.misses = misses
+        self.settings = settings or {}
+
+    @property
+    def correction_ms(self) -> float:
+        """
+        Latency to subtract from measured reaction times.
+
+        The correction is signed: a negative median means the onset estimate
+        runs early (as the sub-frame estimator can), and subtracting it
+        lengthens reaction times by that bias. The corrected reaction time
+        itself is clamped at 0 by ResponseDetectionModule.
+        """
+        if not self.latencies_ms:
+            return 0.0
+        return float(np.median(self.latencies_ms))
+
+    def mismatches(self, response: ResponseDetectionModule,
+                   fps: Optional[float] = None) -> List[str]:
+        """
+        Compare the profile's recorded settings with a live setup.
+
+        Args:
+            response (ResponseDetectionModule): Detector the correction would apply to
+            fps (Optional[float]): Frame rate of the live source; not checked if None
+
+        Returns:
+            List[str]: One description per differing setting, empty if the
+            profile matches. Settings the profile did not record are skipped.
+        """
+        differences = []
+        for key in self._MATCHED_SETTINGS:
+            if key in self.settings and self.settings[key] != getattr(response, key):
+                differences.append(f"{key}: profile {self.settings[key]}, "
+                                   f"live {getattr(response, key)}")
+        recorded_fps = self.settings.get("fps")
+        if (fps is not None and recorded_fps is not None
+                and abs(fps - recorded_fps) > self._FPS_TOLERANCE * recorded_fps):
+            differences.append(f"fps: profile {recorded_fps:g}, live {fps:g}")
+        return differences
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Serialize the profile.
+
+        Returns:
+            Dict[str, object]: JSON-compatible description with summary statistics
+        """
+        values = np.asarray(self.latencies_ms)
+        summary = {}
+        if values.size:
+            summary = {
+                "mean_ms": float(values.mean()),
+                "std_ms": float(values.std(ddof=1)) if values.size > 1 else 0.0,
+                "min_ms": float(values.min()),
+                "p10_ms": float(np.percentile(values, 10)),
+                "p90_ms": float(np.percentile(values, 90)),
+                "max_ms": float(values.max())
+            }
+        return {
+            "correction_ms": self.correction_ms,
+            "trials": len(self.latencies_ms) + self.misses,
+            "misses": self.misses,
+            "summary": summary,
+            "settings": self.settings,
+            "latencies_ms": self.latencies_ms
+        }
+
+    def export(self, path: str) -> None:
+        """
+        Write the profile to a JSON file.
+
+        Args:
+            path (str): Output file path
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str,
+             response: Optional[ResponseDetectionModule] = None) -> "LatencyProfile":
+        """
+        Read a profile written by export().
+
+        Args:
+            path (str): Path of the profile
+            response (Optional[ResponseDetectionModule]): Detector the profile
+                will correct; its onset estimation has to match the one the
+                profile was measured with
+
+        Returns:
+            LatencyProfile: The stored profile
+
+        Raises:
+            ValueError: If the profile was measured with sub-frame onset
+                estimation on and the detector has it off, or the other way round
+        """
+        with open(path) as f:
+            data = json.load(f)
+        profile = cls(data["latencies_ms"], data["misses"], data["settings"])
+        recorded = profile.settings.get("subframe_onset")
+        if (response is not None and recorded is not None
+                and recorded != response.subframe_onset):
+            # The two estimators have different biases, so the correction of
+            # one is wrong for the other
+            raise ValueError(f"Latency profile {path} was measured with subframe_onset="
+                             f"{recorded}, the detector uses {response.subframe_onset}")
+        return profile
+
+
+def run_calibration(trials: int = 50, motion_offset_ms: float = 200.0,
+                    response: Optional[ResponseDetectionModule] = None,
+                    width: int = 640, height: int = 480, fps: float = 30,
+                    noise_level: float = 2.0, realtime: bool = False,
+                    seed: int = 0) -> LatencyProfile:
+    """
+    Measure the detection latency of the reaction test.
+
+    A ReactionTestEngine runs on a LoopbackSource. Every stimulus onset
+    triggers motion motion_offset_ms later, plus a random fraction of a frame
+    so onsets fall evenly between frame captures, as a human movement would.
+    The reported reaction time minus the true motion offset is the latency
+    the system adds: frame quantization, the frames the detector needs to
+    cross the threshold and any bias of the onset estimate.
+
+    Args:
+        trials (int): Number of stimulus-to-motion trials
+        motion_offset_ms (float): Delay from stimulus onset to the injected motion
+        response (Optional[ResponseDetectionModule]): Detector configured as in
+            the live test; a default headless one is used if None. Any latency
+            correction it already has is ignored during the measurement.
+        width (int): Frame width in pixels
+        height (int): Frame height in pixels
+        fps (float): Frame rate of the source
+        noise_level (float): Standard deviation of the synthetic sensor noise
+        realtime (bool): Pace frames at fps and stamp them with the clock
+            instead of running on the virtual timeline
+        seed (int): Seed for the schedule, noise and offset jitter
+
+    Returns:
+        LatencyProfile: The measured profile
+    """
+    if response is None:
+        response = ResponseDetectionModule(visualize=False)
+    saved_correction = response.latency_correction_ms
+    response.latency_correction_ms = 0.0
+
+    source = LoopbackSource(width, height, fps, noise_level=noise_level, seed=seed,
+                            target_fps=fps if realtime else None,
+                            start_time=None if realtime else 0.0)
+    rng = np.random.default_rng(seed)
+    schedule = StimulusSchedule(num_trials=trials, min_delay=0.5, max_delay=1.0, seed=seed)
+    injected: Dict[int, float] = {}
+    latencies: List[float] = []
+    misses = 0
+
+    def on_event(event: TrialEvent) -> None:
+        nonlocal misses
+        if event.kind == TRIAL_STIMULUS_ON:
+            offset = motion_offset_ms / 1000 + rng.uniform(0, 1 / fps)
+            injected[event.trial] = offset * 1000
+            source.trigger(event.timestamp + offset)
+        elif event.kind == TRIAL_RESPONSE and event.reaction_time is not None:
+            latencies.append(event.reaction_time - injected[event.trial])
+        elif event.kind in (TRIAL_RESPONSE, TRIAL_TIMEOUT):
+            misses += 1
+
+    engine = ReactionTestEngine(StimuliDisplayModule((width, height), schedule), response,
+                                on_event=on_event)
+    engine.statistics.anticipation_ms = None
+    engine.statistics.lapse_ms = None
+    if not source.open():
+        raise RuntimeError("Loopback source failed to open")
+    try:
+        while engine.trial < trials - 1 or engine.response.waiting_for_response:
+            ret, frame, timestamp = source.read()
+            if not ret:
+                break
+            engine.process_frame(frame, timestamp)
+    finally:
+        source.release()
+        response.latency_correction_ms = saved_correction
+
+    settings = {
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "realtime": realtime,
+        "motion_offset_ms": motion_offset_ms,
+        "movement_threshold": response.movement_threshold,
+        "diff_threshold": response.diff_threshold,
+        "detector": response.detector,
+        "pyramid_level": response.pyramid_level,
+        "frame_buffer_size": response.frame_buffer_size,
+        "subframe_onset": response.subframe_onset
+    }
+    return LatencyProfile(latencies, misses, settings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the system's detection latency and save a correction profile")
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--motion-offset-ms", type=float, default=200.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--noise", type=float, default=2.0)
+    parser.add_argument("--realtime", action="store_true",
+                        help="pace frames at --fps on the real clock")
+    parser.add_argument("--threshold", type=float, default=1000)
+    parser.add_argument("--detector", default="difference")
+    parser.add_argument("--pyramid-level", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="latency_profile.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    response = ResponseDetectionModule(args.threshold, visualize=False, detector=args.detector,
+                                       pyramid_level=args.pyramid_level)
+    profile = run_calibration(args.trials, args.motion_offset_ms, response, args.width,
+                              args.height, args.fps, args.noise, args.realtime, args.seed)
+    profile.export(args.output)
+
+    summary = profile.to_dict()["summary"]
+    print(f"Detected {len(profile.latencies_ms)}/{len(profile.latencies_ms) + profile.misses} "
+          f"injected movements")
+    if summary:
+        print(f"Latency: median {profile.correction_ms:.1f} ms, mean {summary['mean_ms']:.1f} ms, "
+              f"p10-p90 {summary['p10_ms']:.1f}-{summary['p90_ms']:.1f} ms")
+    print(f"Correction profile written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import logging
+import time
+import cv2
+import numpy as np
+from typing import NamedTuple, Optional, Sequence, List, Tuple
+
+class CameraMode(NamedTuple):
+    """A capture mode as reported by the driver."""
+    width: int
+    height: int
+    fps: float
+    fourcc: str
+
+
+class NegotiatedMode(NamedTuple):
+    """Outcome of camera negotiation."""
+    mode: CameraMode
+    measured_fps: Optional[float]
+    buffer_size: Optional[int]
+    probed: List[CameraMode]
+
+
+# Sizes and pixel formats tried when probing; the frame rate is requested
+# high and the driver clamps it to what it supports for each combination
+PROBE_SIZES: Tuple[Tuple[int, int], ...] = ((640, 480), (320, 240), (1280, 720), (1920, 1080))
+PROBE_FOURCCS: Tuple[str, ...] = ('MJPG', 'YUYV')
+PROBE_FPS = 240.0
+
+logger = logging.getLogger(__name__)
+
+def fourcc_to_str(code: float) -> str:
+    """Decode a CAP_PROP_FOURCC value into its four characters."""
+    code = int(code)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+
+def apply_mode(capture, width: int, height: int, fps: float,
+               fourcc: Optional[str] = None) -> CameraMode:
+    """
+    Request a mode and read back what the driver accepted.
+
+    Args:
+        capture: An opened cv2.VideoCapture or compatible object
+        width (int): Requested frame width
+        height (int): Requested frame height
+        fps (float): Requested frame rate
+        fourcc (Optional[str]): Requested pixel format; left unchanged if None
+
+    Returns:
+        CameraMode: The mode the driver reports after the request
+    """
+    # The pixel format goes first: on most backends it limits sizes and rates
+    if fourcc:
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    capture.set(cv2.CAP_PROP_FPS, fps)
+    return CameraMode(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                      int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                      float(capture.get(cv2.CAP_PROP_FPS)),
+                      fourcc_to_str(capture.get(cv2.CAP_PROP_FOURCC)))
+
+def probe_modes(capture, sizes: Sequence[Tuple[int, int]] = PROBE_SIZES,
+                fourccs: Sequence[str] = PROBE_FOURCCS) -> List[CameraMode]:
+    """
+    Find the distinct modes the driver accepts.
+
+    Args:
+        capture: An opened cv2.VideoCapture or compatible object
+        sizes (Sequence[Tuple[int, int]]): Frame sizes to request
+        fourccs (Sequence[str]): Pixel formats to request
+
+    Returns:
+        List[CameraMode]: Accepted modes, without duplicates, in probe order
+    """
+    modes: List[CameraMode] = []
+    for fourcc in fourccs:
+        for width, height in sizes:
+            mode = apply_mode(capture, width, height, PROBE_FPS, fourcc)
+            if mode.width > 0 and mode.height > 0 and mode not in modes:
+                modes.append(mode)
+    return modes
+
+def rank_modes(modes: Sequence[CameraMode], preferred_size: Tuple[int, int] = (640, 480),
+               min_size: Tuple[int, int] = (320, 240)) -> List[CameraMode]:
+    """
+    Order modes from most to least preferred.
+
+    Modes smaller than min_size come last. The preferred size is a hard
+    constraint: the motion threshold and stimulus layout are tuned for it,
+    so other sizes are only used when the camera does not offer it. Among
+    those, the size closest to preferred_size ranks first (detection cost
+    grows with the pixel count, so larger is not better). Within a size
+    the highest frame rate wins, then MJPG, which most USB cameras can
+    deliver at higher rates than uncompressed formats.
+
+    Args:
+        modes (Sequence[CameraMode]): Candidate modes
+        preferred_size (Tuple[int, int]): Frame size the pipeline is tuned for
+        min_size (Tuple[int, int]): Smallest usable frame size
+
+    Returns:
+        List[CameraMode]: The modes, best first
+    """
+    preferred_area = preferred_size[0] * preferred_size[1]
+
+    def key(mode: CameraMode):
+        too_small = mode.width < min_size[0] or mode.height < min_size[1]
+        other_size = (mode.width, mode.height) != tuple(preferred_size)
+        return (too_small, other_size, abs(mode.width * mode.height - preferred_area),
+                -mode.fps, mode.fourcc != 'MJPG')
+
+    return sorted(modes, key=key)
+
+def minimize_buffering(capture) -> Optional[int]:
+    """
+    Shrink the driver's frame queue so reads return the newest frame.
+
+    Args:
+        capture: An opened cv2.VideoCapture or compatible object
+
+    Returns:
+        Optional[int]: Buffer size the driver reports, None if it does not
+        support the property
+    """
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    size = capture.get(cv2.CAP_PROP_BUFFERSIZE)
+    return int(size) if size > 0 else None
+
+def measure_fps(capture, frames: int = 30, warmup: int = 5,
+                clock=time.perf_counter) -> Optional[float]:
+    """
+    Measure the delivered frame rate from grab timestamps.
+
+    The median interval is used, so a single slow frame (e.g. auto exposure
+    settling) does not skew the result.
+
+    Args:
+        capture: An opened cv2.VideoCapture or compatible object
+        frames (int): Frames to time after the warmup
+        warmup (int): Frames grabbed and discarded first
+        clock: Function returning the current time in seconds
+
+    Returns:
+        Optional[float]: Frames per second, None if grabbing failed
+    """
+    for _ in range(warmup):
+        if not capture.grab():
+            return None
+    stamps = np.empty(frames)
+    for i in range(frames):
+        if not capture.grab():
+            return None
+        stamps[i] = clock()
+    intervals = np.diff(stamps)
+    median = float(np.median(intervals)) if intervals.size else 0.0
+    return 1.0 / median if median > 0 else None
+
+def negotiate(capture, preferred_size: Tuple[int, int] = (640, 480),
+              min_size: Tuple[int, int] = (320, 240),
+              sizes: Sequence[Tuple[int, int]] = PROBE_SIZES,
+              fourccs: Sequence[str] = PROBE_FOURCCS,
+              measure_frames: int = 30, max_attempts: int = 3,
+              min_rate_ratio: float = 0.9, clock=time.perf_counter) -> Optional[NegotiatedMode]:
+    """
+    Pick the fastest mode the camera really delivers at the preferred size
+    and minimize buffering.
+
+    Modes are probed and ranked with rank_modes(). The best one is applied
+    and its rate measured; if the camera delivers less than min_rate_ratio
+    of the reported rate (some drivers accept any request, or lower the rate
+    in poor light), the next candidates are tried, up to max_attempts. The
+    mode with the highest measured rate is kept.
+
+    Args:
+        capture: An opened cv2.VideoCapture or compatible object
+        preferred_size (Tuple[int, int]): Frame size the pipeline is tuned for
+        min_size (Tuple[int, int]): Smallest usable frame size
+        sizes (Sequence[Tuple[int, int]]): Frame sizes to probe
+        fourccs (Sequence[str]): Pixel formats to probe
+        measure_frames (int): Frames timed per attempt; 0 skips measuring
+        max_attempts (int): Modes measured at most
+        min_rate_ratio (float): Fraction of the reported rate that counts as achieved
+        clock: Function returning the current time in seconds
+
+    Returns:
+        Optional[NegotiatedMode]: The chosen mode, or None if no mode was accepted
+    """
+    probed = probe_modes(capture, sizes, fourccs)
+    ranked = rank_modes(probed, preferred_size, min_size)
+    if not ranked:
+        return None
+
+    best: Optional[Tuple[CameraMode, Optional[float]]] = None
+    for candidate in ranked[:max(1, max_attempts)]:
+        mode = apply_mode(capture, candidate.width, candidate.height, candidate.fps,
+                          candidate.fourcc or None)
+        measured = measure_fps(capture, measure_frames, clock=clock) if measure_frames > 0 else None
+        if measured is not None:
+            logger.info(f"Camera mode {mode.width}x{mode.height} {mode.fourcc} reports "
+                        f"{mode.fps:.1f} FPS, measured {measured:.1f} FPS")
+        if best is None or (measured or 0.0) > (best[1] or 0.0):
+            best = (mode, measured)
+        if measure_frames <= 0 or (measured is not None and measured >= min_rate_ratio * mode.fps):
+            break
+
+    mode, measured = best
+    if mode != apply_mode(capture, mode.width, mode.height, mode.fps, mode.fourcc or None):
+        logger.warning("Camera did not return to the chosen mode")
+    buffer_size = minimize_buffering(capture)
+    return NegotiatedMode(mode, measured, buffer_size, probed)
@@ -0,0 +1,74 @@
+import numpy as np
+from typing import Tuple
+
+class FrameRingBuffer:
+    """
+    Fixed-capacity ring of equally sized frames backed by one preallocated array.
+
+    Producers write straight into next_slot() (e.g. as an OpenCV dst= argument)
+    and then call advance(), so steady-state use never allocates.
+    """
+
+    def __init__(self, capacity: int, shape: Tuple[int, ...], dtype=np.uint8):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity (int): Number of frames kept
+            shape (Tuple[int, ...]): Shape of a single frame
+            dtype: Element type of the frames
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.shape = tuple(shape)
+        self._frames = np.zeros((capacity,) + self.shape, dtype=dtype)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def next_slot(self) -> np.ndarray:
+        """
+        Get the slot the next frame should be written into.
+
+        Returns:
+            np.ndarray: View of the oldest slot, which advance() makes the newest
+        """
+        return self._frames[self._head]
+
+    def advance(self) -> None:
+        """Publish the frame written into next_slot() as the newest frame."""
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def push(self, frame: np.ndarray) -> None:
+        """
+        Copy a frame into the buffer as the newest frame.
+
+        Args:
+            frame (np.ndarray): Frame matching the buffer shape
+        """
+        np.copyto(self.next_slot(), frame)
+        self.advance()
+
+    def latest(self, age: int = 0) -> np.ndarray:
+        """
+        Get a stored frame by age.
+
+        Args:
+            age (int): 0 for the newest frame, 1 for the one before it, and so on
+
+        Returns:
+            np.ndarray: View of the requested frame
+        """
+        if not 0 <= age < self._count:
+            raise IndexError(f"frame age {age} out of range for {self._count} stored frames")
+        return self._frames[(self._head - 1 - age) % self.capacity]
+
+    def clear(self) -> None:
+        """Forget all stored frames without releasing the storage."""
+        self._head = 0
+        self._count = 0
@@ -0,0 +1,120 @@
+import time
+from typing import Optional, Dict
+
+class FrameGovernor:
+    """
+    Per-frame time budget that sheds optional work under load.
+
+    The caller times the work done for each frame and passes the duration
+    to record(). The governor keeps an exponentially weighted average of
+    that time as a fraction of the budget, normally the camera's frame
+    interval. When this load rises above shed_load the governor is
+    overloaded, and allow_optional() returns False. Callers then skip work
+    that does not affect the measurement, such as drawing the motion debug
+    view. The optional work is allowed again once the load falls below
+    restore_load. The gap between the two keeps it from flickering on and
+    off every frame. Each time work is skipped it is counted, so the
+    shedding can be reported.
+    """
+
+    def __init__(self, budget: Optional[float] = None, shed_load: float = 0.8,
+                 restore_load: float = 0.5, smoothing: float = 0.2):
+        """
+        Initialize the governor.
+
+        Args:
+            budget (Optional[float]): Seconds available per frame; set it later
+                (e.g. from the camera frame rate) if None
+            shed_load (float): Load, as a fraction of the budget, above which
+                optional work is skipped
+            restore_load (float): Load below which optional work resumes
+            smoothing (float): Weight of the newest frame in the load average
+        """
+        self.budget = budget
+        self.shed_load = shed_load
+        self.restore_load = restore_load
+        self.smoothing = smoothing
+        self.load = 0.0
+        self.overloaded = False
+
+        self.frames = 0
+        self.frames_over_budget = 0
+        self.work_shed = 0
+        self._timer = _FrameTimer(self)
+
+    def set_frame_rate(self, fps: float) -> None:
+        """
+        Set the budget to one frame interval.
+
+        Args:
+            fps (float): Frames per second the work has to keep up with
+        """
+        self.budget = 1.0 / fps
+
+    def record(self, duration: float) -> None:
+        """
+        Account for the time one frame took.
+
+        Args:
+            duration (float): Seconds spent on the frame
+        """
+        self.frames += 1
+        if not self.budget:
+            return
+        load = duration / self.budget
+        if load > 1.0:
+            self.frames_over_budget += 1
+        self.load += self.smoothing * (load - self.load)
+        if self.overloaded:
+            self.overloaded = self.load > self.restore_load
+        else:
+            self.overloaded = self.load > self.shed_load
+
+    def allow_optional(self) -> bool:
+        """
+        Check whether optional work fits in this frame's budget; a refusal is
+        counted as shed work.
+
+        Returns:
+            bool: False while overloaded
+        """
+        if self.overloaded:
+            self.work_shed += 1
+            return False
+        return True
+
+    def frame(self) -> "_FrameTimer":
+        """
+        Time a block of per-frame work.
+
+        Returns:
+            _FrameTimer: Reusable context manager that records the block's duration
+        """
+        return self._timer
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the governor's counters.
+
+        Returns:
+            Dict[str, int]: Frames timed, frames over the budget and optional
+            work skipped
+        """
+        return {
+            "frames": self.frames,
+            "over_budget": self.frames_over_budget,
+            "shed": self.work_shed
+        }
+
+
+class _FrameTimer:
+    def __init__(self, governor: FrameGovernor):
+        self.governor = governor
+        self._start = 0.0
+
+    def __enter__(self) -> "_FrameTimer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.governor.record(time.perf_counter() - self._start)
@@ -0,0 +1,437 @@
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Iterable, Sequence, Callable, Any
+import logging
+import time
+from src.python.camera_modes import (CameraMode, apply_mode, minimize_buffering,
+                                     negotiate as negotiate_mode)
+
+class FrameSource(ABC):
+    """
+    Base class for everything VideoCaptureModule can read frames from.
+
+    Subclasses implement _open() and _read_frame(); the base class handles
+    pacing and timestamps. Sources either run as fast as possible, stamping
+    frames on a deterministic virtual timeline (frame_index / nominal_fps), or
+    are paced to target_fps and stamped with time.perf_counter() when each
+    frame is delivered.
+    """
+
+    def __init__(self, target_fps: Optional[float] = None,
+                 start_time: Optional[float] = None):
+        """
+        Initialize the frame source.
+
+        Args:
+            target_fps (Optional[float]): Delivery rate to pace reads to; None runs
+                as fast as possible
+            start_time (Optional[float]): Timestamp of the first frame on the virtual
+                timeline; defaults to time.perf_counter() at open()
+        """
+        self.target_fps = target_fps
+        self.start_time = start_time
+        self.nominal_fps = 30.0
+        self.frame_index = 0
+        self.exhausted = False
+        self._opened = False
+        self._origin = 0.0
+        self.logger = logging.getLogger(__name__)
+
+    def open(self) -> bool:
+        """
+        Open the source and reset its timeline.
+
+        Returns:
+            bool: True if the source is ready to deliver frames
+        """
+        self.frame_index = 0
+        self.exhausted = False
+        self._opened = self._open()
+        self._origin = time.perf_counter() if self.start_time is None else self.start_time
+        return self._opened
+
+    def is_opened(self) -> bool:
+        """Return True while the source is open."""
+        return self._opened
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Read the next frame.
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]:
+                - Success flag
+                - Frame data if successful, None otherwise
+                - Capture timestamp in seconds (0.0 on failure)
+        """
+        if not self._opened:
+            return False, None, 0.0
+
+        self._pace()
+        ret, frame = self._read_frame()
+        if not ret:
+            return False, None, 0.0
+
+        if self.target_fps is None:
+            timestamp = self._origin + self.frame_index / self.nominal_fps
+        else:
+            timestamp = time.perf_counter()
+        self.frame_index += 1
+        return True, frame, timestamp
+
+    def release(self) -> None:
+        """Close the source and free its resources."""
+        self._opened = False
+
+    def _pace(self) -> None:
+        """Sleep until the next frame is due when pacing is enabled."""
+        if self.target_fps is None:
+            return
+
+        now = time.perf_counter()
+        deadline = self._origin + self.frame_index / self.target_fps
+        if deadline > now:
+            time.sleep(deadline - now)
+        elif now - deadline > 1.0 / self.target_fps:
+            # Fell behind by more than a frame: re-anchor instead of bursting
+            self._origin = now - self.frame_index / self.target_fps
+
+    @abstractmethod
+    def _open(self) -> bool:
+        """Open the underlying device or file; return True on success."""
+
+    @abstractmethod
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Produce the next frame; return (False, None) when none is available."""
+
+
+class CameraSource(FrameSource):
+    """
+    Live camera frames from cv2.VideoCapture.
+
+    Frames are stamped with time.perf_counter() between grab() and retrieve(),
+    which keeps decode time out of the timestamp.
+    """
+
+    def __init__(self, camera_index: int = 0, use_backend_timestamps: bool = False,
+                 negotiate: bool = False, preferred_size: Tuple[int, int] = (640, 480),
+                 measure_frames: int = 30,
+                 capture_factory: Optional[Callable[[int], Any]] = None):
+        """
+        Initialize the camera source.
+
+        Args:
+            camera_index (int): Index of the camera to use
+            use_backend_timestamps (bool): Stamp frames with CAP_PROP_POS_MSEC when the
+                backend reports it. Only enable this for backends whose buffer timestamps
+                come from the monotonic clock (e.g. V4L2)
+            negotiate (bool): Probe the camera's modes at open() and pick the highest
+                frame rate it really delivers at preferred_size (see
+                camera_modes.negotiate); when False 640x480 at 30 FPS is requested
+            preferred_size (Tuple[int, int]): Frame size to negotiate; other sizes
+                are only used if the camera does not offer it
+            measure_frames (int): Frames timed to verify each negotiated rate; 0 trusts
+                the driver's report
+            capture_factory (Optional[Callable[[int], Any]]): Creates the capture object
+                from the camera index; defaults to cv2.VideoCapture. Lets the source run
+                against a fake backend.
+        """
+        super().__init__()
+        self.camera_index = camera_index
+        self.use_backend_timestamps = use_backend_timestamps
+        self.negotiate = negotiate
+        self.preferred_size = preferred_size
+        self.measure_frames = measure_frames
+        self.capture_factory = capture_factory or cv2.VideoCapture
+        self.capture = None
+        # Mode the driver reports after open(), and the rate measured for it
+        self.mode: Optional[CameraMode] = None
+        self.measured_fps: Optional[float] = None
+        self.buffer_size: Optional[int] = None
+
+    def _open(self) -> bool:
+        self.capture = self.capture_factory(self.camera_index)
+        if not self.capture.isOpened():
+            self.logger.error(f"Failed to open camera at index {self.camera_index}")
+            return False
+
+        negotiated = None
+        if self.negotiate:
+            negotiated = negotiate_mode(self.capture, self.preferred_size,
+                                        measure_frames=self.measure_frames)
+        if negotiated is not None:
+            self.mode = negotiated.mode
+            self.measured_fps = negotiated.measured_fps
+            self.buffer_size = negotiated.buffer_size
+        else:
+            self.mode = apply_mode(self.capture, 640, 480, 30)
+            self.buffer_size = minimize_buffering(self.capture)
+
+        self.nominal_fps = self.measured_fps or self.mode.fps or 30.0
+        self.logger.info(f"Camera {self.camera_index}: {self.mode.width}x{self.mode.height} "
+                         f"{self.mode.fourcc or '?'} at {self.nominal_fps:.1f} FPS, "
+                         f"buffer size {self.buffer_size or 'default'}")
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        if not self._opened or self.capture is None:
+            return False, None, 0.0
+
+        if not self.capture.grab():
+            return False, None, 0.0
+        timestamp = time.perf_counter()
+
+        if self.use_backend_timestamps:
+            backend_msec = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+            if backend_msec > 0:
+                timestamp = backend_msec / 1000.0
+
+        ret, frame = self.capture.retrieve()
+        if not ret:
+            return False, None, 0.0
+
+        self.frame_index += 1
+        return True, frame, timestamp
+
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        # read() is overridden to stamp frames between grab() and retrieve();
+        # this plain read backs the base class hook
+        if self.capture is None or not self.capture.grab():
+            return False, None
+        return self.capture.retrieve()
+
+    def release(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        super().release()
+
+
+class VideoFileSource(FrameSource):
+    """Frames decoded from a recorded video file."""
+
+    def __init__(self, path: str, target_fps: Optional[float] = None,
+                 start_time: Optional[float] = None, loop: bool = False):
+        """
+        Initialize the video file source.
+
+        Args:
+            path (str): Path of the video file
+            target_fps (Optional[float]): Delivery rate to pace reads to; None runs
+                as fast as possible
+            start_time (Optional[float]): Timestamp of the first frame on the virtual timeline
+            loop (bool): Rewind and start over at the end of the file
+        """
+        super().__init__(target_fps, start_time)
+        self.path = path
+        self.loop = loop
+        self.capture = None
+
+    def _open(self) -> bool:
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            self.logger.error(f"Failed to open video file {self.path}")
+            return False
+        self.nominal_fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.capture.read()
+        if not ret and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        if not ret:
+            self.exhausted = True
+            return False, None
+        return True, frame
+
+    def release(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        super().release()
+
+
+class RawFrameFileSource(FrameSource):
+    """
+    Frames replayed from a memory-mapped file of raw uint8 frames.
+
+    The file holds consecutive height x width x channels frames with no header,
+    as written by write_raw_frames(). Only the pages that are read are loaded.
+    """
+
+    def __init__(self, path: str, width: int, height: int, channels: int = 3,
+                 fps: float = 30.0, target_fps: Optional[float] = None,
+                 start_time: Optional[float] = None, loop: bool = False,
+                 copy: bool = True):
+        """
+        Initialize the raw frame file source.
+
+        Args:
+            path (str): Path of the raw frame file
+            width (int): Frame width in pixels
+            height (int): Frame height in pixels
+            channels (int): Channels per pixel
+            fps (float): Rate the frames were recorded at
+            target_fps (Optional[float]): Delivery rate to pace reads to; None runs
+                as fast as possible
+            start_time (Optional[float]): Timestamp of the first frame on the virtual timeline
+            loop (bool): Start over at the end of the file
+            copy (bool): Return writable copies instead of read-only views of the map
+        """
+        super().__init__(target_fps, start_time)
+        self.path = path
+        self.frame_shape = (height, width, channels) if channels > 1 else (height, width)
+        self.nominal_fps = fps
+        self.loop = loop
+        self.copy = copy
+        self.frames: Optional[np.ndarray] = None
+        self._position = 0
+
+    def _open(self) -> bool:
+        try:
+            data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to map raw frame file {self.path}: {str(e)}")
+            return False
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        if data.size == 0 or data.size % frame_bytes != 0:
+            self.logger.error(f"{self.path} does not contain whole {self.frame_shape} frames")
+            return False
+
+        self.frames = data.reshape((-1,) + self.frame_shape)
+        self._position = 0
+        return True
+
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._position >= len(self.frames):
+            if not self.loop:
+                self.exhausted = True
+                return False, None
+            self._position = 0
+
+        frame = self.frames[self._position]
+        self._position += 1
+        return True, np.array(frame) if self.copy else frame
+
+    def release(self) -> None:
+        self.frames = None
+        super().release()
+
+
+class SyntheticSource(FrameSource):
+    """
+    Deterministic generated frames with motion injected at known frame indices.
+
+    Every frame shows the same seeded random texture plus optional cycled sensor
+    noise. Starting at each index in motion_frames, a bright square moves for
+    motion_duration frames, so the first frame with real motion is known exactly.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0,
+                 num_frames: Optional[int] = None,
+                 motion_frames: Iterable[int] = (),
+                 motion_duration: int = 1, motion_step: int = 8,
+                 noise_level: float = 0.0, seed: int = 0,
+                 target_fps: Optional[float] = None,
+                 start_time: Optional[float] = None):
+        """
+        Initialize the synthetic source.
+
+        Args:
+            width (int): Frame width in pixels
+            height (int): Frame height in pixels
+            fps (float): Nominal frame rate of the virtual timeline
+            num_frames (Optional[int]): Frames to produce; None is unlimited
+            motion_frames (Iterable[int]): Frame indices at which motion starts
+            motion_duration (int): Frames the square keeps moving after each start
+            motion_step (int): Pixels the square moves per frame while in motion
+            noise_level (float): Standard deviation of the added sensor noise
+            seed (int): Seed for the texture and noise generator
+            target_fps (Optional[float]): Delivery rate to pace reads to; None runs
+                as fast as possible
+            start_time (Optional[float]): Timestamp of the first frame on the virtual timeline
+        """
+        super().__init__(target_fps, start_time)
+        self.width = width
+        self.height = height
+        self.nominal_fps = fps
+        self.num_frames = num_frames
+        self.motion_frames = sorted(set(motion_frames))
+        self.motion_duration = motion_duration
+        self.motion_step = motion_step
+        self.noise_level = noise_level
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        texture = rng.integers(40, 90, size=(height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+        self._background = cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR)
+
+        # A small cycle of precomputed noisy backgrounds keeps generation down
+        # to one frame copy
+        self._noisy_backgrounds = []
+        if noise_level > 0:
+            for _ in range(8):
+                noise = rng.normal(0.0, noise_level, size=(height, width, 3)).astype(np.int16)
+                self._noisy_backgrounds.append(
+                    np.clip(self._background + noise, 0, 255).astype(np.uint8))
+
+        self.square_size = max(8, min(width, height) // 6)
+
+    def square_offset(self, index: int) -> int:
+        """
+        Get the horizontal offset of the moving square at a frame index.
+
+        Args:
+            index (int): Frame index
+
+        Returns:
+            int: Offset in pixels from the square's resting position
+        """
+        moved_frames = 0
+        for start in self.motion_frames:
+            if start > index:
+                break
+            moved_frames += min(index - start + 1, self.motion_duration)
+        span = max(1, self.width - self.square_size)
+        return (moved_frames * self.motion_step) % span
+
+    def _open(self) -> bool:
+        return True
+
+    def _read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        index = self.frame_index
+        if self.num_frames is not None and index >= self.num_frames:
+            self.exhausted = True
+            return False, None
+
+        if self._noisy_backgrounds:
+            frame = self._noisy_backgrounds[index % len(self._noisy_backgrounds)].copy()
+        else:
+            frame = self._background.copy()
+
+        x = self.square_offset(index)
+        y = (self.height - self.square_size) // 2
+        frame[y:y + self.square_size, x:x + self.square_size] = 255
+        return True, frame
+
+
+def write_raw_frames(path: str, frames: Sequence[np.ndarray]) -> int:
+    """
+    Write frames to a headerless raw file readable by RawFrameFileSource.
+
+    Args:
+        path (str): Output file path
+        frames (Sequence[np.ndarray]): uint8 frames of identical shape
+
+    Returns:
+        int: Number of frames written
+    """
+    count = 0
+    with open(path, 'wb') as f:
+        for frame in frames:
+            f.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+            count += 1
+    return count
@@ -0,0 +1,234 @@
+import json
+import logging
+import threading
+import time
+from typing import Optional, Callable, Dict, List
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of durations in nanoseconds.
+
+    Each power of two is split into four buckets, so any recorded value is
+    known to within 25%. Recording is a few integer operations and a list
+    increment with no allocation; quantiles are read from the buckets.
+    """
+
+    _BUCKETS = 256
+
+    def __init__(self):
+        self.counts: List[int] = [0] * self._BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record_ns(self, duration_ns: int) -> None:
+        """
+        Record one duration.
+
+        Args:
+            duration_ns (int): Duration in nanoseconds
+        """
+        if duration_ns < 4:
+            bucket = max(0, duration_ns)
+        else:
+            shift = duration_ns.bit_length() - 3
+            bucket = min(((shift + 1) << 2) | ((duration_ns >> shift) & 3), self._BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def record(self, seconds: float) -> None:
+        """
+        Record one duration given in seconds.
+
+        Args:
+            seconds (float): Duration in seconds
+        """
+        self.record_ns(int(seconds * 1e9))
+
+    @staticmethod
+    def _bucket_bounds(bucket: int) -> tuple:
+        if bucket < 4:
+            return bucket, bucket + 1
+        shift = (bucket >> 2) - 1
+        lower = (4 | (bucket & 3)) << shift
+        return lower, lower + (1 << shift)
+
+    def quantile_ns(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile.
+
+        Args:
+            q (float): Quantile in [0, 1]
+
+        Returns:
+            Optional[float]: Midpoint of the bucket holding the quantile, capped
+            at the maximum, or None when nothing was recorded
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen > rank:
+                lower, upper = self._bucket_bounds(bucket)
+                return min((lower + upper) / 2, self.max_ns)
+        return float(self.max_ns)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Get the distribution in milliseconds.
+
+        Returns:
+            Dict[str, Optional[float]]: count, mean, p50, p90, p99 and max
+        """
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else value / 1e6
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total_ns / self.count) if self.count else None,
+            "p50_ms": ms(self.quantile_ns(0.5)),
+            "p90_ms": ms(self.quantile_ns(0.9)),
+            "p99_ms": ms(self.quantile_ns(0.99)),
+            "max_ms": ms(self.max_ns) if self.count else None
+        }
+
+    def reset(self) -> None:
+        """Forget all recorded durations."""
+        self.counts = [0] * self._BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+
+class StageTimer:
+    """Reusable context manager that records the duration of its block."""
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+        self._start = 0
+
+    def __enter__(self) -> "StageTimer":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.record_ns(time.perf_counter_ns() - self._start)
+
+
+class MetricsRegistry:
+    """
+    Opt-in per-stage timing histograms and counters.
+
+    Modules given a registry record the duration of each hot-path stage into a
+    named LatencyHistogram; modules without one skip timing entirely. Counters
+    are not copied on every frame: each module registers a callable returning
+    the counters it already keeps, and snapshot() reads them on demand. Every
+    histogram has a single writer thread, so recording takes no lock.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._counter_sources: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self._created = time.perf_counter()
+        self._dump_thread: Optional[threading.Thread] = None
+        self._dump_stop = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """
+        Get the histogram for a stage, creating it on first use.
+
+        Args:
+            name (str): Stage name, e.g. "detect.preprocess"
+
+        Returns:
+            LatencyHistogram: The stage's histogram
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def timer(self, name: str) -> StageTimer:
+        """
+        Get a reusable context manager timing a stage.
+
+        Args:
+            name (str): Stage name
+
+        Returns:
+            StageTimer: Records each `with` block into the stage's histogram
+        """
+        return StageTimer(self.histogram(name))
+
+    def register_counters(self, prefix: str, source: Callable[[], Dict[str, int]]) -> None:
+        """
+        Expose a module's counters in snapshots.
+
+        Args:
+            prefix (str): Prepended to each counter name, e.g. "capture"
+            source (Callable[[], Dict[str, int]]): Returns the current counter values
+        """
+        self._counter_sources[prefix] = source
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Read all metrics.
+
+        Returns:
+            Dict[str, object]: Uptime, counters by "prefix.name" and per-stage
+            latency summaries
+        """
+        counters = {}
+        for prefix, source in self._counter_sources.items():
+            try:
+                for name, value in source().items():
+                    counters[f"{prefix}.{name}"] = value
+            except Exception as e:
+                self.logger.error(f"Error reading {prefix} counters: {str(e)}")
+        return {
+            "uptime_s": time.perf_counter() - self._created,
+            "counters": counters,
+            "stages": {name: h.summary() for name, h in sorted(self.histograms.items())}
+        }
+
+    def reset(self) -> None:
+        """Clear all histograms; counters belong to their modules and are kept."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def start_periodic_dump(self, interval: float = 10.0, path: Optional[str] = None) -> None:
+        """
+        Write a snapshot every interval seconds from a background thread.
+
+        Args:
+            interval (float): Seconds between snapshots
+            path (Optional[str]): Append snapshots as JSON lines to this file;
+                log them at INFO level if None
+        """
+        self.stop_periodic_dump()
+        self._dump_stop.clear()
+        self._dump_thread = threading.Thread(target=self._dump_loop, args=(interval, path),
+                                             name="MetricsDump", daemon=True)
+        self._dump_thread.start()
+
+    def stop_periodic_dump(self) -> None:
+        """Stop the periodic dump thread if it is running."""
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join(timeout=1.0)
+            self._dump_thread = None
+
+    def _dump_loop(self, interval: float, path: Optional[str]) -> None:
+        while not self._dump_stop.wait(interval):
+            line = json.dumps(self.snapshot())
+            if path is None:
+                self.logger.info(f"Metrics: {line}")
+            else:
+                with open(path, "a") as f:
+                    f.write(line + "\n")
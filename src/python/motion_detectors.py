@@ -0,0 +1,171 @@
+import cv2
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Tuple, Dict, Type, Optional
+from src.python.frame_buffer import FrameRingBuffer
+
+class MotionDetector(ABC):
+    """
+    Base class for strategies that turn preprocessed grayscale frames into a
+    per-pixel change image.
+
+    Callers write each new frame into input_buffer() and then call update(),
+    which fills self.diff. All state is preallocated, so every update is a
+    fixed number of O(pixels) passes with no allocation.
+    """
+
+    def __init__(self, shape: Tuple[int, int], frame_buffer_size: int = 3):
+        """
+        Initialize the detector.
+
+        Args:
+            shape (Tuple[int, int]): Height and width of the preprocessed frames
+            frame_buffer_size (int): Number of recent frames kept
+        """
+        self.shape = shape
+        self.frames = FrameRingBuffer(max(2, frame_buffer_size), shape)
+        self.diff = np.zeros(shape, np.uint8)
+
+    def input_buffer(self) -> np.ndarray:
+        """Get the buffer the next preprocessed frame should be written into."""
+        return self.frames.next_slot()
+
+    @abstractmethod
+    def update(self) -> bool:
+        """
+        Consume the frame written into input_buffer() and refresh self.diff.
+
+        Returns:
+            bool: True once self.diff holds a valid change image
+        """
+
+    def reset(self) -> None:
+        """Forget all history."""
+        self.frames.clear()
+
+
+class FrameDifferenceDetector(MotionDetector):
+    """Absolute difference between the two most recent frames."""
+
+    def update(self) -> bool:
+        self.frames.advance()
+        if len(self.frames) < 2:
+            return False
+        cv2.absdiff(self.frames.latest(1), self.frames.latest(0), dst=self.diff)
+        return True
+
+
+class RunningAverageDetector(MotionDetector):
+    """
+    Difference against an exponential running-average background.
+
+    Only pixels that did not change since the previous frame are blended into
+    the background (cv2.accumulateWeighted with a mask), so sensor noise and
+    slow drifts in lighting are absorbed at a rate set by alpha while a
+    moving subject never smears into it. A pixel that has stayed still for
+    settle_frames frames but still differs from the background, e.g. where
+    something moved and then stopped, is copied into the background at once.
+    Otherwise the spot it left and the spot it came to would keep triggering
+    while the average slowly caught up.
+    """
+
+    def __init__(self, shape: Tuple[int, int], frame_buffer_size: int = 3,
+                 alpha: float = 0.05, diff_threshold: int = 25,
+                 settle_frames: Optional[int] = None):
+        """
+        Initialize the detector.
+
+        Args:
+            shape (Tuple[int, int]): Height and width of the preprocessed frames
+            frame_buffer_size (int): Number of recent frames kept
+            alpha (float): Weight of each new frame in the background average
+            diff_threshold (int): Frame-to-frame change (0-255) above which a
+                pixel counts as moving and is left out of the background update
+            settle_frames (Optional[int]): Frames a pixel must stay still before
+                it replaces the background; defaults to frame_buffer_size
+        """
+        super().__init__(shape, frame_buffer_size)
+        self.alpha = alpha
+        self.diff_threshold = diff_threshold
+        self.settle_frames = min(254, settle_frames or self.frames.capacity)
+        self.background = np.zeros(shape, np.float32)
+        self._background_u8 = np.zeros(shape, np.uint8)
+        self._step = np.zeros(shape, np.uint8)
+        self._still_mask = np.zeros(shape, np.uint8)
+        self._settled_mask = np.zeros(shape, np.uint8)
+        # Consecutive frames each pixel has been still, saturating at 255
+        self._still_frames = np.zeros(shape, np.uint8)
+        self._initialized = False
+
+    def update(self) -> bool:
+        self.frames.advance()
+        frame = self.frames.latest(0)
+        if not self._initialized:
+            np.copyto(self.background, frame)
+            self._still_frames.fill(0)
+            self._initialized = True
+            return False
+
+        cv2.convertScaleAbs(self.background, dst=self._background_u8)
+        cv2.absdiff(frame, self._background_u8, dst=self.diff)
+
+        cv2.absdiff(frame, self.frames.latest(1), dst=self._step)
+        cv2.threshold(self._step, self.diff_threshold, 255, cv2.THRESH_BINARY_INV,
+                      dst=self._still_mask)
+        cv2.add(self._still_frames, 1, dst=self._still_frames, mask=self._still_mask)
+        # The mask is 0 or 255, so this zeroes the count of every moving pixel
+        cv2.bitwise_and(self._still_frames, self._still_mask, dst=self._still_frames)
+
+        cv2.accumulateWeighted(frame, self.background, self.alpha, mask=self._still_mask)
+        cv2.threshold(self._still_frames, self.settle_frames - 1, 255, cv2.THRESH_BINARY,
+                      dst=self._settled_mask)
+        cv2.accumulateWeighted(frame, self.background, 1.0, mask=self._settled_mask)
+        return True
+
+    def reset(self) -> None:
+        super().reset()
+        self._initialized = False
+
+
+class AccumulatedDifferenceDetector(MotionDetector):
+    """
+    Sum of the consecutive frame differences across the frame buffer.
+
+    A running 16-bit sum adds the newest step difference and subtracts the one
+    leaving the window, so movement too slow to cross the threshold between
+    two frames still accumulates over frame_buffer_size frames.
+    """
+
+    def __init__(self, shape: Tuple[int, int], frame_buffer_size: int = 3):
+        super().__init__(shape, frame_buffer_size)
+        self.steps = FrameRingBuffer(self.frames.capacity - 1, shape)
+        self.accumulated = np.zeros(shape, np.uint16)
+
+    def update(self) -> bool:
+        self.frames.advance()
+        if len(self.frames) < 2:
+            return False
+
+        step = self.steps.next_slot()
+        if len(self.steps) == self.steps.capacity:
+            # The slot about to be overwritten holds the step leaving the window
+            np.subtract(self.accumulated, step, out=self.accumulated)
+        cv2.absdiff(self.frames.latest(1), self.frames.latest(0), dst=step)
+        self.steps.advance()
+        np.add(self.accumulated, step, out=self.accumulated)
+
+        # Saturate the sum into the 8-bit change image
+        cv2.convertScaleAbs(self.accumulated, dst=self.diff)
+        return True
+
+    def reset(self) -> None:
+        super().reset()
+        self.steps.clear()
+        self.accumulated.fill(0)
+
+
+DETECTORS: Dict[str, Type[MotionDetector]] = {
+    'difference': FrameDifferenceDetector,
+    'running_average': RunningAverageDetector,
+    'accumulated': AccumulatedDifferenceDetector
+}
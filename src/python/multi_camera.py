@@ -0,0 +1,413 @@
+import argparse
+import functools
+import logging
+import multiprocessing
+import os
+import queue
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Optional, Callable, NamedTuple, List, Dict, Tuple, Any
+from src.python.frame_sources import FrameSource, CameraSource
+from src.python.response_detection import ResponseDetectionModule
+
+class CameraSpec(NamedTuple):
+    """How a worker process builds its camera and detector."""
+    source_factory: Callable[[], FrameSource]
+    frame_shape: Tuple[int, int, int] = (480, 640, 3)
+    detector_options: Dict[str, Any] = {}
+    name: str = ""
+
+
+class MotionEvent(NamedTuple):
+    """A frame on which a worker detected movement."""
+    camera: int
+    sequence: int
+    timestamp: float
+    motion_score: float
+
+
+class _Progress(NamedTuple):
+    # Sent by a worker when it has published every event up to timestamp
+    camera: int
+    timestamp: float
+
+
+def camera_spec(camera_index: int, frame_shape: Tuple[int, int, int] = (480, 640, 3),
+                negotiate: bool = False, **detector_options) -> CameraSpec:
+    """
+    Describe a webcam worker.
+
+    Args:
+        camera_index (int): OpenCV camera index
+        frame_shape (Tuple[int, int, int]): Shape of the shared frame slots
+        negotiate (bool): Let each worker probe and measure the camera's modes
+            at startup instead of requesting 640x480 at 30 FPS
+        **detector_options: Passed to ResponseDetectionModule
+
+    Returns:
+        CameraSpec: Picklable worker description
+    """
+    return CameraSpec(functools.partial(CameraSource, camera_index, negotiate=negotiate),
+                      frame_shape, detector_options, f"camera {camera_index}")
+
+
+class SharedFrameSlots:
+    """
+    A few frame slots in one shared memory block, written by a single worker.
+
+    Layout: a header (latest slot, done flag, frames written, movement
+    frames), one sequence counter per slot, per-slot (timestamp, motion
+    score, frame number) and the frame data. Each slot is a seqlock: the
+    writer makes the slot's counter odd while copying and even afterwards,
+    and a reader retries if the counter changed or was odd, so readers never
+    block the worker and never see a torn frame.
+    """
+
+    _HEADER = 4
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int,
+                 frame_shape: Tuple[int, int, int]):
+        self.shm = shm
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        buf = shm.buf
+        offset = 0
+        self.header = np.ndarray((self._HEADER,), np.int64, buf, offset)
+        offset += self.header.nbytes
+        self.seqs = np.ndarray((slots,), np.int64, buf, offset)
+        offset += self.seqs.nbytes
+        self.meta = np.ndarray((slots, 3), np.float64, buf, offset)
+        offset += self.meta.nbytes
+        self.frames = np.ndarray((slots, *self.frame_shape), np.uint8, buf, offset)
+
+    @classmethod
+    def size(cls, slots: int, frame_shape: Tuple[int, int, int]) -> int:
+        """Bytes of shared memory needed for the given slots."""
+        return (cls._HEADER + slots + 3 * slots) * 8 + slots * int(np.prod(frame_shape))
+
+    @classmethod
+    def create(cls, slots: int, frame_shape: Tuple[int, int, int]) -> "SharedFrameSlots":
+        """Allocate a new shared block with an empty header."""
+        shm = shared_memory.SharedMemory(create=True, size=cls.size(slots, frame_shape))
+        ring = cls(shm, slots, frame_shape)
+        ring.header[:] = (-1, 0, 0, 0)
+        ring.seqs[:] = 0
+        return ring
+
+    @property
+    def done(self) -> bool:
+        """True once the worker has stopped writing."""
+        return bool(self.header[1])
+
+    @property
+    def frames_written(self) -> int:
+        return int(self.header[2])
+
+    @property
+    def frames_triggered(self) -> int:
+        return int(self.header[3])
+
+    def latest_timestamp(self) -> Optional[float]:
+        """Capture timestamp of the newest complete frame, None before the first."""
+        slot = int(self.header[0])
+        return None if slot < 0 else float(self.meta[slot, 0])
+
+    def write(self, frame: np.ndarray, timestamp: float, motion_score: float,
+              triggered: bool) -> int:
+        """
+        Publish a frame; only the owning worker calls this.
+
+        Frames whose size differs from the slots are resized into place.
+
+        Returns:
+            int: Frame number of the published frame
+        """
+        slot = (int(self.header[0]) + 1) % self.slots
+        number = int(self.header[2]) + 1
+        self.seqs[slot] += 1
+        if frame.shape == self.frame_shape:
+            np.copyto(self.frames[slot], frame)
+        else:
+            cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]), dst=self.frames[slot])
+        self.meta[slot] = (timestamp, motion_score, number)
+        self.seqs[slot] += 1
+        self.header[0] = slot
+        self.header[2] = number
+        if triggered:
+            self.header[3] += 1
+        return number
+
+    def read_latest(self, out: np.ndarray,
+                    retries: int = 8) -> Tuple[bool, int, float, float]:
+        """
+        Copy the newest frame into out.
+
+        Args:
+            out (np.ndarray): Destination with the slot frame shape
+            retries (int): Attempts before giving up on a slot being rewritten
+
+        Returns:
+            Tuple[bool, int, float, float]: Success flag, frame number,
+            capture timestamp and motion score
+        """
+        for _ in range(retries):
+            slot = int(self.header[0])
+            if slot < 0:
+                return False, 0, 0.0, 0.0
+            before = int(self.seqs[slot])
+            if before & 1:
+                continue
+            np.copyto(out, self.frames[slot])
+            timestamp, score, number = self.meta[slot]
+            if int(self.seqs[slot]) == before:
+                return True, int(number), float(timestamp), float(score)
+        return False, 0, 0.0, 0.0
+
+    def close(self) -> None:
+        # Views into the buffer must be released before the block can close
+        del self.header, self.seqs, self.meta, self.frames
+        self.shm.close()
+
+
+def _camera_worker(camera: int, spec: CameraSpec, shm_name: str, slots: int,
+                   events: multiprocessing.Queue, stop_event, opencv_threads: int,
+                   progress_interval: float) -> None:
+    cv2.setNumThreads(opencv_threads)
+    logger = logging.getLogger(__name__)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = SharedFrameSlots(shm, slots, spec.frame_shape)
+    source = spec.source_factory()
+    try:
+        if not source.open():
+            logger.error(f"Camera {camera} failed to open")
+            return
+        response = ResponseDetectionModule(**{"visualize": False, **spec.detector_options})
+        next_progress = 0.0
+        while not stop_event.is_set():
+            ret, frame, timestamp = source.read()
+            if not ret:
+                if source.exhausted:
+                    break
+                time.sleep(0.005)
+                continue
+
+            triggered, _ = response.detect_movement(frame, timestamp, False)
+            number = ring.write(frame, timestamp, response.last_motion_score, triggered)
+            if triggered:
+                try:
+                    events.put_nowait(MotionEvent(camera, number, timestamp,
+                                                  response.last_motion_score))
+                except queue.Full:
+                    # The coordinator is not keeping up; the frame counters still
+                    # record the movement
+                    pass
+            elif time.perf_counter() >= next_progress:
+                # Events and progress share one queue, so the coordinator never
+                # sees progress ahead of an event that precedes it
+                next_progress = time.perf_counter() + progress_interval
+                try:
+                    events.put_nowait(_Progress(camera, timestamp))
+                except queue.Full:
+                    pass
+        events.put(_Progress(camera, float('inf')))
+    finally:
+        source.release()
+        ring.header[1] = 1
+        ring.close()
+
+
+class MultiCameraCoordinator:
+    """
+    Runs one capture and detection worker process per camera.
+
+    Each worker owns its camera and a ResponseDetectionModule and publishes
+    frames into SharedFrameSlots, so frames cross the process boundary
+    without pickling; only small MotionEvent records go through a queue.
+    Every worker stamps frames on the same monotonic clock
+    (time.perf_counter(), which is system-wide on Linux and Windows), and
+    poll_events() merges the per-camera streams into one timestamp-ordered
+    stream. Workers report their progress through the event queue, and an
+    event is released once every running camera has reported progress at
+    least that recent, so later events cannot arrive out of order.
+    OpenCV threads are divided between the workers so the station's cores
+    are shared rather than oversubscribed.
+    """
+
+    def __init__(self, cameras: List[CameraSpec], slots: int = 3,
+                 event_queue_size: int = 4096, progress_interval: float = 0.02):
+        """
+        Initialize the coordinator.
+
+        Args:
+            cameras (List[CameraSpec]): One description per worker
+            slots (int): Shared frame slots per camera
+            event_queue_size (int): Motion events buffered between workers and
+                the coordinator
+            progress_interval (float): Seconds between progress reports from an
+                idle worker; bounds how long events wait to be merged
+        """
+        self.cameras = list(cameras)
+        self.slots = slots
+        self.progress_interval = progress_interval
+        self._context = multiprocessing.get_context()
+        self._events = self._context.Queue(event_queue_size)
+        self._stop_event = self._context.Event()
+        self._rings: List[SharedFrameSlots] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._pending: List[MotionEvent] = []
+        self._progress: List[float] = []
+        self._frames: List[np.ndarray] = []
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def is_running(self) -> bool:
+        """True while at least one worker is alive."""
+        return any(p.is_alive() for p in self._processes)
+
+    def start(self) -> bool:
+        """
+        Allocate the shared frame slots and start one worker per camera.
+
+        Returns:
+            bool: True if the workers were started
+        """
+        if self._processes:
+            return True
+        threads = max(1, (os.cpu_count() or 1) // max(1, len(self.cameras)))
+        self._stop_event.clear()
+        self._progress = [float('-inf')] * len(self.cameras)
+        try:
+            for camera, spec in enumerate(self.cameras):
+                ring = SharedFrameSlots.create(self.slots, spec.frame_shape)
+                self._rings.append(ring)
+                self._frames.append(np.empty(spec.frame_shape, np.uint8))
+                process = self._context.Process(
+                    target=_camera_worker, name=f"CameraWorker-{camera}",
+                    args=(camera, spec, ring.shm.name, self.slots, self._events,
+                          self._stop_event, threads, self.progress_interval),
+                    daemon=True)
+                process.start()
+                self._processes.append(process)
+        except Exception as e:
+            self.logger.error(f"Error starting camera workers: {str(e)}")
+            self.stop()
+            return False
+        self.logger.info(f"Started {len(self._processes)} camera workers")
+        return True
+
+    def get_latest_frame(self, camera: int) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Get the newest frame of one camera.
+
+        The frame is copied into a buffer owned by the coordinator, which is
+        reused on the next call for the same camera.
+
+        Args:
+            camera (int): Camera position in the list given at construction
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]: Success flag, frame and
+            capture timestamp
+        """
+        out = self._frames[camera]
+        success, _, timestamp, _ = self._rings[camera].read_latest(out)
+        if not success:
+            return False, None, 0.0
+        return True, out, timestamp
+
+    def poll_events(self, timeout: float = 0.0) -> List[MotionEvent]:
+        """
+        Collect motion events from all cameras in timestamp order.
+
+        Args:
+            timeout (float): Seconds to wait for the first new event
+
+        Returns:
+            List[MotionEvent]: Events that can no longer be preceded by another
+            camera's event, oldest first
+        """
+        try:
+            item = self._events.get(timeout=timeout) if timeout > 0 else self._events.get_nowait()
+            while True:
+                if isinstance(item, _Progress):
+                    self._progress[item.camera] = max(self._progress[item.camera],
+                                                      item.timestamp)
+                else:
+                    self._pending.append(item)
+                    self._progress[item.camera] = max(self._progress[item.camera],
+                                                      item.timestamp)
+                item = self._events.get_nowait()
+        except queue.Empty:
+            pass
+
+        # A camera whose worker died cannot hold the others back
+        watermark = min((progress for progress, process in zip(self._progress, self._processes)
+                         if process.is_alive() or progress == float('inf')),
+                        default=float('inf'))
+        self._pending.sort(key=lambda e: (e.timestamp, e.camera))
+        split = 0
+        while split < len(self._pending) and self._pending[split].timestamp <= watermark:
+            split += 1
+        released, self._pending = self._pending[:split], self._pending[split:]
+        return released
+
+    def get_stats(self) -> List[Dict[str, int]]:
+        """
+        Get per-camera frame accounting.
+
+        Returns:
+            List[Dict[str, int]]: Frames published and frames with movement
+        """
+        return [{"frames": ring.frames_written, "triggered": ring.frames_triggered}
+                for ring in self._rings]
+
+    def stop(self) -> None:
+        """Stop the workers and release the shared memory."""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        for ring in self._rings:
+            shm = ring.shm
+            ring.close()
+            shm.unlink()
+        self._rings = []
+        self._frames = []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-camera motion detection")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[0, 1])
+    parser.add_argument("--threshold", type=float, default=1000)
+    parser.add_argument("--negotiate-camera", action="store_true",
+                        help="probe each camera and use its fastest verified mode at 640x480")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    coordinator = MultiCameraCoordinator(
+        [camera_spec(index, negotiate=args.negotiate_camera, movement_threshold=args.threshold)
+         for index in args.cameras])
+    if not coordinator.start():
+        return
+    try:
+        while coordinator.is_running:
+            for event in coordinator.poll_events():
+                print(f"{event.timestamp:.4f}  camera {args.cameras[event.camera]}  "
+                      f"movement {event.motion_score:.0f}")
+            for camera, index in enumerate(args.cameras):
+                success, frame, _ = coordinator.get_latest_frame(camera)
+                if success:
+                    cv2.imshow(f"Camera {index}", frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        coordinator.stop()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import numpy as np
+from typing import Optional, Tuple
+
+class MotionTimeSeries:
+    """
+    Fixed-capacity history of (capture timestamp, motion score) samples.
+
+    Samples live in two preallocated arrays used as a ring, so appending is
+    O(1) and never allocates; the oldest samples are overwritten once the
+    capacity is reached.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize the series.
+
+        Args:
+            capacity (int): Number of most recent samples kept
+        """
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, np.float64)
+        self.scores = np.zeros(capacity, np.float32)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, score: float) -> None:
+        """
+        Record one sample.
+
+        Args:
+            timestamp (float): Capture timestamp of the frame in seconds
+            score (float): Motion score of the frame
+        """
+        self.timestamps[self._head] = timestamp
+        self.scores[self._head] = score
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the stored samples in chronological order.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Timestamps and scores, oldest first
+        """
+        if self._count < self.capacity:
+            return self.timestamps[:self._count], self.scores[:self._count]
+        order = np.roll(np.arange(self.capacity), -self._head)
+        return self.timestamps[order], self.scores[order]
+
+    def clear(self) -> None:
+        """Forget all samples."""
+        self._head = 0
+        self._count = 0
+
+
+def estimate_onset(timestamps: np.ndarray, scores: np.ndarray, threshold: float,
+                   start_time: float = float('-inf'),
+                   max_edge_samples: int = 3) -> Optional[float]:
+    """
+    Estimate when the motion score crossed the threshold with sub-frame resolution.
+
+    The first sample at or after start_time whose score exceeds the threshold
+    marks the rising edge. A line is fitted through the last sample before it
+    and up to max_edge_samples rising samples from it onwards (plain linear
+    interpolation when only the crossing sample is available), and the time
+    at which that line reaches the threshold is returned. The estimate is
+    clamped between the two samples that bracket the crossing and to
+    start_time.
+
+    Args:
+        timestamps (np.ndarray): Sample capture timestamps in seconds, ascending
+        scores (np.ndarray): Motion score of each sample
+        threshold (float): Score level that counts as movement
+        start_time (float): Ignore crossings captured before this time
+        max_edge_samples (int): Rising samples used for the fit, from the crossing on
+
+    Returns:
+        Optional[float]: Estimated crossing time, or None if the score never
+        exceeded the threshold
+    """
+    candidates = np.flatnonzero((timestamps >= start_time) & (scores > threshold))
+    if candidates.size == 0:
+        return None
+
+    crossing = int(candidates[0])
+    if crossing == 0:
+        return float(max(timestamps[0], start_time))
+
+    # Extend the edge while the score keeps rising
+    end = crossing
+    while (end + 1 < len(scores) and end + 1 < crossing + max_edge_samples
+           and scores[end + 1] > scores[end]):
+        end += 1
+
+    edge_t = np.asarray(timestamps[crossing - 1:end + 1], dtype=np.float64)
+    edge_s = np.asarray(scores[crossing - 1:end + 1], dtype=np.float64)
+    origin = edge_t[0]
+    if edge_t[-1] <= origin:
+        return float(max(timestamps[crossing], start_time))
+    if len(edge_t) == 2:
+        slope = (edge_s[1] - edge_s[0]) / (edge_t[1] - edge_t[0])
+        intercept = edge_s[0]
+    else:
+        slope, intercept = np.polyfit(edge_t - origin, edge_s, 1)
+
+    if slope <= 0:
+        onset = timestamps[crossing]
+    else:
+        onset = origin + (threshold - intercept) / slope
+        onset = min(max(onset, timestamps[crossing - 1]), timestamps[crossing])
+
+    return float(max(onset, start_time))
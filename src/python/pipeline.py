@@ -0,0 +1,196 @@
+import numpy as np
+from typing import Optional, Callable, NamedTuple, Dict
+import logging
+import threading
+import time
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.frame_governor import FrameGovernor
+
+class PipelineResult(NamedTuple):
+    """Outcome of capturing and analyzing one frame."""
+    sequence: int
+    frame: np.ndarray
+    timestamp: float
+    movement_detected: bool
+    motion_frame: Optional[np.ndarray]
+
+
+class DetectionPipeline:
+    """
+    Runs capture and motion detection on a dedicated thread at camera rate.
+
+    Each analyzed frame is published to a latest-result slot that the display
+    side polls or waits on. A display that falls behind simply gets the newest
+    result and the ones it missed are counted as skipped, so GUI cost never
+    delays detection. Trial logic that must see every frame goes in the
+    on_frame callback, which runs on the detection thread.
+
+    With a governor, detection and on_frame are timed against the camera's
+    frame interval, and the motion debug view is skipped while they do not
+    fit, so detection keeps up with the camera.
+    """
+
+    def __init__(self, capture: VideoCaptureModule, response: ResponseDetectionModule,
+                 on_frame: Optional[Callable[[PipelineResult], None]] = None,
+                 visualize: Optional[bool] = None,
+                 governor: Optional[FrameGovernor] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            capture (VideoCaptureModule): Frame provider; started by start() if needed
+            response (ResponseDetectionModule): Motion detector
+            on_frame (Optional[Callable[[PipelineResult], None]]): Called on the
+                detection thread after each frame is analyzed
+            visualize (Optional[bool]): Produce the motion debug view; defaults to
+                the detector's own setting
+            governor (Optional[FrameGovernor]): Sheds the debug view under load;
+                its budget is set from the source frame rate by start() if unset
+        """
+        self.capture = capture
+        self.response = response
+        self.on_frame = on_frame
+        self.visualize = visualize
+        self.governor = governor
+
+        self._latest_result: Optional[PipelineResult] = None
+        self._result_ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._consumed_sequence = 0
+
+        self.frames_processed = 0
+        self.results_skipped = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def is_running(self) -> bool:
+        """True while the detection thread is alive."""
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self) -> bool:
+        """
+        Start capture (if needed) and the detection thread.
+
+        Returns:
+            bool: True if the pipeline is running
+        """
+        if not self.capture.is_running and not self.capture.start():
+            return False
+        if self.governor is not None and self.governor.budget is None:
+            self.governor.set_frame_rate(self.capture.capture.nominal_fps)
+
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="DetectionPipeline",
+                                        daemon=True)
+        self._worker.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop the detection thread; the capture is left to its owner."""
+        self._stop_event.set()
+        self._result_ready.set()
+        if self._worker is not None:
+            self._worker.join(timeout=1.0)
+            self._worker = None
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the detection thread to finish, e.g. at the end of a finite source.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait
+
+        Returns:
+            bool: True if the thread is no longer running
+        """
+        if self._worker is not None:
+            self._worker.join(timeout)
+        return not self.is_running
+
+    def get_latest_result(self) -> Optional[PipelineResult]:
+        """
+        Take the newest result without blocking.
+
+        Returns:
+            Optional[PipelineResult]: The newest result if it has not been taken
+            yet, None otherwise
+        """
+        result = self._latest_result
+        if result is None or result.sequence == self._consumed_sequence:
+            return None
+
+        self.results_skipped += result.sequence - self._consumed_sequence - 1
+        self._consumed_sequence = result.sequence
+        return result
+
+    def wait_for_result(self, timeout: Optional[float] = None) -> Optional[PipelineResult]:
+        """
+        Wait until a result newer than the last one taken is available.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait
+
+        Returns:
+            Optional[PipelineResult]: The newest result, or None on timeout or stop
+        """
+        result = self.get_latest_result()
+        if result is not None:
+            return result
+
+        self._result_ready.clear()
+        # Re-check after clearing so a result published in between is not missed
+        result = self.get_latest_result()
+        if result is not None:
+            return result
+        self._result_ready.wait(timeout)
+        return self.get_latest_result()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get frame accounting for the pipeline.
+
+        Returns:
+            Dict[str, int]: Frames analyzed and results the display never took
+        """
+        return {
+            "processed": self.frames_processed,
+            "skipped": self.results_skipped
+        }
+
+    def _run(self) -> None:
+        sequence = 0
+        while not self._stop_event.is_set():
+            # Blocks until the grabber publishes a frame this thread has not seen
+            success, frame, timestamp = self.capture.wait_for_frame(timeout=0.1)
+            if not success:
+                source = self.capture.capture
+                if not self.capture.is_running or source is None or source.exhausted:
+                    break
+                if not self.capture.threaded:
+                    time.sleep(0.005)
+                continue
+
+            start = time.perf_counter()
+            visualize = self.visualize if self.visualize is not None else self.response.visualize
+            if visualize and self.governor is not None:
+                visualize = self.governor.allow_optional()
+            movement_detected, motion_frame = self.response.detect_movement(
+                frame, timestamp, visualize)
+            sequence += 1
+            result = PipelineResult(sequence, frame, timestamp, movement_detected, motion_frame)
+            self.frames_processed += 1
+
+            if self.on_frame is not None:
+                try:
+                    self.on_frame(result)
+                except Exception as e:
+                    self.logger.error(f"Error in frame callback: {str(e)}")
+            if self.governor is not None:
+                self.governor.record(time.perf_counter() - start)
+
+            self._latest_result = result
+            self._result_ready.set()
+
+        self._result_ready.set()
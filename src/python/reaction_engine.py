@@ -0,0 +1,193 @@
+import numpy as np
+from typing import Optional, Callable, NamedTuple, List, Dict
+import logging
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.reaction_statistics import StreamingStatistics
+from src.python.timing import TimingModule, EVENT_STIMULUS_ON
+
+# Engine states
+STATE_WAITING = 'waiting'
+STATE_STIMULUS = 'stimulus'
+STATE_FINISHED = 'finished'
+
+# Trial event kinds
+TRIAL_STIMULUS_ON = 'stimulus_on'
+TRIAL_RESPONSE = 'response'
+TRIAL_TIMEOUT = 'timeout'
+
+class TrialEvent(NamedTuple):
+    """A state change of the reaction test."""
+    kind: str
+    trial: int
+    timestamp: float
+    reaction_time: Optional[float] = None
+    stimulus: Optional[Dict[str, str]] = None
+
+
+class ReactionTestEngine:
+    """
+    Headless reaction test state machine.
+
+    The engine is fed (frame, timestamp) pairs, or detection results through
+    step(), and moves between three states:
+
+    - waiting: no stimulus; the next scheduled stimulus is shown once its
+      delay has elapsed
+    - stimulus: a stimulus is shown and the response window is open; the
+      first movement ends the trial with a response, otherwise it ends with a
+      timeout after response_timeout_ms
+    - finished: the stimulus schedule is exhausted
+
+    Every transition is returned as a TrialEvent and passed to on_event. All
+    decisions use the frame timestamps, never the wall clock, so the same
+    engine drives the interactive app and offline replays of recorded sessions.
+    """
+
+    def __init__(self, stimuli: Optional[StimuliDisplayModule] = None,
+                 response: Optional[ResponseDetectionModule] = None,
+                 timing: Optional[TimingModule] = None,
+                 statistics: Optional[StreamingStatistics] = None,
+                 response_timeout_ms: float = 2000.0,
+                 min_delay: float = 2.0, max_delay: float = 4.0,
+                 on_event: Optional[Callable[[TrialEvent], None]] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            stimuli (Optional[StimuliDisplayModule]): Stimulus state and schedule;
+                created if not given
+            response (Optional[ResponseDetectionModule]): Motion detector; a
+                headless one is created if not given
+            timing (Optional[TimingModule]): Receives stimulus onset events if given
+            statistics (Optional[StreamingStatistics]): Reaction time summary;
+                created if not given
+            response_timeout_ms (float): Time after onset at which a trial without
+                movement ends
+            min_delay (float): Minimum delay between stimuli in seconds, used when
+                the stimuli module has no schedule yet
+            max_delay (float): Maximum delay between stimuli in seconds, used when
+                the stimuli module has no schedule yet
+            on_event (Optional[Callable[[TrialEvent], None]]): Called for every event
+        """
+        self.stimuli = stimuli if stimuli is not None else StimuliDisplayModule()
+        self.response = (response if response is not None
+                         else ResponseDetectionModule(visualize=False))
+        self.timing = timing
+        self.statistics = statistics if statistics is not None else StreamingStatistics()
+        self.response_timeout_ms = response_timeout_ms
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.on_event = on_event
+
+        self.state = STATE_WAITING
+        self.trial = -1
+        self._started = False
+        self.logger = logging.getLogger(__name__)
+
+    def process_frame(self, frame: np.ndarray, timestamp: float) -> List[TrialEvent]:
+        """
+        Run motion detection on a frame and advance the state machine.
+
+        Args:
+            frame (np.ndarray): Captured BGR frame
+            timestamp (float): Capture timestamp of the frame in seconds
+
+        Returns:
+            List[TrialEvent]: Events caused by this frame, possibly empty
+        """
+        movement_detected, _ = self.response.detect_movement(frame, timestamp, False)
+        return self.step(timestamp, movement_detected)
+
+    def step(self, timestamp: float, movement_detected: bool) -> List[TrialEvent]:
+        """
+        Advance the state machine with an already analyzed frame.
+
+        Args:
+            timestamp (float): Capture timestamp of the frame in seconds
+            movement_detected (bool): Detection result for the frame
+
+        Returns:
+            List[TrialEvent]: Events caused by this frame, possibly empty
+        """
+        events: List[TrialEvent] = []
+        if not self._started:
+            # The first delay counts from the first frame of the session
+            self.stimuli.last_stimulus_time = timestamp
+            self._started = True
+
+        if self.state == STATE_STIMULUS:
+            if movement_detected and self.response.waiting_for_response:
+                reaction_time = self.response.stop_response_window()
+                if reaction_time is not None:
+                    self.statistics.add(reaction_time)
+                self._end_trial(events, TRIAL_RESPONSE, timestamp, reaction_time)
+            elif self.stimuli.get_current_stimulus_duration(timestamp) > self.response_timeout_ms:
+                reaction_time = self.response.stop_response_window()
+                if reaction_time is not None:
+                    self.statistics.add(reaction_time)
+                self._end_trial(events, TRIAL_TIMEOUT, timestamp, reaction_time)
+
+        elif self.state == STATE_WAITING:
+            if self.stimuli.should_show_stimulus(self.min_delay, self.max_delay, timestamp):
+                self.stimuli.activate_random_stimulus(timestamp)
+                self.response.start_response_window(timestamp)
+                if self.timing is not None:
+                    self.timing.record_event(EVENT_STIMULUS_ON, timestamp)
+                self.trial += 1
+                self.state = STATE_STIMULUS
+                self._emit(events, TrialEvent(TRIAL_STIMULUS_ON, self.trial, timestamp,
+                                              stimulus=self.stimuli.current_stimulus))
+            elif self.stimuli.schedule is not None and self.stimuli.schedule.current() is None:
+                self.state = STATE_FINISHED
+
+        return events
+
+    def adjust_sensitivity(self, factor: float) -> float:
+        """
+        Scale the movement threshold.
+
+        With auto-calibration the multiple of the idle noise floor is scaled
+        instead, and the threshold follows once the calibration is ready.
+
+        Args:
+            factor (float): Multiplier for the threshold; below 1 makes detection
+                more sensitive
+
+        Returns:
+            float: The new threshold
+        """
+        auto_threshold = self.response.auto_threshold
+        if auto_threshold is None:
+            self.response.movement_threshold *= factor
+        else:
+            auto_threshold.multiplier *= factor
+            if auto_threshold.ready:
+                self.response.movement_threshold = auto_threshold.threshold
+        return self.response.movement_threshold
+
+    def reset(self) -> None:
+        """End any open trial and start over from the waiting state."""
+        if self.state == STATE_STIMULUS:
+            self.response.stop_response_window()
+            self.stimuli.deactivate_stimulus()
+        if self.stimuli.schedule is not None:
+            self.stimuli.schedule.reset()
+        self.state = STATE_WAITING
+        self.trial = -1
+        self._started = False
+
+    def _end_trial(self, events: List[TrialEvent], kind: str, timestamp: float,
+                   reaction_time: Optional[float]) -> None:
+        stimulus = self.stimuli.current_stimulus
+        self.stimuli.deactivate_stimulus(timestamp)
+        self.state = STATE_WAITING
+        self._emit(events, TrialEvent(kind, self.trial, timestamp, reaction_time, stimulus))
+
+    def _emit(self, events: List[TrialEvent], event: TrialEvent) -> None:
+        events.append(event)
+        if self.on_event is not None:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                self.logger.error(f"Error in event callback: {str(e)}")
@@ -0,0 +1,203 @@
+import math
+from typing import Dict, List, Optional, Sequence
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac).
+
+    Five markers track the minimum, the target quantile, the two midpoints
+    around it, and the maximum. Each observation adjusts them in O(1) time
+    and memory. Until five observations have arrived, the quantile is
+    computed exactly.
+    """
+
+    def __init__(self, quantile: float):
+        """
+        Args:
+            quantile (float): Target quantile in (0, 1), e.g. 0.9
+        """
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4.0]
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        """
+        Add one observation.
+
+        Args:
+            value (float): Observed value
+        """
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell the value falls into, extending the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self._positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self._desired[i] - positions[i]
+            if ((offset >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (
+                        positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> Optional[float]:
+        """
+        Get the current estimate.
+
+        Returns:
+            Optional[float]: Estimated quantile, or None before any observation
+        """
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # Exact linear interpolation between the sorted observations
+            rank = self.quantile * (self.count - 1)
+            lower = int(math.floor(rank))
+            upper = min(lower + 1, self.count - 1)
+            fraction = rank - lower
+            return self._heights[lower] * (1 - fraction) + self._heights[upper] * fraction
+        return self._heights[2]
+
+
+class StreamingStatistics:
+    """
+    Incremental summary statistics for reaction times.
+
+    Values below anticipation_ms (responses that started before the stimulus
+    could be perceived) and above lapse_ms (lapses of attention) are counted
+    but left out of the summary. Accepted values update a Welford mean and
+    variance, the extremes and P-square quantile estimates, all in O(1) per
+    value, so the summary can be queried at any point of an arbitrarily long
+    session.
+    """
+
+    def __init__(self, quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+                 anticipation_ms: Optional[float] = 100.0,
+                 lapse_ms: Optional[float] = 1000.0):
+        """
+        Args:
+            quantiles (Sequence[float]): Quantiles to track
+            anticipation_ms (Optional[float]): Values below this are rejected; None disables
+            lapse_ms (Optional[float]): Values above this are rejected; None disables
+        """
+        self.anticipation_ms = anticipation_ms
+        self.lapse_ms = lapse_ms
+        self.quantiles = {q: P2Quantile(q) for q in quantiles}
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.anticipations = 0
+        self.lapses = 0
+
+    def add(self, value: float) -> bool:
+        """
+        Add one reaction time.
+
+        Args:
+            value (float): Reaction time in milliseconds
+
+        Returns:
+            bool: True if the value was accepted, False if it was rejected as an
+            anticipation or a lapse
+        """
+        if self.anticipation_ms is not None and value < self.anticipation_ms:
+            self.anticipations += 1
+            return False
+        if self.lapse_ms is not None and value > self.lapse_ms:
+            self.lapses += 1
+            return False
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        for estimator in self.quantiles.values():
+            estimator.add(value)
+        return True
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance of the accepted values, None with fewer than two."""
+        if self.count < 2:
+            return None
+        return self._m2 / (self.count - 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Get the estimate for a tracked quantile.
+
+        Args:
+            q (float): One of the quantiles given at construction
+
+        Returns:
+            Optional[float]: Estimated value, or None before any accepted value
+        """
+        return self.quantiles[q].value()
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Get all statistics.
+
+        Returns:
+            dict: average, min, max, count, variance, std, one pNN entry per
+            tracked quantile, and the anticipation and lapse counts
+        """
+        variance = self.variance
+        result = {
+            "average": self.mean if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "count": self.count,
+            "variance": variance,
+            "std": math.sqrt(variance) if variance is not None else None
+        }
+        for q, estimator in self.quantiles.items():
+            result[f"p{q * 100:g}"] = estimator.value()
+        result["anticipations"] = self.anticipations
+        result["lapses"] = self.lapses
+        return result
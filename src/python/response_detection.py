@@ -1,60 +1,266 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List, Sequence, Callable
 import logging
 import time
+from src.python.motion_detectors import DETECTORS, MotionDetector, RunningAverageDetector
+from src.python.onset_estimation import MotionTimeSeries, estimate_onset
+from src.python.metrics import MetricsRegistry
+from src.python.adaptive_threshold import AdaptiveThreshold
+
+class _RegionState:
+    # Preallocated per-region buffers; every OpenCV call in the steady state
+    # writes into one of these through dst= instead of allocating
+    def __init__(self, roi: Tuple[int, int, int, int], pyramid_level: int,
+                 create_detector: Callable[[Tuple[int, int]], MotionDetector]):
+        x, y, w, h = roi
+        self.roi = roi
+        self.gray = np.empty((h, w), np.uint8)
+        self.levels = []
+        for _ in range(pyramid_level):
+            h, w = (h + 1) // 2, (w + 1) // 2
+            self.levels.append(np.empty((h, w), np.uint8))
+        
+        self.detector = create_detector((h, w))
+        self.thresh = np.empty((h, w), np.uint8)
+        self.dilated = np.empty((h, w), np.uint8)
+        
+        roi_w, roi_h = roi[2], roi[3]
+        self.area_scale = (roi_w * roi_h) / (w * h)
+        self.contour_scale = np.array([roi_w / w, roi_h / h])
+        self.contour_offset = np.array([x, y])
 
 class ResponseDetectionModule:
     def __init__(self, 
                  movement_threshold: float = 1000,
-                 frame_buffer_size: int = 3):
+                 frame_buffer_size: int = 3,
+                 visualize: bool = True,
+                 rois: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+                 pyramid_level: int = 0,
+                 detector: str = 'difference',
+                 background_alpha: float = 0.05,
+                 subframe_onset: bool = False,
+                 motion_history: int = 1024,
+                 diff_threshold: int = 25,
+                 latency_correction_ms: float = 0.0,
+                 auto_threshold: Optional[AdaptiveThreshold] = None,
+                 metrics: Optional[MetricsRegistry] = None):
         self.movement_threshold = movement_threshold
+        # Per-pixel change level (0-255) above which a pixel counts as moving
+        self.diff_threshold = diff_threshold
+        # System detection latency measured by calibration.run_calibration;
+        # subtracted from every reported response time
+        self.latency_correction_ms = latency_correction_ms
+        # When set, movement_threshold is recalibrated on every frame outside
+        # a response window from the idle motion score; movement_threshold
+        # is only used until the calibration has finished its warmup
+        self.auto_threshold = auto_threshold
         self.frame_buffer_size = frame_buffer_size
-        self.previous_frames = []
-        logging.basicConfig(level=logging.INFO)
+        # When False, detect_movement skips contour extraction and drawing and
+        # returns no visualization buffer
+        self.visualize = visualize
+        self.last_motion_score = 0.0
+        # Regions of interest as (x, y, width, height); None means the whole
+        # frame. Each region is downscaled by 2**pyramid_level before
+        # differencing and its motion area is rescaled to full-resolution
+        # pixels, so movement_threshold keeps the same meaning.
+        self.rois = list(rois) if rois else None
+        self.pyramid_level = pyramid_level
+        # Change detection strategy, one of motion_detectors.DETECTORS:
+        # 'difference' compares the last two frames, 'running_average' compares
+        # against an exponential background model updated with
+        # background_alpha, and 'accumulated' sums the frame-to-frame changes
+        # across frame_buffer_size frames
+        if detector not in DETECTORS:
+            raise ValueError(f"Unknown detector '{detector}', expected one of {sorted(DETECTORS)}")
+        self.detector = detector
+        self.background_alpha = background_alpha
+        # Recent (capture timestamp, motion score) samples; when subframe_onset
+        # is set, stop_response_window interpolates the threshold crossing
+        # from them instead of reporting the first frame over the threshold.
+        # It is off by default: on the loopback calibration it does not reduce
+        # the spread of reaction times and estimates onsets up to 23 ms early
+        self.subframe_onset = subframe_onset
+        self.motion_series = MotionTimeSeries(motion_history)
+        # Per-region ring buffers of preprocessed frames and scratch images,
+        # rebuilt only when the frame size or region configuration changes
+        self._regions: List[_RegionState] = []
+        self._regions_key = None
+        self._kernel: Optional[np.ndarray] = None
+        # Frames with a valid motion score and frames over the threshold
+        self.frames_processed = 0
+        self.frames_triggered = 0
+        # Optional per-stage timing: preprocess (grayscale, pyramid, blur),
+        # difference (detector update, threshold, dilate, count), contours and
+        # visualize; all of it is skipped when metrics is None
+        self.metrics = metrics
+        self._stage_histograms = None
+        if metrics is not None:
+            self._stage_histograms = tuple(
+                metrics.histogram(f"detect.{stage}")
+                for stage in ("preprocess", "difference", "contours", "visualize"))
+            metrics.register_counters("detect", self.get_detection_stats)
         self.logger = logging.getLogger(__name__)
         self.waiting_for_response = False
         self.response_start_time = 0.0
         self.last_movement_timestamp = 0.0
         
-    def detect_movement(self, current_frame: np.ndarray) -> Tuple[bool, np.ndarray]:
-        gray = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    def detect_movement(self, current_frame: np.ndarray,
+                        timestamp: Optional[float] = None,
+                        visualize: Optional[bool] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if visualize is None:
+            visualize = self.visualize
         
-        self.previous_frames.append(blurred)
-        if len(self.previous_frames) > self.frame_buffer_size:
-            self.previous_frames.pop(0)
+        self._prepare_regions(current_frame.shape)
+        
+        total_movement_area = 0.0
+        region_contours = []
+        ready = True
+        timed = self._stage_histograms is not None
+        if timed:
+            stage_ns = [0, 0, 0, 0]
+            clock = time.perf_counter_ns()
+        for region in self._regions:
+            x, y, w, h = region.roi
+            crop = current_frame[y:y + h, x:x + w]
+            cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY, dst=region.gray)
+            source = region.gray
+            for level in region.levels:
+                cv2.pyrDown(source, dst=level)
+                source = level
+            cv2.GaussianBlur(source, (5, 5), 0, dst=region.detector.input_buffer())
+            if timed:
+                clock = self._lap(stage_ns, 0, clock)
             
-        if len(self.previous_frames) < 2:
-            return False, current_frame.copy()
+            if not region.detector.update():
+                ready = False
+                continue
             
-        frame_diff = cv2.absdiff(self.previous_frames[-2], self.previous_frames[-1])
-        _, thresh = cv2.threshold(frame_diff, 25, 255, cv2.THRESH_BINARY)
-        
-        kernel = np.ones((5,5), np.uint8)
-        dilated = cv2.dilate(thresh, kernel, iterations=2)
+            cv2.threshold(region.detector.diff, self.diff_threshold, 255, cv2.THRESH_BINARY,
+                          dst=region.thresh)
+            
+            if self._kernel is not None:
+                mask = cv2.dilate(region.thresh, self._kernel, dst=region.dilated)
+            else:
+                mask = region.thresh
+            
+            # The motion score is the area of the dilated motion mask, counted in
+            # a single vectorized pass and rescaled to full-resolution pixels
+            total_movement_area += cv2.countNonZero(mask) * region.area_scale
+            if timed:
+                clock = self._lap(stage_ns, 1, clock)
+            
+            # Contours are only needed for the debug view
+            if visualize:
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, 
+                                             cv2.CHAIN_APPROX_SIMPLE)
+                region_contours.extend(
+                    (c * region.contour_scale + region.contour_offset).astype(np.int32)
+                    for c in contours)
+                if timed:
+                    clock = self._lap(stage_ns, 2, clock)
         
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, 
-                                     cv2.CHAIN_APPROX_SIMPLE)
+        if not ready:
+            self.last_motion_score = 0.0
+            return False, current_frame.copy() if visualize else None
         
-        total_movement_area = sum(cv2.contourArea(c) for c in contours)
+        self.last_motion_score = total_movement_area
+        self.frames_processed += 1
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.motion_series.append(timestamp, total_movement_area)
         
-        motion_vis = current_frame.copy()
-        cv2.drawContours(motion_vis, contours, -1, (0, 255, 0), 2)
-        cv2.putText(motion_vis, f"Movement: {total_movement_area:.0f}", 
-                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        cv2.putText(motion_vis, f"Threshold: {self.movement_threshold:.0f}",
-                   (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        motion_vis = None
+        if visualize:
+            motion_vis = current_frame.copy()
+            if self.rois is not None:
+                for x, y, w, h in (region.roi for region in self._regions):
+                    cv2.rectangle(motion_vis, (x, y), (x + w - 1, y + h - 1), (255, 0, 0), 1)
+            cv2.drawContours(motion_vis, region_contours, -1, (0, 255, 0), 2)
+            cv2.putText(motion_vis, f"Movement: {total_movement_area:.0f}", 
+                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            cv2.putText(motion_vis, f"Threshold: {self.movement_threshold:.0f}",
+                       (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            if timed:
+                self._lap(stage_ns, 3, clock)
+        if timed:
+            self._record_stages(stage_ns, visualize)
         
         movement_detected = total_movement_area > self.movement_threshold
+        # Learn after judging the frame, so each frame is compared with the
+        # baseline of the frames before it. Response windows and frames over
+        # a calibrated threshold are motion, not noise; holding restarts the
+        # hold-off on each, so the motion that follows is skipped as well
+        if self.auto_threshold is not None:
+            if self.waiting_for_response or (movement_detected and self.auto_threshold.ready):
+                self.auto_threshold.hold()
+            else:
+                threshold = self.auto_threshold.update(total_movement_area)
+                if threshold is not None:
+                    self.movement_threshold = threshold
         if movement_detected:
-            self.last_movement_timestamp = time.time()
+            self.frames_triggered += 1
+            # Attribute the movement to the moment the frame was captured, not
+            # to when processing finished
+            self.last_movement_timestamp = timestamp
             
         return movement_detected, motion_vis
         
-    def start_response_window(self) -> None:
+    @staticmethod
+    def _lap(stage_ns: List[int], stage: int, start: int) -> int:
+        now = time.perf_counter_ns()
+        stage_ns[stage] += now - start
+        return now
+        
+    def _record_stages(self, stage_ns: List[int], visualize: bool) -> None:
+        # Contour and drawing stages only run, and are only recorded, when visualizing
+        for i, histogram in enumerate(self._stage_histograms if visualize
+                                      else self._stage_histograms[:2]):
+            histogram.record_ns(stage_ns[i])
+        
+    def get_detection_stats(self) -> Dict[str, int]:
+        return {
+            "processed": self.frames_processed,
+            "triggered": self.frames_triggered
+        }
+        
+    def _prepare_regions(self, frame_shape: Tuple[int, ...]) -> None:
+        key = (frame_shape[:2], self.rois, self.pyramid_level, self.frame_buffer_size,
+               self.detector)
+        if key == self._regions_key:
+            return
+        
+        height, width = frame_shape[:2]
+        if self.rois is None:
+            rois = [(0, 0, width, height)]
+        else:
+            # Clip each region to the frame, keeping at least one pixel
+            rois = []
+            for x, y, w, h in self.rois:
+                x = min(max(0, x), width - 1)
+                y = min(max(0, y), height - 1)
+                rois.append((x, y, max(1, min(w, width - x)), max(1, min(h, height - y))))
+        
+        self._regions = [_RegionState(roi, self.pyramid_level, self._create_detector)
+                         for roi in rois]
+        self._regions_key = (frame_shape[:2], list(self.rois) if self.rois else None,
+                             self.pyramid_level, self.frame_buffer_size, self.detector)
+        
+        # Two 5x5 dilations grow the mask by 4 full-resolution pixels; keep
+        # that reach constant when working on a downscaled image
+        radius = 4 >> self.pyramid_level
+        self._kernel = (np.ones((2 * radius + 1, 2 * radius + 1), np.uint8)
+                        if radius > 0 else None)
+        
+    def _create_detector(self, shape: Tuple[int, int]) -> MotionDetector:
+        if self.detector == 'running_average':
+            return RunningAverageDetector(shape, self.frame_buffer_size, self.background_alpha,
+                                          self.diff_threshold)
+        return DETECTORS[self.detector](shape, self.frame_buffer_size)
+        
+    def start_response_window(self, onset_time: Optional[float] = None) -> None:
         self.waiting_for_response = True
-        self.response_start_time = time.time()
+        self.response_start_time = time.perf_counter() if onset_time is None else onset_time
         self.logger.info("Started waiting for response")
         
     def stop_response_window(self) -> Optional[float]:
@@ -63,19 +269,32 @@ class ResponseDetectionModule:
             
         self.waiting_for_response = False
         
+        if self.subframe_onset:
+            timestamps, scores = self.motion_series.arrays()
+            onset = estimate_onset(timestamps, scores, self.movement_threshold,
+                                   self.response_start_time)
+            if onset is not None:
+                return self._corrected_response_time(onset)
+        
         if self.last_movement_timestamp >= self.response_start_time:
-            response_time = (self.last_movement_timestamp - self.response_start_time) * 1000
-            self.logger.info(f"Response detected in {response_time:.1f} ms")
-            return response_time
+            return self._corrected_response_time(self.last_movement_timestamp)
         
         self.logger.info("No response detected")
         return None
         
-    def get_response_visualization(self, frame: np.ndarray) -> np.ndarray:
+    def _corrected_response_time(self, onset: float) -> float:
+        response_time = max(0.0, (onset - self.response_start_time) * 1000
+                            - self.latency_correction_ms)
+        self.logger.info(f"Response detected in {response_time:.1f} ms")
+        return response_time
+        
+    def get_response_visualization(self, frame: np.ndarray,
+                                   timestamp: Optional[float] = None) -> np.ndarray:
         vis_frame = frame.copy()
         
         if self.waiting_for_response:
-            elapsed_time = (time.time() - self.response_start_time) * 1000
+            now = time.perf_counter() if timestamp is None else timestamp
+            elapsed_time = (now - self.response_start_time) * 1000
             cv2.putText(vis_frame, f"Reaction Time: {elapsed_time:.0f} ms",
                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         
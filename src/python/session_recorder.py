@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import queue
+import threading
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Dict, Iterator
+
+# One fixed-width little-endian record per frame. offset and length locate
+# the frame bytes in the data file; stimulus is the index of the trial whose
+# stimulus was shown on the frame, or -1.
+INDEX_DTYPE = np.dtype([
+    ('frame', '<i8'),
+    ('timestamp', '<f8'),
+    ('motion_score', '<f4'),
+    ('stimulus', '<i4'),
+    ('offset', '<i8'),
+    ('length', '<i8')
+])
+
+FORMAT_VERSION = 1
+
+class SessionRecorder:
+    """
+    Records a session to a frame data file plus a fixed-width binary index.
+
+    For a base path "run1" three files are written: run1.frames (raw or
+    encoded frame bytes, back to back), run1.index (one INDEX_DTYPE record per
+    frame) and run1.meta.json (frame shape, encoding and counters). The
+    metadata is written when recording starts, again once the frame shape is
+    known and finally with the counters at stop(), so a session cut short by
+    a crash can still be opened. Frames are queued and written by a
+    background thread; when the queue is full the frame is dropped and
+    counted rather than blocking the caller.
+    """
+
+    def __init__(self, path: str, encoding: str = 'raw', queue_size: int = 64,
+                 jpeg_quality: int = 90):
+        """
+        Initialize the recorder.
+
+        Args:
+            path (str): Base path of the output files
+            encoding (str): 'raw' for uncompressed frames, or 'jpg' / 'png'
+            queue_size (int): Frames buffered for the writer thread
+            jpeg_quality (int): JPEG quality when encoding is 'jpg'
+        """
+        if encoding not in ('raw', 'jpg', 'png'):
+            raise ValueError(f"Unknown encoding '{encoding}', expected 'raw', 'jpg' or 'png'")
+        self.path = path
+        self.encoding = encoding
+        self.jpeg_quality = jpeg_quality
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._frame_number = 0
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def is_recording(self) -> bool:
+        """True while the writer thread is alive."""
+        return self._writer is not None and self._writer.is_alive()
+
+    def start(self) -> None:
+        """Create the output files and start the writer thread."""
+        self._data_file = open(self.path + '.frames', 'wb')
+        self._index_file = open(self.path + '.index', 'wb')
+        self._shape = None
+        self._frame_number = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._write_meta(complete=False)
+        self._writer = threading.Thread(target=self._write_loop, name="SessionRecorder",
+                                        daemon=True)
+        self._writer.start()
+
+    def record(self, frame: np.ndarray, timestamp: float, motion_score: float = 0.0,
+               stimulus: int = -1) -> bool:
+        """
+        Queue a frame for writing without blocking.
+
+        The frame is copied, so the caller may modify or reuse it afterwards.
+
+        Args:
+            frame (np.ndarray): Captured frame
+            timestamp (float): Capture timestamp in seconds
+            motion_score (float): Motion score of the frame
+            stimulus (int): Index of the trial whose stimulus is shown, or -1
+
+        Returns:
+            bool: True if the frame was queued, False if it was dropped
+        """
+        if not self.is_recording:
+            return False
+        if self._shape is None:
+            self._shape = frame.shape
+
+        frame_number = self._frame_number
+        self._frame_number += 1
+        try:
+            self._queue.put_nowait((frame_number, timestamp, motion_score, stimulus,
+                                    frame.copy()))
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+        return True
+
+    def stop(self) -> None:
+        """Write all queued frames, close the files and update the metadata."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        self._data_file.close()
+        self._index_file.close()
+
+        self._write_meta(complete=True)
+        self.logger.info(f"Recorded {self.frames_written} frames to {self.path} "
+                         f"({self.frames_dropped} dropped)")
+
+    def _write_meta(self, complete: bool) -> None:
+        # Replace the file in one step so a reader never sees half of it
+        temp_path = self.path + '.meta.json.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "encoding": self.encoding,
+                "shape": list(self._shape) if self._shape is not None else None,
+                "frames": self.frames_written,
+                "dropped": self.frames_dropped,
+                "complete": complete
+            }, f, indent=2)
+        os.replace(temp_path, self.path + '.meta.json')
+
+    def _encode(self, frame: np.ndarray) -> memoryview:
+        if self.encoding == 'raw':
+            return memoryview(np.ascontiguousarray(frame)).cast('B')
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality] if self.encoding == 'jpg' else []
+        success, encoded = cv2.imencode('.' + self.encoding, frame, params)
+        if not success:
+            raise ValueError("Frame encoding failed")
+        return memoryview(encoded).cast('B')
+
+    def _write_loop(self) -> None:
+        record = np.zeros(1, INDEX_DTYPE)
+        offset = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame_number, timestamp, motion_score, stimulus, frame = item
+            try:
+                data = self._encode(frame)
+            except Exception as e:
+                self.logger.error(f"Error encoding frame {frame_number}: {str(e)}")
+                continue
+
+            self._data_file.write(data)
+            record[0] = (frame_number, timestamp, motion_score, stimulus, offset, len(data))
+            self._index_file.write(record.tobytes())
+            offset += len(data)
+            self.frames_written += 1
+            if self.frames_written == 1:
+                self._write_meta(complete=False)
+            if self._queue.empty():
+                # Caught up; push what is buffered to disk while the queue is idle
+                self._data_file.flush()
+                self._index_file.flush()
+
+
+class SessionReader:
+    """
+    Random access to a session written by SessionRecorder.
+
+    The index and the frame data are memory-mapped, so opening a session is
+    O(1) regardless of its length, and any frame, timestamp or trial can be
+    located without reading what comes before it. The frame count is taken
+    from the size of the index, so a session whose recorder never reached
+    stop() opens with the frames that made it to disk.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a recorded session.
+
+        Args:
+            path (str): Base path the session was recorded to
+        """
+        with open(path + '.meta.json') as f:
+            self.meta: Dict[str, object] = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported session format version {self.meta.get('version')}")
+        self.encoding = self.meta["encoding"]
+        self.shape = tuple(self.meta["shape"]) if self.meta["shape"] else None
+        self.complete = bool(self.meta.get("complete", True))
+
+        # A trailing partial record of an interrupted session is left out
+        frames = os.path.getsize(path + '.index') // INDEX_DTYPE.itemsize
+        if frames and os.path.getsize(path + '.frames'):
+            self.index = np.memmap(path + '.index', dtype=INDEX_DTYPE, mode='r',
+                                   shape=(frames,))
+            self.data = np.memmap(path + '.frames', dtype=np.uint8, mode='r')
+        else:
+            self.index = np.zeros(0, INDEX_DTYPE)
+            self.data = np.zeros(0, np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def read_frame(self, position: int) -> Tuple[np.ndarray, np.void]:
+        """
+        Read one frame by its position in the session.
+
+        Raw frames are returned as read-only views of the mapped file.
+
+        Args:
+            position (int): Zero-based position in the index
+
+        Returns:
+            Tuple[np.ndarray, np.void]: The frame and its index record
+        """
+        record = self.index[position]
+        offset, length = int(record['offset']), int(record['length'])
+        data = self.data[offset:offset + length]
+        if self.encoding == 'raw':
+            return data.reshape(self.shape), record
+        return cv2.imdecode(np.asarray(data), cv2.IMREAD_UNCHANGED), record
+
+    def find_timestamp(self, timestamp: float) -> int:
+        """
+        Find the first frame captured at or after a time.
+
+        Args:
+            timestamp (float): Capture time in seconds
+
+        Returns:
+            int: Position of the frame, or len(self) if none is that late
+        """
+        return int(np.searchsorted(self.index['timestamp'], timestamp))
+
+    def trial_frames(self, trial: int) -> np.ndarray:
+        """
+        Find the frames on which a trial's stimulus was shown.
+
+        Args:
+            trial (int): Trial index
+
+        Returns:
+            np.ndarray: Ascending frame positions, empty if the trial is not recorded
+        """
+        return np.flatnonzero(self.index['stimulus'] == trial)
+
+    def trials(self) -> np.ndarray:
+        """Get the indices of all trials present in the recording."""
+        stimulus = self.index['stimulus']
+        return np.unique(stimulus[stimulus >= 0])
+
+    def iter_frames(self, start: int = 0,
+                    stop: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.void]]:
+        """
+        Iterate over a range of frames.
+
+        Args:
+            start (int): First position
+            stop (Optional[int]): Position after the last; defaults to the end
+
+        Yields:
+            Tuple[np.ndarray, np.void]: Each frame with its index record
+        """
+        for position in range(start, len(self) if stop is None else stop):
+            yield self.read_frame(position)
@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple, Union
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.adaptive_threshold import AdaptiveThreshold
+from src.python.reaction_engine import ReactionTestEngine, TrialEvent, STATE_FINISHED
+
+# Message types; every message is one JSON object per line with a "type" field
+MESSAGE_HELLO = 'hello'
+MESSAGE_TRIAL = 'trial'
+MESSAGE_STATS = 'stats'
+MESSAGE_DROPPED = 'dropped'
+MESSAGE_END = 'end'
+
+class _Subscriber:
+    # One connected client: the encoded lines waiting for the connection's
+    # own task, and the number of lines dropped since the client was last
+    # told. The asyncio.Queue itself has no maxsize; queue_size is enforced
+    # by _enqueue() when publishing, so the end-of-stream marker always fits.
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int):
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queue_size = queue_size
+        self.dropped = 0
+
+
+class SessionServer:
+    """
+    Asyncio runner for the reaction test that streams results to subscribers.
+
+    Capturing and analyzing a frame blocks in OpenCV, so each frame is
+    processed on a single-thread executor while the event loop serves the
+    socket. The optional window is drawn on the event loop's thread, which
+    HighGUI requires on most platforms, while the executor already works
+    on the next frame. Trial events and periodic statistics are sent to every connected
+    client as newline-delimited JSON over TCP or a Unix socket.
+
+    Publishing never waits for a client. Each subscriber has a bounded queue;
+    when a slow client lets it fill up, the oldest line is dropped and the
+    client is sent a "dropped" message with the count before the next line,
+    so the measurement loop runs at camera rate however many clients are
+    connected or stalled.
+    """
+
+    def __init__(self, capture: VideoCaptureModule, engine: Optional[ReactionTestEngine] = None,
+                 host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                 queue_size: int = 256, stats_interval: float = 1.0, display: bool = False):
+        """
+        Initialize the server.
+
+        Args:
+            capture (VideoCaptureModule): Frame provider; started by run() if needed
+            engine (Optional[ReactionTestEngine]): Reaction test state machine;
+                a headless one with default settings is created if None
+            host (str): TCP interface to listen on
+            port (int): TCP port; 0 picks a free one
+            unix_path (Optional[str]): Listen on this Unix socket instead of TCP
+            queue_size (int): Lines buffered per subscriber before dropping
+            stats_interval (float): Seconds between statistics messages
+            display (bool): Show the camera feed with the stimulus overlaid; the
+                window is drawn on the thread running the event loop
+        """
+        self.capture = capture
+        self.engine = engine if engine is not None else ReactionTestEngine()
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.queue_size = queue_size
+        self.stats_interval = stats_interval
+        self.display = display
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: List[_Subscriber] = []
+        self._connections: List[asyncio.Task] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SessionFrames")
+        self._running = False
+
+        self.frames_processed = 0
+        self.messages_published = 0
+        self.messages_dropped = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def address(self) -> Union[str, Tuple[str, int], None]:
+        """The Unix socket path or (host, port) being served, None before start()."""
+        if self._server is None:
+            return None
+        if self.unix_path is not None:
+            return self.unix_path
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> None:
+        """Start accepting subscribers."""
+        if self.unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.logger.info(f"Serving session results on {self.address}")
+
+    async def run(self, max_frames: Optional[int] = None) -> Dict[str, Optional[float]]:
+        """
+        Run the reaction test until the schedule is exhausted, the source ends,
+        stop() is called or max_frames frames were processed.
+
+        Args:
+            max_frames (Optional[int]): Stop after this many frames
+
+        Returns:
+            Dict[str, Optional[float]]: Final reaction time summary
+        """
+        loop = asyncio.get_running_loop()
+        if self._server is None:
+            await self.start()
+        if not self.capture.is_running:
+            if not await loop.run_in_executor(self._executor, self.capture.start):
+                raise RuntimeError("Failed to start video capture")
+
+        self._running = True
+        next_stats = time.perf_counter() + self.stats_interval
+        pending = None
+        try:
+            while self._running and (max_frames is None or self.frames_processed < max_frames):
+                if pending is None:
+                    pending = loop.run_in_executor(self._executor, self._process_next_frame)
+                success, events, shown = await pending
+                pending = None
+                if not success:
+                    break
+                self.frames_processed += 1
+                for event in events:
+                    self.publish(self._trial_message(event))
+
+                now = time.perf_counter()
+                if now >= next_stats:
+                    self.publish(self._stats_message())
+                    next_stats = now + self.stats_interval
+                if self.engine.state == STATE_FINISHED:
+                    break
+                if shown is not None:
+                    # Process the next frame while this one is drawn
+                    if max_frames is None or self.frames_processed < max_frames:
+                        pending = loop.run_in_executor(self._executor, self._process_next_frame)
+                    self._show(shown)
+        finally:
+            self._running = False
+            if pending is not None:
+                await pending
+            self.publish({"type": MESSAGE_END, "statistics": self.engine.statistics.summary()})
+        return self.engine.statistics.summary()
+
+    def stop(self) -> None:
+        """Make run() return after the current frame."""
+        self._running = False
+
+    def publish(self, message: Dict[str, object]) -> None:
+        """
+        Queue a message for every subscriber without waiting.
+
+        Args:
+            message (Dict[str, object]): JSON-serializable message
+        """
+        line = self._encode(message)
+        self.messages_published += 1
+        for subscriber in self._subscribers:
+            self._enqueue(subscriber, line)
+
+    async def close(self, timeout: float = 1.0) -> None:
+        """
+        Flush what subscribers have queued, disconnect them and stop serving.
+
+        Args:
+            timeout (float): Seconds to wait for the queues to drain
+        """
+        if self._server is not None:
+            self._server.close()
+        for subscriber in self._subscribers:
+            self._enqueue(subscriber, None)
+        if self._connections:
+            await asyncio.wait(self._connections, timeout=timeout)
+            for task in list(self._connections):
+                task.cancel()
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        self._executor.shutdown(wait=True)
+        if self.display:
+            cv2.destroyAllWindows()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get server counters.
+
+        Returns:
+            Dict[str, int]: frames processed, messages published, lines dropped
+            for slow subscribers and current subscriber count
+        """
+        return {
+            "frames": self.frames_processed,
+            "published": self.messages_published,
+            "dropped": self.messages_dropped,
+            "subscribers": len(self._subscribers)
+        }
+
+    def _process_next_frame(self) -> Tuple[bool, List[TrialEvent], Optional[np.ndarray]]:
+        # Runs on the executor thread. The frame to show is a copy, since the
+        # source may reuse its buffer for the next read while it is drawn
+        success, frame, timestamp = self.capture.get_timestamped_frame()
+        if not success or frame is None:
+            return False, [], None
+        events = self.engine.process_frame(frame, timestamp)
+        shown = self.engine.stimuli.overlay_stimulus(frame.copy(), in_place=True) if self.display else None
+        return True, events, shown
+
+    def _show(self, frame: np.ndarray) -> None:
+        # Runs on the event loop's thread
+        cv2.imshow('Reaction Time Test', frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self._running = False
+
+    def _enqueue(self, subscriber: _Subscriber, line: Optional[bytes]) -> None:
+        if line is not None and subscriber.queue.qsize() >= subscriber.queue_size:
+            subscriber.queue.get_nowait()
+            subscriber.dropped += 1
+            self.messages_dropped += 1
+        subscriber.queue.put_nowait(line)
+
+    @staticmethod
+    def _encode(message: Dict[str, object]) -> bytes:
+        return (json.dumps(message, default=str) + "\n").encode()
+
+    def _trial_message(self, event: TrialEvent) -> Dict[str, object]:
+        return {
+            "type": MESSAGE_TRIAL,
+            "kind": event.kind,
+            "trial": event.trial,
+            "timestamp": event.timestamp,
+            "reaction_time": event.reaction_time,
+            "stimulus": event.stimulus
+        }
+
+    def _stats_message(self) -> Dict[str, object]:
+        return {
+            "type": MESSAGE_STATS,
+            "timestamp": time.perf_counter(),
+            "state": self.engine.state,
+            "trial": self.engine.trial,
+            "movement_threshold": self.engine.response.movement_threshold,
+            "statistics": self.engine.statistics.summary(),
+            "detection": self.engine.response.get_detection_stats(),
+            "capture": self.capture.get_capture_stats(),
+            "server": self.get_stats()
+        }
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        subscriber = _Subscriber(writer, self.queue_size)
+        self._subscribers.append(subscriber)
+        self._connections.append(asyncio.current_task())
+        try:
+            writer.write(self._encode({"type": MESSAGE_HELLO, "state": self.engine.state,
+                                       "trial": self.engine.trial}))
+            while True:
+                line = await subscriber.queue.get()
+                if subscriber.dropped:
+                    writer.write(self._encode({"type": MESSAGE_DROPPED,
+                                               "count": subscriber.dropped}))
+                    subscriber.dropped = 0
+                if line is None:
+                    break
+                writer.write(line)
+                # Waits only while this client's socket buffer is full; the
+                # queue keeps absorbing (and dropping) in the meantime
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._subscribers.remove(subscriber)
+            self._connections.remove(asyncio.current_task())
+            writer.close()
+
+
+async def _serve(server: SessionServer) -> Dict[str, Optional[float]]:
+    await server.start()
+    try:
+        return await server.run()
+    finally:
+        await server.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the reaction test and stream results as JSON lines over a socket")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=1000)
+    parser.add_argument("--auto-threshold", action="store_true",
+                        help="set the movement threshold from the idle motion noise")
+    parser.add_argument("--stats-interval", type=float, default=1.0)
+    parser.add_argument("--queue-size", type=int, default=256,
+                        help="lines buffered per subscriber before the oldest are dropped")
+    parser.add_argument("--negotiate-camera", action="store_true",
+                        help="probe the camera and use its fastest verified mode at 640x480")
+    parser.add_argument("--display", action="store_true",
+                        help="show the camera feed with the stimulus in a window")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    response = ResponseDetectionModule(
+        args.threshold, visualize=False,
+        auto_threshold=AdaptiveThreshold() if args.auto_threshold else None)
+    engine = ReactionTestEngine(StimuliDisplayModule(schedule=StimulusSchedule(args.trials)),
+                                response)
+    capture = VideoCaptureModule(args.camera, negotiate_mode=args.negotiate_camera)
+    server = SessionServer(capture, engine, args.host, args.port,
+                           args.unix, args.queue_size, args.stats_interval,
+                           display=args.display)
+    try:
+        summary = asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        return
+    finally:
+        server.capture.stop()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
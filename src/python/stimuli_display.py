@@ -4,32 +4,61 @@ import random
 import time
 from typing import Tuple, Optional, List, Dict
 import logging
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.metrics import MetricsRegistry
 
 class StimuliDisplayModule:
     """
     Handles the display of visual stimuli for reaction time testing.
     
     This module manages the presentation of visual cues, including:
-    - Random timing of stimuli appearance
+    - Random timing of stimuli appearance, drawn up front from a seeded
+      StimulusSchedule
     - Different types of visual cues (shapes, colors, patterns)
     - Integration with the video feed display
+    
+    Each (shape, color, window size) combination is rendered once into a
+    cached sprite and mask covering only the stimulus bounding box, so the
+    per-frame cost of an overlay is proportional to the stimulus area.
     """
     
-    def __init__(self, window_size: Tuple[int, int] = (640, 480)):
+    def __init__(self, window_size: Tuple[int, int] = (640, 480),
+                 schedule: Optional[StimulusSchedule] = None,
+                 metrics: Optional[MetricsRegistry] = None):
         """
         Initialize the stimuli display module.
         
         Args:
             window_size (Tuple[int, int]): Width and height of display window
+            schedule (Optional[StimulusSchedule]): Trial sequence to present; one is
+                created on the first should_show_stimulus() call if not given, and
+                replaced by a freshly seeded one whenever it runs out
+            metrics (Optional[MetricsRegistry]): Records overlay blend times as
+                "display.overlay" and exposes the stimulus counters
         """
         self.window_width, self.window_height = window_size
         self.is_stimulus_active = False
         self.stimulus_start_time = 0.0
         self.current_stimulus = None
-        self.last_stimulus_time = 0.0
+        # Offset time of the last stimulus; the first delay counts from the
+        # first should_show_stimulus() call when no stimulus was shown yet
+        self.last_stimulus_time: Optional[float] = None
+        self.schedule = schedule
+        # A schedule created here is regenerated when it runs out, so an
+        # interactive session never stops presenting stimuli; a schedule
+        # passed in ends the session when exhausted
+        self._owns_schedule = False
+        # Onset deadline of the pending trial; recomputed only when a stimulus ends
+        self._next_onset_time: Optional[float] = None
+        
+        self.stimuli_shown = 0
+        self.overlays_drawn = 0
+        self.metrics = metrics
+        self._overlay_histogram = None
+        if metrics is not None:
+            self._overlay_histogram = metrics.histogram("display.overlay")
+            metrics.register_counters("display", self.get_display_stats)
         
-        # Configure logging
-        logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
         # Stimulus configuration
@@ -46,6 +75,13 @@ class StimuliDisplayModule:
             'blue': (255, 0, 0),
             'yellow': (0, 255, 255)
         }
+        
+        # Rendered stimuli keyed by (type, color, window width, window height).
+        # Each entry holds the bounding box origin, the sprite, its 8-bit mask
+        # and a scratch buffer for blending.
+        self.blend_alpha = 0.5
+        self._sprite_cache: Dict[Tuple[str, str, int, int],
+                                 Tuple[int, int, np.ndarray, np.ndarray, np.ndarray]] = {}
 
     def _draw_circle(self, frame: np.ndarray, color: Tuple[int, int, int]) -> np.ndarray:
         """Draw a circle stimulus on the frame."""
@@ -96,78 +132,203 @@ class StimuliDisplayModule:
         cv2.line(frame, start_point, end_point, color, thickness)
         return frame
 
-    def should_show_stimulus(self, min_delay: float = 2.0, max_delay: float = 5.0) -> bool:
+    def should_show_stimulus(self, min_delay: float = 2.0, max_delay: float = 5.0,
+                             timestamp: Optional[float] = None) -> bool:
         """
-        Determine if it's time to show a new stimulus based on random timing.
+        Determine if it's time to show a new stimulus based on the schedule.
+        
+        Each call is a single comparison against the pending trial's deadline.
         
         Args:
-            min_delay (float): Minimum delay between stimuli in seconds
-            max_delay (float): Maximum delay between stimuli in seconds
+            min_delay (float): Minimum delay between stimuli in seconds, used only
+                when no schedule exists yet
+            max_delay (float): Maximum delay between stimuli in seconds, used only
+                when no schedule exists yet
+            timestamp (Optional[float]): Current time on the perf_counter timeline
+                (e.g. a frame capture timestamp); defaults to now
             
         Returns:
             bool: True if a new stimulus should be shown
         """
-        current_time = time.time()
+        if self.is_stimulus_active:
+            return False
+        
+        current_time = time.perf_counter() if timestamp is None else timestamp
+        if self.last_stimulus_time is None:
+            self.last_stimulus_time = current_time
         
-        # If no stimulus is active and enough time has passed
-        if (not self.is_stimulus_active and 
-            current_time - self.last_stimulus_time > 
-            random.uniform(min_delay, max_delay)):
-            return True
+        if self._next_onset_time is None:
+            if self.schedule is None:
+                self._create_schedule(min_delay, max_delay)
+                self.logger.info(f"Created stimulus schedule with seed {self.schedule.seed}")
             
-        return False
+            trial = self.schedule.current()
+            if trial is None and self._owns_schedule:
+                shown = len(self.schedule)
+                self._create_schedule(self.schedule.min_delay, self.schedule.max_delay)
+                self.logger.info(f"Stimulus schedule exhausted after {shown} trials; "
+                                 f"continuing with seed {self.schedule.seed}")
+                trial = self.schedule.current()
+            if trial is None:
+                return False
+            self._next_onset_time = self.last_stimulus_time + trial.delay
+        
+        return current_time >= self._next_onset_time
+    
+    def _create_schedule(self, min_delay: float, max_delay: float) -> None:
+        self.schedule = StimulusSchedule(min_delay=min_delay, max_delay=max_delay,
+                                         stimulus_types=list(self.stimulus_types),
+                                         colors=list(self.colors))
+        self._owns_schedule = True
 
-    def activate_random_stimulus(self) -> None:
-        """Activate a random stimulus type and color."""
-        self.current_stimulus = {
-            'type': random.choice(list(self.stimulus_types.keys())),
-            'color': random.choice(list(self.colors.keys()))
-        }
+    def activate_random_stimulus(self, timestamp: Optional[float] = None) -> None:
+        """
+        Activate the next scheduled stimulus type and color.
+        
+        Without a schedule, or when called after a schedule that was passed in
+        is exhausted, the stimulus is picked at random.
+        
+        Args:
+            timestamp (Optional[float]): Onset time on the perf_counter timeline;
+                defaults to now
+        """
+        self.stimulus_start_time = time.perf_counter() if timestamp is None else timestamp
+        
+        trial = self.schedule.current() if self.schedule is not None else None
+        if trial is not None:
+            self.current_stimulus = {'type': trial.stimulus_type, 'color': trial.color}
+            self.schedule.advance(self.stimulus_start_time)
+        else:
+            self.current_stimulus = {
+                'type': random.choice(list(self.stimulus_types.keys())),
+                'color': random.choice(list(self.colors.keys()))
+            }
         self.is_stimulus_active = True
-        self.stimulus_start_time = time.time()
+        self._next_onset_time = None
+        self.stimuli_shown += 1
         self.logger.info(f"Activated {self.current_stimulus['type']} stimulus in {self.current_stimulus['color']}")
 
-    def deactivate_stimulus(self) -> None:
-        """Deactivate the current stimulus."""
+    def deactivate_stimulus(self, timestamp: Optional[float] = None) -> None:
+        """
+        Deactivate the current stimulus.
+        
+        Args:
+            timestamp (Optional[float]): Offset time on the perf_counter timeline;
+                defaults to now
+        """
         if self.is_stimulus_active:
             self.is_stimulus_active = False
-            self.last_stimulus_time = time.time()
+            self.last_stimulus_time = time.perf_counter() if timestamp is None else timestamp
             self.current_stimulus = None
+            self._next_onset_time = None
 
-    def overlay_stimulus(self, frame: np.ndarray) -> np.ndarray:
+    def _get_sprite(self, stimulus_type: str,
+                    color_name: str) -> Tuple[int, int, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the cached sprite for a stimulus, rendering it on first use.
+        
+        Args:
+            stimulus_type (str): Key into stimulus_types
+            color_name (str): Key into colors
+            
+        Returns:
+            Tuple[int, int, np.ndarray, np.ndarray, np.ndarray]: Bounding box
+            origin (x, y), BGR sprite, 8-bit mask and blend scratch buffer
+        """
+        key = (stimulus_type, color_name, self.window_width, self.window_height)
+        cached = self._sprite_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Render onto a full window canvas with the existing draw functions so
+        # the sprite matches the shape geometry exactly
+        canvas = np.zeros((self.window_height, self.window_width, 3), np.uint8)
+        mask = np.zeros((self.window_height, self.window_width), np.uint8)
+        stimulus_func = self.stimulus_types[stimulus_type]
+        stimulus_func(canvas, self.colors[color_name])
+        stimulus_func(mask, (255, 255, 255))
+        
+        x, y, w, h = cv2.boundingRect(mask)
+        sprite = canvas[y:y + h, x:x + w].copy()
+        sprite_mask = mask[y:y + h, x:x + w].copy()
+        cached = (x, y, sprite, sprite_mask, np.empty_like(sprite))
+        self._sprite_cache[key] = cached
+        return cached
+
+    def overlay_stimulus(self, frame: np.ndarray, in_place: bool = False) -> np.ndarray:
         """
         Overlay the current stimulus on the provided frame if active.
         
+        Only the pixels inside the stimulus bounding box are touched.
+        
         Args:
             frame (np.ndarray): Input frame to overlay stimulus on
+            in_place (bool): Blend directly into frame and skip the copy; only
+                for callers that own the frame and no longer need it unmodified.
+                By default the frame is copied first and left unchanged
             
         Returns:
             np.ndarray: Frame with stimulus overlay if active
         """
-        if not self.is_stimulus_active or self.current_stimulus is None:
+        # Read the stimulus once; it may be deactivated from another thread
+        stimulus = self.current_stimulus
+        if stimulus is None:
+            return frame
+        
+        x, y, sprite, mask, blended = self._get_sprite(stimulus['type'], stimulus['color'])
+        if not in_place:
+            frame = frame.copy()
+        
+        # Clip the bounding box to frames smaller than the window
+        h = min(sprite.shape[0], frame.shape[0] - y)
+        w = min(sprite.shape[1], frame.shape[1] - x)
+        if h <= 0 or w <= 0:
             return frame
-            
-        overlay = frame.copy()
-        stimulus_func = self.stimulus_types[self.current_stimulus['type']]
-        color = self.colors[self.current_stimulus['color']]
         
-        # Draw the stimulus on the overlay
-        overlay = stimulus_func(overlay, color)
+        if self._overlay_histogram is not None:
+            start = time.perf_counter_ns()
         
-        # Blend with original frame
-        alpha = 0.5
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+        # Blend inside the box, then copy back only the stimulus pixels
+        region = frame[y:y + h, x:x + w]
+        if h == sprite.shape[0] and w == sprite.shape[1]:
+            cv2.addWeighted(sprite, self.blend_alpha, region, 1 - self.blend_alpha, 0,
+                            dst=blended)
+            cv2.copyTo(blended, mask, region)
+        else:
+            partial = cv2.addWeighted(sprite[:h, :w], self.blend_alpha, region,
+                                      1 - self.blend_alpha, 0)
+            cv2.copyTo(partial, mask[:h, :w], region)
         
+        self.overlays_drawn += 1
+        if self._overlay_histogram is not None:
+            self._overlay_histogram.record_ns(time.perf_counter_ns() - start)
         return frame
 
-    def get_current_stimulus_duration(self) -> Optional[float]:
+    def get_display_stats(self) -> Dict[str, int]:
+        """
+        Get stimulus accounting.
+        
+        Returns:
+            Dict[str, int]: Stimuli activated and frames a stimulus was drawn on
+        """
+        return {
+            "stimuli": self.stimuli_shown,
+            "overlays": self.overlays_drawn
+        }
+
+    def get_current_stimulus_duration(self, timestamp: Optional[float] = None) -> Optional[float]:
         """
         Get the duration of the current stimulus if active.
         
+        Args:
+            timestamp (Optional[float]): Current time on the perf_counter timeline;
+                defaults to now
+        
         Returns:
             Optional[float]: Duration in milliseconds if stimulus is active, None otherwise
         """
         if not self.is_stimulus_active:
             return None
-            
-        return (time.time() - self.stimulus_start_time) * 1000
\ No newline at end of file
+        
+        current_time = time.perf_counter() if timestamp is None else timestamp
+        return (current_time - self.stimulus_start_time) * 1000
\ No newline at end of file
@@ -0,0 +1,148 @@
+import json
+import random
+import numpy as np
+from typing import NamedTuple, Optional, Sequence, List, Dict
+
+class ScheduledTrial(NamedTuple):
+    """One planned stimulus presentation."""
+    index: int
+    delay: float
+    stimulus_type: str
+    color: str
+
+
+class StimulusSchedule:
+    """
+    Precomputed, seeded sequence of stimulus trials.
+
+    Every inter-stimulus delay, shape and color is drawn up front from a single
+    seeded generator, so a session can be replayed exactly from its seed and the
+    delay distribution is exactly uniform over [min_delay, max_delay]. Each
+    delay counts from the end of the previous stimulus. Actual onset times are
+    recorded as trials are shown, and the whole schedule can be exported for
+    offline analysis.
+    """
+
+    def __init__(self, num_trials: int = 500, min_delay: float = 2.0, max_delay: float = 5.0,
+                 stimulus_types: Sequence[str] = ('circle', 'square', 'cross'),
+                 colors: Sequence[str] = ('red', 'green', 'blue', 'yellow'),
+                 seed: Optional[int] = None):
+        """
+        Build the schedule.
+
+        Args:
+            num_trials (int): Number of trials to plan
+            min_delay (float): Minimum delay between stimuli in seconds
+            max_delay (float): Maximum delay between stimuli in seconds
+            stimulus_types (Sequence[str]): Stimulus shapes to draw from
+            colors (Sequence[str]): Stimulus colors to draw from
+            seed (Optional[int]): Generator seed; a random one is chosen and kept if None
+        """
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.stimulus_types = list(stimulus_types)
+        self.colors = list(colors)
+
+        rng = np.random.default_rng(seed)
+        delays = rng.uniform(min_delay, max_delay, num_trials)
+        type_indices = rng.integers(len(self.stimulus_types), size=num_trials)
+        color_indices = rng.integers(len(self.colors), size=num_trials)
+        self.trials: List[ScheduledTrial] = [
+            ScheduledTrial(i, float(delays[i]), self.stimulus_types[type_indices[i]],
+                           self.colors[color_indices[i]])
+            for i in range(num_trials)
+        ]
+
+        # Actual onset time of each trial once shown, NaN until then
+        self.onsets = np.full(num_trials, np.nan)
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.trials)
+
+    def current(self) -> Optional[ScheduledTrial]:
+        """
+        Get the next trial that has not been shown yet.
+
+        Returns:
+            Optional[ScheduledTrial]: The pending trial, or None when the schedule is exhausted
+        """
+        if self.position >= len(self.trials):
+            return None
+        return self.trials[self.position]
+
+    def advance(self, onset_time: float) -> None:
+        """
+        Mark the pending trial as shown.
+
+        Args:
+            onset_time (float): Time the stimulus appeared
+        """
+        if self.position < len(self.trials):
+            self.onsets[self.position] = onset_time
+            self.position += 1
+
+    def reset(self) -> None:
+        """Rewind to the first trial and forget recorded onsets."""
+        self.position = 0
+        self.onsets.fill(np.nan)
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Serialize the schedule, including recorded onsets.
+
+        Returns:
+            Dict[str, object]: JSON-compatible description of the schedule
+        """
+        return {
+            "seed": self.seed,
+            "min_delay": self.min_delay,
+            "max_delay": self.max_delay,
+            "stimulus_types": self.stimulus_types,
+            "colors": self.colors,
+            "trials": [
+                {
+                    "index": trial.index,
+                    "delay": trial.delay,
+                    "type": trial.stimulus_type,
+                    "color": trial.color,
+                    "onset": None if np.isnan(onset) else float(onset)
+                }
+                for trial, onset in zip(self.trials, self.onsets)
+            ]
+        }
+
+    def export(self, path: str) -> None:
+        """
+        Write the schedule to a JSON file.
+
+        Args:
+            path (str): Output file path
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "StimulusSchedule":
+        """
+        Recreate a schedule from a file written by export().
+
+        Args:
+            path (str): Path of the exported schedule
+
+        Returns:
+            StimulusSchedule: The regenerated schedule with its recorded onsets
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        schedule = cls(len(data["trials"]), data["min_delay"], data["max_delay"],
+                       data["stimulus_types"], data["colors"], data["seed"])
+        for i, trial in enumerate(data["trials"]):
+            if trial["onset"] is not None:
+                schedule.onsets[i] = trial["onset"]
+                schedule.position = i + 1
+        return schedule
@@ -1,14 +1,36 @@
 import time
+import numpy as np
 from typing import Optional
-from cpp_timing import HighPrecisionTimer # type: ignore
+from cpp_timing import HighPrecisionTimer, EventLog, now_ns # type: ignore
+from cpp_timing import EVENT_CAPTURE, EVENT_DETECT, EVENT_STIMULUS_ON, EVENT_DISPLAY # type: ignore
+from src.python.reaction_statistics import StreamingStatistics
 
 class TimingModule:
-    """Handles precise timing measurements for reaction time testing."""
+    """
+    Handles precise timing measurements for reaction time testing.
     
-    def __init__(self):
+    Pipeline events (capture, detect, stimulus onset, display) can be logged
+    into a preallocated native EventLog. Event timestamps are nanoseconds on
+    the same monotonic clock as time.perf_counter().
+    """
+    
+    def __init__(self, event_capacity: int = 65536,
+                 anticipation_ms: Optional[float] = 100.0,
+                 lapse_ms: Optional[float] = 1000.0):
+        """
+        Args:
+            event_capacity (int): Number of pipeline events the event log can hold
+            anticipation_ms (Optional[float]): Measurements below this are excluded
+                from the statistics as anticipations; None disables
+            lapse_ms (Optional[float]): Measurements above this are excluded from
+                the statistics as lapses; None disables
+        """
         self.timer = HighPrecisionTimer()
         self.latest_measurement: Optional[float] = None
         self.measurements = []
+        self.statistics = StreamingStatistics(anticipation_ms=anticipation_ms,
+                                              lapse_ms=lapse_ms)
+        self.events = EventLog(event_capacity)
     
     def start_measurement(self):
         """Start a new reaction time measurement."""
@@ -28,28 +50,57 @@ class TimingModule:
             reaction_time = self.timer.stop()
             self.latest_measurement = reaction_time
             self.measurements.append(reaction_time)
+            self.statistics.add(reaction_time)
             return reaction_time
         except RuntimeError as e:
             raise RuntimeError(f"Failed to stop timer: {str(e)}")
     
     def get_statistics(self):
         """
-        Calculate statistics from all measurements.
+        Get statistics of all accepted measurements.
+        
+        The summary is maintained incrementally, so this is O(1) regardless of
+        the number of measurements.
         
         Returns:
-            dict: Statistical summary of measurements
-        """
-        if not self.measurements:
-            return {
-                "average": None,
-                "min": None,
-                "max": None,
-                "count": 0
-            }
+            dict: Statistical summary of measurements (see StreamingStatistics.summary)
+        """
+        return self.statistics.summary()
+    
+    @staticmethod
+    def now_ns() -> int:
+        """Return the monotonic clock reading in nanoseconds."""
+        return now_ns()
+    
+    def record_event(self, event_type: int, timestamp: Optional[float] = None) -> bool:
+        """
+        Log a pipeline event.
+        
+        For the lowest overhead in hot loops call self.events.record_now()
+        directly.
+        
+        Args:
+            event_type (int): One of EVENT_CAPTURE, EVENT_DETECT, EVENT_STIMULUS_ON, EVENT_DISPLAY
+            timestamp (Optional[float]): Event time in seconds on the perf_counter
+                timeline (e.g. a frame capture timestamp); defaults to now
             
-        return {
-            "average": sum(self.measurements) / len(self.measurements),
-            "min": min(self.measurements),
-            "max": max(self.measurements),
-            "count": len(self.measurements)
-        }
\ No newline at end of file
+        Returns:
+            bool: False if the log is full and the event was dropped
+        """
+        if timestamp is None:
+            return self.events.record_now(event_type)
+        return self.events.record(event_type, int(timestamp * 1e9))
+    
+    def get_events(self) -> np.ndarray:
+        """
+        Get the logged events without copying.
+        
+        Returns:
+            np.ndarray: (n, 2) int64 view with columns [event type, timestamp ns];
+            it aliases the native log, so copy it before calling clear_events()
+        """
+        return np.asarray(self.events)
+    
+    def clear_events(self) -> None:
+        """Empty the event log, keeping its storage."""
+        self.events.clear()
\ No newline at end of file
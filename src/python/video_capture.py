@@ -1,7 +1,12 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple, Union
+from typing import Optional, Tuple, Union, Dict
 import logging
+import threading
+import time
+from src.python.frame_sources import FrameSource, CameraSource
+from src.python.metrics import MetricsRegistry
+from src.python.camera_modes import CameraMode
 
 class VideoCaptureModule:
     """
@@ -9,21 +14,72 @@ class VideoCaptureModule:
     
     This module provides a clean interface to OpenCV's video capture functionality,
     with additional features for frame processing and error handling.
+    
+    In threaded mode a background thread keeps draining the device and publishes
+    only the newest frame, so get_frame() never waits on the driver and stale
+    frames never pile up in its buffer.
+    
+    Frames come from a FrameSource: the webcam by default, or a video file,
+    raw frame file or synthetic generator for headless runs.
     """
     
-    def __init__(self, camera_index: int = 0):
+    def __init__(self, camera_index: int = 0, threaded: bool = False,
+                 first_frame_timeout: float = 2.0,
+                 use_backend_timestamps: bool = False,
+                 source: Optional[FrameSource] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 negotiate_mode: bool = False):
         """
         Initialize the video capture module.
         
         Args:
             camera_index (int): Index of the camera to use (default is 0 for primary webcam)
+            threaded (bool): Capture on a background thread and serve the latest frame
+            first_frame_timeout (float): Seconds start() waits for the first frame in threaded mode
+            use_backend_timestamps (bool): Stamp frames with CAP_PROP_POS_MSEC when the
+                backend reports it. Only enable this for backends whose buffer timestamps
+                come from the monotonic clock (e.g. V4L2); otherwise frames are stamped
+                with time.perf_counter() right after grab()
+            source (Optional[FrameSource]): Frame source to read from instead of the camera
+            metrics (Optional[MetricsRegistry]): Records source read times as
+                "capture.read" and exposes the frame counters; no timing is done if None
+            negotiate_mode (bool): Probe the camera at start and use its fastest
+                verified mode at the preferred size; when False 640x480 at 30 FPS
+                is requested. Driver buffering is minimized either way
         """
         self.camera_index = camera_index
-        self.capture = None
+        self.source = source
+        self.capture: Optional[FrameSource] = None
         self.is_running = False
+        self.threaded = threaded
+        self.first_frame_timeout = first_frame_timeout
+        self.use_backend_timestamps = use_backend_timestamps
+        self.negotiate_mode = negotiate_mode
+        
+        # Latest-frame slot: a (sequence, timestamp, frame) tuple that the grabber
+        # thread replaces with a single attribute store, so readers never lock.
+        self._latest_frame: Optional[Tuple[int, float, np.ndarray]] = None
+        # Held by the grabber only to publish and notify, on every new frame and
+        # when it exits, for consumers that block in wait_for_frame()
+        self._frame_ready = threading.Condition()
+        self._grabber_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._consumed_sequence = 0
+        self.last_frame_timestamp = 0.0
+        # Grayscale and 16-bit Laplacian scratch images for process_frame()
+        self._process_buffers: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        
+        # Counters; each one has a single writer thread
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_stale = 0
+        
+        self.metrics = metrics
+        self._read_histogram = None
+        if metrics is not None:
+            self._read_histogram = metrics.histogram("capture.read")
+            metrics.register_counters("capture", self.get_capture_stats)
         
-        # Configure logging
-        logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
     def start(self) -> bool:
@@ -34,20 +90,26 @@ class VideoCaptureModule:
             bool: True if capture started successfully, False otherwise
         """
         try:
-            # Initialize video capture
-            self.capture = cv2.VideoCapture(self.camera_index)
+            # Initialize the frame source, defaulting to the camera
+            if self.source is not None:
+                self.capture = self.source
+            else:
+                self.capture = CameraSource(self.camera_index, self.use_backend_timestamps,
+                                            self.negotiate_mode)
             
-            # Verify camera opened successfully
-            if not self.capture.isOpened():
-                self.logger.error(f"Failed to open camera at index {self.camera_index}")
+            # Verify the source opened successfully
+            if not self.capture.open():
+                self.logger.error(f"Failed to open frame source {type(self.capture).__name__}")
+                self.capture = None
                 return False
             
-            # Set common properties for better performance
-            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.capture.set(cv2.CAP_PROP_FPS, 30)
-            
             self.is_running = True
+            
+            if self.threaded and not self._start_grabber():
+                self.logger.error("No frame received from background capture thread")
+                self.stop()
+                return False
+            
             self.logger.info("Video capture started successfully")
             return True
             
@@ -64,31 +126,207 @@ class VideoCaptureModule:
                 - Success flag
                 - Frame data if successful, None otherwise
         """
+        success, frame, _ = self.get_timestamped_frame()
+        return success, frame
+    
+    def get_timestamped_frame(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Capture and return a single frame together with its capture timestamp.
+        
+        Timestamps are in seconds on the time.perf_counter() timeline, which is
+        monotonic and shared by the detection and stimulus modules.
+        
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]:
+                - Success flag
+                - Frame data if successful, None otherwise
+                - Capture timestamp in seconds (0.0 on failure)
+        """
         if not self.is_running or self.capture is None:
             self.logger.error("Attempted to get frame while capture is not running")
-            return False, None
+            return False, None, 0.0
+        
+        if self.threaded:
+            return self._get_latest_frame()
         
         try:
-            ret, frame = self.capture.read()
+            ret, frame, timestamp = self._read()
             if not ret:
                 self.logger.warning("Failed to capture frame")
-                return False, None
-                
-            return True, frame
+                return False, None, 0.0
+            
+            self.last_frame_timestamp = timestamp
+            self.frames_captured += 1
+            return True, frame, timestamp
             
         except Exception as e:
             self.logger.error(f"Error capturing frame: {str(e)}")
-            return False, None
+            return False, None, 0.0
+    
+    def wait_for_frame(self, after_sequence: Optional[int] = None,
+                       timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Block until a frame newer than after_sequence is available and return it.
+        
+        In threaded mode this sleeps on a condition the grabber notifies for
+        every frame, so a consumer that keeps up neither polls nor sees the
+        same frame twice. Without a grabber thread this is a plain read, which
+        already blocks until the source delivers the next frame.
+        
+        Args:
+            after_sequence (Optional[int]): Sequence number of the last frame
+                seen; defaults to the last frame returned by this module
+            timeout (Optional[float]): Maximum seconds to wait
+        
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]:
+                - Success flag; False on timeout or once capture has ended
+                - Frame data if successful, None otherwise
+                - Capture timestamp in seconds (0.0 on failure)
+        """
+        if not self.threaded:
+            return self.get_timestamped_frame()
+        if not self.is_running or self.capture is None:
+            return False, None, 0.0
+        
+        after = self._consumed_sequence if after_sequence is None else after_sequence
+        grabber = self._grabber_thread
+        
+        def ready() -> bool:
+            latest = self._latest_frame
+            return ((latest is not None and latest[0] > after)
+                    or grabber is None or not grabber.is_alive())
+        
+        with self._frame_ready:
+            self._frame_ready.wait_for(ready, timeout)
+        latest = self._latest_frame
+        if latest is None or latest[0] <= after:
+            return False, None, 0.0
+        return self._get_latest_frame()
+    
+    def get_camera_mode(self) -> Optional[CameraMode]:
+        """
+        Get the mode the camera is running in.
+        
+        Returns:
+            Optional[CameraMode]: The negotiated mode, or None when not capturing
+            from a camera
+        """
+        return getattr(self.capture, "mode", None)
+    
+    def _read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        """Read from the source, timing the call when metrics are enabled."""
+        if self._read_histogram is None:
+            return self.capture.read()
+        start = time.perf_counter_ns()
+        result = self.capture.read()
+        self._read_histogram.record_ns(time.perf_counter_ns() - start)
+        return result
+    
+    def get_capture_stats(self) -> Dict[str, int]:
+        """
+        Get frame accounting for the current capture session.
+        
+        Returns:
+            Dict[str, int]: Frames captured from the device, frames overwritten
+            before they were consumed, and frames returned more than once
+        """
+        return {
+            "captured": self.frames_captured,
+            "dropped": self.frames_dropped,
+            "stale": self.frames_stale
+        }
+    
+    def _start_grabber(self) -> bool:
+        """
+        Launch the background grabber thread and wait for its first frame.
+        
+        Returns:
+            bool: True if a frame was published within first_frame_timeout
+        """
+        self._stop_event.clear()
+        self._latest_frame = None
+        self._consumed_sequence = 0
+        self._grabber_thread = threading.Thread(
+            target=self._grab_loop, name="VideoCaptureGrabber", daemon=True)
+        self._grabber_thread.start()
+        
+        deadline = time.perf_counter() + self.first_frame_timeout
+        while self._latest_frame is None and time.perf_counter() < deadline:
+            if not self._grabber_thread.is_alive():
+                return False
+            time.sleep(0.001)
+        return self._latest_frame is not None
+    
+    def _grab_loop(self) -> None:
+        """
+        Continuously read frames and publish the newest one to the slot.
+        """
+        sequence = 0
+        consecutive_failures = 0
+        while not self._stop_event.is_set():
+            try:
+                ret, frame, timestamp = self._read()
+            except Exception as e:
+                self.logger.error(f"Error capturing frame: {str(e)}")
+                break
+            
+            if not ret:
+                if self.capture.exhausted:
+                    self.logger.info("Frame source reached the end of its frames")
+                    break
+                consecutive_failures += 1
+                if consecutive_failures >= 100:
+                    self.logger.warning("Capture device stopped delivering frames")
+                    break
+                time.sleep(0.005)
+                continue
+            
+            consecutive_failures = 0
+            sequence += 1
+            with self._frame_ready:
+                self._latest_frame = (sequence, timestamp, frame)
+                self._frame_ready.notify_all()
+            self.frames_captured += 1
+        
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+    
+    def _get_latest_frame(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Return the newest frame published by the grabber thread without blocking.
+        
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]:
+                - Success flag
+                - Latest frame if one is available, None otherwise
+                - Capture timestamp of that frame (0.0 on failure)
+        """
+        latest = self._latest_frame
+        if latest is None:
+            self.logger.warning("Failed to capture frame")
+            return False, None, 0.0
+        
+        sequence, timestamp, frame = latest
+        if sequence == self._consumed_sequence:
+            grabber = self._grabber_thread
+            if grabber is None or not grabber.is_alive():
+                self.logger.warning("Failed to capture frame")
+                return False, None, 0.0
+            self.frames_stale += 1
+        else:
+            self.frames_dropped += sequence - self._consumed_sequence - 1
+            self._consumed_sequence = sequence
+        
+        self.last_frame_timestamp = timestamp
+        return True, frame, timestamp
     
     def get_processed_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
         """
-        Get a frame with basic preprocessing applied.
+        Capture a frame and return its edge map (see process_frame).
         
-        This method applies common preprocessing steps that might be useful
-        for reaction time detection:
-        - Conversion to grayscale
-        - Basic noise reduction
-        - Edge enhancement
+        This consumes a frame from the source. To show or analyze the raw frame
+        as well, capture it once with get_frame() and pass it to process_frame().
         
         Returns:
             Tuple[bool, Optional[np.ndarray]]:
@@ -100,28 +338,59 @@ class VideoCaptureModule:
             return False, None
             
         try:
-            # Convert to grayscale for simpler processing
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # Enhance edges using Laplacian
-            edges = cv2.Laplacian(blurred, cv2.CV_64F)
-            
-            # Convert back to uint8
-            processed = np.uint8(np.absolute(edges))
-            
-            return True, processed
-            
+            return True, self.process_frame(frame)
         except Exception as e:
             self.logger.error(f"Error processing frame: {str(e)}")
             return False, None
     
+    def process_frame(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Compute the edge map of an already captured frame.
+        
+        The frame is converted to grayscale, blurred to reduce noise, and its
+        Laplacian is taken in 16-bit and folded back to 8-bit with a saturating
+        absolute value. Intermediate images are reused between calls with the
+        same frame size, so with an out buffer nothing is allocated.
+        
+        Args:
+            frame (np.ndarray): BGR frame
+            out (Optional[np.ndarray]): uint8 buffer of the frame's height and
+                width to write the result into; a new array is returned if None
+            
+        Returns:
+            np.ndarray: Edge map, the out buffer if one was given
+            
+        Raises:
+            ValueError: If out is not a uint8 array of the frame's height and width
+        """
+        shape = frame.shape[:2]
+        if out is not None and (out.dtype != np.uint8 or out.shape != shape):
+            # OpenCV would silently reallocate a mismatched dst and leave out untouched
+            raise ValueError(f"out must be a uint8 array of shape {shape}, "
+                             f"got {out.dtype} {out.shape}")
+        if self._process_buffers is None or self._process_buffers[0].shape != shape:
+            self._process_buffers = (np.empty(shape, np.uint8), np.empty(shape, np.int16))
+        gray, laplacian = self._process_buffers
+        if out is None:
+            out = np.empty(shape, np.uint8)
+        
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=gray)
+        cv2.Laplacian(gray, cv2.CV_16S, dst=laplacian)
+        cv2.convertScaleAbs(laplacian, dst=out)
+        return out
+    
     def stop(self) -> None:
         """
         Stop the video capture and release resources.
         """
+        if self._grabber_thread is not None:
+            self._stop_event.set()
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+            self._grabber_thread.join(timeout=1.0)
+            self._grabber_thread = None
+        
         if self.capture is not None:
             try:
                 self.capture.release()
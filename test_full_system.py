@@ -1,17 +1,117 @@
 from src.python.video_capture import VideoCaptureModule
 from src.python.stimuli_display import StimuliDisplayModule
 from src.python.response_detection import ResponseDetectionModule
+from src.python.timing import TimingModule, EVENT_CAPTURE, EVENT_DETECT, EVENT_DISPLAY
+from src.python.pipeline import DetectionPipeline
+from src.python.reaction_engine import ReactionTestEngine, TRIAL_RESPONSE, STATE_STIMULUS
+from src.python.session_recorder import SessionRecorder
+from src.python.calibration import LatencyProfile
+from src.python.metrics import MetricsRegistry
+from src.python.frame_governor import FrameGovernor
+from src.python.adaptive_threshold import AdaptiveThreshold
+from contextlib import nullcontext
+import argparse
+import logging
 import cv2
-import time
 
 def main():
-    capture = VideoCaptureModule()
-    stimuli = StimuliDisplayModule()
-    response = ResponseDetectionModule()
+    parser = argparse.ArgumentParser(description="Webcam reaction time test")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the session to PATH.frames/.index/.meta.json")
+    parser.add_argument("--record-encoding", choices=("raw", "jpg", "png"), default="jpg")
+    parser.add_argument("--latency-profile", metavar="PATH",
+                        help="subtract the detection latency measured by src.python.calibration")
+    parser.add_argument("--auto-threshold", action="store_true",
+                        help="set the movement threshold from the idle motion noise")
+    parser.add_argument("--threshold-multiplier", type=float, default=3.0,
+                        help="auto threshold as a multiple of the idle noise floor")
+    parser.add_argument("--negotiate-camera", action="store_true",
+                        help="probe the camera and use its fastest verified mode at 640x480")
+    parser.add_argument("--metrics", action="store_true",
+                        help="time each pipeline stage and print the breakdown at exit")
+    parser.add_argument("--metrics-interval", type=float, metavar="SECONDS",
+                        help="also log a metrics snapshot every SECONDS")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="append periodic snapshots to PATH as JSON lines instead of logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
     
+    metrics = MetricsRegistry() if args.metrics or args.metrics_interval else None
+    
+    # Capture runs on its own thread and detection on the pipeline thread, which
+    # always takes the newest frame; this thread only renders the newest result,
+    # so GUI cost never delays detection. Each side drops its debug drawing
+    # when its work stops fitting in the camera's frame interval.
+    capture = VideoCaptureModule(threaded=True, metrics=metrics,
+                                 negotiate_mode=args.negotiate_camera)
     if not capture.start():
         print("Failed to start video capture!")
         return
+    # The stimuli are laid out and the movement threshold (an area in pixels)
+    # is tuned for 640x480; follow the size the camera actually delivers
+    mode = capture.get_camera_mode()
+    frame_size = (mode.width, mode.height) if mode is not None else (640, 480)
+    area_scale = frame_size[0] * frame_size[1] / (640 * 480)
+    stimuli = StimuliDisplayModule(frame_size, metrics=metrics)
+    auto_threshold = AdaptiveThreshold(args.threshold_multiplier) if args.auto_threshold else None
+    response = ResponseDetectionModule(1000 * area_scale, auto_threshold=auto_threshold,
+                                       metrics=metrics)
+    profile = None
+    if args.latency_profile:
+        try:
+            profile = LatencyProfile.load(args.latency_profile, response)
+        except ValueError as e:
+            print(e)
+            capture.stop()
+            return
+    timing = TimingModule()
+    
+    def on_event(event):
+        if event.kind == TRIAL_RESPONSE and event.reaction_time is not None:
+            print(f"Reaction time: {event.reaction_time:.1f} ms")
+    
+    engine = ReactionTestEngine(stimuli, response, timing, on_event=on_event)
+    recorder = SessionRecorder(args.record, args.record_encoding) if args.record else None
+    
+    def on_frame(result):
+        # Trial logic sees every analyzed frame on the detection thread
+        timing.record_event(EVENT_CAPTURE, result.timestamp)
+        timing.events.record_now(EVENT_DETECT)
+        engine.step(result.timestamp, result.movement_detected)
+        if recorder is not None:
+            stimulus = engine.trial if engine.state == STATE_STIMULUS else -1
+            recorder.record(result.frame, result.timestamp, response.last_motion_score,
+                            stimulus)
+    
+    if profile is not None:
+        # A correction measured with another detector or frame rate would bias
+        # every reaction time, so refuse it rather than apply it
+        differences = profile.mismatches(response, capture.capture.nominal_fps)
+        if differences:
+            print("The latency profile does not match this setup:")
+            for difference in differences:
+                print(f"  {difference}")
+            print("Re-run src.python.calibration with these settings.")
+            capture.stop()
+            return
+        response.latency_correction_ms = profile.correction_ms
+        print(f"Correcting reaction times by {response.latency_correction_ms:.1f} ms")
+    
+    detection_governor = FrameGovernor()
+    display_governor = FrameGovernor()
+    pipeline = DetectionPipeline(capture, response, on_frame, governor=detection_governor)
+    imshow_timer = nullcontext()
+    if metrics is not None:
+        metrics.register_counters("pipeline", pipeline.get_stats)
+        metrics.register_counters("governor.detect", detection_governor.get_stats)
+        metrics.register_counters("governor.display", display_governor.get_stats)
+        imshow_timer = metrics.timer("display.imshow")
+        if args.metrics_interval:
+            metrics.start_periodic_dump(args.metrics_interval, args.metrics_file)
+    if recorder is not None:
+        recorder.start()
+    pipeline.start()
+    display_governor.budget = detection_governor.budget
         
     print("\nStarting Reaction Time Test System")
     print("==================================")
@@ -20,64 +120,99 @@ def main():
     print("3. Your reaction time will be measured")
     print("4. Press 'q' to quit")
     print("5. Use '+' to increase and '-' to decrease motion sensitivity\n")
-    
-    reaction_times = []
+    if auto_threshold is not None:
+        print(f"Calibrating the threshold - stay still for the first {auto_threshold.baseline.warmup} frames\n")
     
     try:
         while True:
-            success, frame = capture.get_frame()
-            if not success:
+            result = pipeline.wait_for_result(timeout=0.05)
+            if result is None and not pipeline.is_running:
                 print("Failed to capture frame!")
                 break
-                
-            movement_detected, motion_frame = response.detect_movement(frame)
             
-            if stimuli.is_stimulus_active:
-                if stimuli.get_current_stimulus_duration() > 2000:
-                    reaction_time = response.stop_response_window()
-                    if reaction_time is not None:
-                        reaction_times.append(reaction_time)
-                    stimuli.deactivate_stimulus()
+            if result is not None:
+                # Only the rendering counts against the budget; waitKey also
+                # sleeps and pumps GUI events, which is not work to shed
+                with display_governor.frame():
+                    display_frame = stimuli.overlay_stimulus(result.frame, in_place=True)
+                    # The elapsed time text and the motion window are dropped
+                    # when rendering falls behind the camera
+                    show_details = display_governor.allow_optional()
+                    if show_details:
+                        display_frame = response.get_response_visualization(display_frame)
                     
-            elif stimuli.should_show_stimulus(min_delay=2.0, max_delay=4.0):
-                stimuli.activate_random_stimulus()
-                response.start_response_window()
-            
-            if movement_detected and response.waiting_for_response:
-                reaction_time = response.stop_response_window()
-                if reaction_time is not None:
-                    reaction_times.append(reaction_time)
-                    print(f"Reaction time: {reaction_time:.1f} ms")
-                stimuli.deactivate_stimulus()
-            
-            display_frame = stimuli.overlay_stimulus(frame)
-            display_frame = response.get_response_visualization(display_frame)
-            
-            cv2.imshow('Reaction Time Test', display_frame)
-            cv2.imshow('Motion Detection', motion_frame)
+                    with imshow_timer:
+                        cv2.imshow('Reaction Time Test', display_frame)
+                        if show_details and result.motion_frame is not None:
+                            cv2.imshow('Motion Detection', result.motion_frame)
+                timing.events.record_now(EVENT_DISPLAY)
             
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
                 break
             elif key == ord('+'):
-                response.movement_threshold *= 0.8
-                print(f"Sensitivity increased - Threshold: {response.movement_threshold:.0f}")
+                threshold = engine.adjust_sensitivity(0.8)
+                print(f"Sensitivity increased - Threshold: {threshold:.0f}")
             elif key == ord('-'):
-                response.movement_threshold *= 1.2
-                print(f"Sensitivity decreased - Threshold: {response.movement_threshold:.0f}")
-            
-            time.sleep(1/30)
+                threshold = engine.adjust_sensitivity(1.2)
+                print(f"Sensitivity decreased - Threshold: {threshold:.0f}")
             
     finally:
-        if reaction_times:
+        summary = engine.statistics.summary()
+        if summary["count"]:
             print("\nTest Results")
             print("============")
-            print(f"Number of trials: {len(reaction_times)}")
-            print(f"Average reaction time: {sum(reaction_times)/len(reaction_times):.1f} ms")
-            print(f"Fastest reaction: {min(reaction_times):.1f} ms")
-            print(f"Slowest reaction: {max(reaction_times):.1f} ms")
+            print(f"Number of trials: {summary['count']}")
+            print(f"Average reaction time: {summary['average']:.1f} ms")
+            if summary["std"] is not None:
+                print(f"Standard deviation: {summary['std']:.1f} ms")
+            print(f"Median reaction time: {summary['p50']:.1f} ms")
+            print(f"90th percentile: {summary['p90']:.1f} ms")
+            print(f"Fastest reaction: {summary['min']:.1f} ms")
+            print(f"Slowest reaction: {summary['max']:.1f} ms")
+        if summary["anticipations"] or summary["lapses"]:
+            print(f"Excluded: {summary['anticipations']} anticipations (<100 ms), "
+                  f"{summary['lapses']} lapses (>1000 ms)")
+        
+        events = timing.get_events()
+        if len(events) > 1:
+            # The detection thread logs capture and detect back to back
+            pairs = (events[:-1, 0] == EVENT_CAPTURE) & (events[1:, 0] == EVENT_DETECT)
+            latencies = (events[1:, 1] - events[:-1, 1])[pairs] / 1e6
+            if latencies.size:
+                print(f"Capture-to-detection latency: {latencies.mean():.1f} ms average")
+        
+        if stimuli.schedule is not None:
+            print(f"Stimulus schedule seed: {stimuli.schedule.seed}")
+        
+        capture_stats = capture.get_capture_stats()
+        pipeline_stats = pipeline.get_stats()
+        print(f"Frames: {capture_stats['captured']} captured, {pipeline_stats['processed']} analyzed, "
+              f"{capture_stats['dropped']} dropped before detection, "
+              f"{pipeline_stats['skipped']} not displayed")
+        shed = detection_governor.get_stats()["shed"] + display_governor.get_stats()["shed"]
+        if shed:
+            print(f"Debug drawing skipped on {shed} frames under load "
+                  f"({detection_governor.frames_over_budget} detection frames over budget)")
         
+        pipeline.stop()
         capture.stop()
+        if metrics is not None:
+            metrics.stop_periodic_dump()
+            snapshot = metrics.snapshot()
+            print("\nStage timings (ms)")
+            print("==================")
+            for name, stage in snapshot["stages"].items():
+                if stage["count"]:
+                    print(f"{name:<20} n={stage['count']:<7} mean={stage['mean_ms']:.3f} "
+                          f"p50={stage['p50_ms']:.3f} p99={stage['p99_ms']:.3f} "
+                          f"max={stage['max_ms']:.3f}")
+            for name, value in snapshot["counters"].items():
+                print(f"{name:<20} {value}")
+        if recorder is not None:
+            recorder.stop()
+            print(f"Recorded {recorder.frames_written} frames to {args.record} "
+                  f"({recorder.frames_dropped} dropped)")
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
@@ -1,13 +1,15 @@
 from src.python.video_capture import VideoCaptureModule
 from src.python.stimuli_display import StimuliDisplayModule
 import cv2
-import time
+import logging
 
 def main():
     """
     Visual test combining video capture and stimuli display.
     Shows how the reaction time test will look to users.
     """
+    logging.basicConfig(level=logging.INFO)
+    
     # Initialize modules
     capture = VideoCaptureModule()
     stimuli = StimuliDisplayModule()
@@ -28,20 +30,20 @@ def main():
                 print("Failed to capture frame!")
                 break
             
+            # Edge map of the camera frame, before the stimulus is drawn on it
+            processed = capture.process_frame(frame)
+            
             # Check if we should show a new stimulus
             if stimuli.should_show_stimulus():
                 stimuli.activate_random_stimulus()
             
             # Overlay any active stimulus
-            frame = stimuli.overlay_stimulus(frame)
+            frame = stimuli.overlay_stimulus(frame, in_place=True)
             
             # Display frame
             cv2.imshow('Reaction Time Test', frame)
             
-            # Get processed frame for motion detection
-            success, processed = capture.get_processed_frame()
-            if success:
-                cv2.imshow('Motion Detection', processed)
+            cv2.imshow('Motion Detection', processed)
             
             # Break loop on 'q' press
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -52,9 +54,6 @@ def main():
                 stimuli.get_current_stimulus_duration() > 1000):
                 stimuli.deactivate_stimulus()
             
-            # Cap frame rate
-            time.sleep(1/30)
-            
     finally:
         capture.stop()
         cv2.destroyAllWindows()
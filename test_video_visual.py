@@ -1,11 +1,14 @@
 from src.python.video_capture import VideoCaptureModule
 import cv2
-import time
+import numpy as np
+import logging
 
 def main():
     """
     Visual test of the VideoCaptureModule showing both raw and processed frames.
     """
+    logging.basicConfig(level=logging.INFO)
+    
     # Initialize video capture
     capture = VideoCaptureModule()
     
@@ -13,13 +16,17 @@ def main():
         print("Failed to start video capture!")
         return
     
+    processed_frame = None
     try:
         while True:
-            # Get both raw and processed frames
-            success1, raw_frame = capture.get_frame()
-            success2, processed_frame = capture.get_processed_frame()
+            # Capture once and derive the processed view from the same frame
+            success, raw_frame = capture.get_frame()
             
-            if success1 and success2:
+            if success:
+                if processed_frame is None or processed_frame.shape != raw_frame.shape[:2]:
+                    processed_frame = np.empty(raw_frame.shape[:2], np.uint8)
+                capture.process_frame(raw_frame, out=processed_frame)
+                
                 # Display both frames
                 cv2.imshow('Raw Feed', raw_frame)
                 cv2.imshow('Processed Feed', processed_frame)
@@ -30,9 +37,6 @@ def main():
             else:
                 print("Failed to capture frames!")
                 break
-                
-            # Cap frame rate
-            time.sleep(1/30)
             
     finally:
         capture.stop()
@@ -0,0 +1,118 @@
+import pytest
+import numpy as np
+from src.python.adaptive_threshold import StreamingQuantile, AdaptiveThreshold
+from src.python.frame_sources import SyntheticSource
+from src.python.response_detection import ResponseDetectionModule
+from src.python.calibration import LoopbackSource
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.reaction_engine import (ReactionTestEngine, TRIAL_STIMULUS_ON, TRIAL_RESPONSE,
+                                        STATE_FINISHED)
+
+def test_streaming_quantile_converges():
+    """Test that the estimate settles at the quantile of a stationary stream"""
+    samples = np.random.default_rng(0).exponential(100.0, 20000)
+    estimator = StreamingQuantile(quantile=0.9, adaptation=0.01, warmup=30)
+    for value in samples:
+        estimator.update(value)
+    assert estimator.estimate == pytest.approx(np.quantile(samples, 0.9), rel=0.15)
+
+def test_streaming_quantile_follows_drift():
+    """Test that the estimate follows a shift in the stream"""
+    rng = np.random.default_rng(1)
+    estimator = StreamingQuantile(quantile=0.5, adaptation=0.02, warmup=10)
+    for value in rng.normal(100.0, 10.0, 2000):
+        estimator.update(value)
+    for value in rng.normal(300.0, 10.0, 2000):
+        estimator.update(value)
+    assert estimator.estimate == pytest.approx(300.0, abs=10.0)
+
+def test_streaming_quantile_warmup_and_constant_stream():
+    """Test that no estimate is given during warmup and a constant stream holds it"""
+    estimator = StreamingQuantile(warmup=5)
+    assert [estimator.update(0.0) for _ in range(4)] == [None] * 4
+    assert estimator.update(0.0) == 0.0
+    for _ in range(100):
+        estimator.update(0.0)
+    assert estimator.estimate == 0.0
+    estimator.reset()
+    assert estimator.update(1.0) is None
+
+def test_streaming_quantile_spread_ignores_outlier_bursts():
+    """Test that a burst of huge samples cannot inflate the step size"""
+    estimator = StreamingQuantile(quantile=0.5, adaptation=0.01, warmup=10)
+    for value in np.random.default_rng(2).normal(100.0, 10.0, 500):
+        estimator.update(value)
+    spread = estimator.spread
+    for _ in range(10):
+        estimator.update(1e6)
+    assert estimator.spread < 1.5 * spread
+
+def test_streaming_quantile_rejects_invalid_parameters():
+    """Test that out-of-range settings are refused instead of adjusted"""
+    for options in ({"quantile": 1.0}, {"adaptation": 0.0}, {"adaptation": -0.1},
+                    {"warmup": 0}):
+        with pytest.raises(ValueError):
+            StreamingQuantile(**options)
+
+def test_adaptive_threshold_multiplier_and_floor():
+    """Test that the threshold is a multiple of the noise floor, bounded below"""
+    auto = AdaptiveThreshold(multiplier=3.0, quantile=0.5, warmup=3, min_threshold=50.0)
+    assert auto.update(100.0) is None and not auto.ready
+    auto.update(100.0)
+    assert auto.update(100.0) == pytest.approx(300.0)
+    auto.multiplier = 0.1
+    assert auto.threshold == 50.0
+
+def test_detector_calibrates_threshold_outside_response_window():
+    """Test that the detector learns from idle frames only and still detects motion"""
+    auto = AdaptiveThreshold(multiplier=3.0, warmup=20, min_threshold=10.0)
+    detector = ResponseDetectionModule(movement_threshold=1e9, visualize=False,
+                                       subframe_onset=False, auto_threshold=auto)
+    source = SyntheticSource(320, 240, fps=30, noise_level=24.0, motion_frames=(60,),
+                             start_time=0.0)
+    source.open()
+    false_triggers = 0
+    for index in range(50):
+        _, frame, timestamp = source.read()
+        detected, _ = detector.detect_movement(frame, timestamp)
+        false_triggers += detected and index > 20
+    assert auto.ready
+    assert false_triggers == 0
+    threshold = detector.movement_threshold
+    assert threshold == auto.threshold
+    assert 10.0 < threshold < 1e9
+
+    detector.start_response_window(onset_time=timestamp)
+    detected = False
+    for _ in range(15):
+        _, frame, timestamp = source.read()
+        detected |= detector.detect_movement(frame, timestamp)[0]
+    assert detected
+    assert detector.movement_threshold == threshold
+    assert detector.stop_response_window() is not None
+
+def test_threshold_stays_bounded_with_post_response_motion():
+    """Test that motion lasting past each response does not ratchet the threshold up"""
+    auto = AdaptiveThreshold(multiplier=3.0, warmup=30, min_threshold=10.0)
+    response = ResponseDetectionModule(movement_threshold=1e9, visualize=False,
+                                       auto_threshold=auto)
+    source = LoopbackSource(320, 240, 30, motion_duration=10, noise_level=24.0, start_time=0.0)
+    thresholds = []
+
+    def on_event(event):
+        if event.kind == TRIAL_STIMULUS_ON:
+            source.trigger(event.timestamp + 0.2)
+        elif event.kind == TRIAL_RESPONSE:
+            thresholds.append(response.movement_threshold)
+
+    engine = ReactionTestEngine(StimuliDisplayModule((320, 240), StimulusSchedule(20, 0.5, 1.0, seed=0)),
+                                response, on_event=on_event)
+    source.open()
+    while engine.state != STATE_FINISHED:
+        _, frame, timestamp = source.read()
+        engine.process_frame(frame, timestamp)
+
+    # Trials shown before the warmup completes time out
+    assert len(thresholds) >= 15
+    assert max(thresholds) < 1.2 * min(thresholds)
@@ -0,0 +1,85 @@
+import json
+import cv2
+import pytest
+from src.python.frame_sources import SyntheticSource
+from src.python.session_recorder import SessionRecorder
+from src.python.batch_analysis import (parameter_grid, load_onsets, load_recorded_onsets,
+                                       analyze_session, run_batch, summarize,
+                                       write_trials_csv, write_sweep_csv)
+
+def _record_session(tmp_path, name, motion_frames, onsets):
+    path = str(tmp_path / f"{name}.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 240))
+    if not writer.isOpened():
+        pytest.skip("No video encoder available")
+    source = SyntheticSource(320, 240, fps=30, num_frames=90, motion_frames=motion_frames)
+    source.open()
+    while True:
+        ret, frame, _ = source.read()
+        if not ret:
+            break
+        writer.write(frame)
+    writer.release()
+    with open(tmp_path / f"{name}.json", "w") as f:
+        json.dump({"onsets": onsets}, f)
+    return path
+
+def test_load_onsets_from_schedule_export(tmp_path):
+    """Test onsets from a schedule export are shifted to the video start"""
+    path = tmp_path / "log.json"
+    path.write_text(json.dumps({"video_start": 10.0, "trials": [
+        {"onset": 12.5}, {"onset": 11.0}, {"onset": None}]}))
+    assert list(load_onsets(str(path))) == [1.0, 2.5]
+
+def test_session_replay_over_parameter_grid(tmp_path):
+    """Test each parameter set gets its own response or timeout per trial"""
+    path = _record_session(tmp_path, "session", (30,), [0.8, 2.0])
+    grid = parameter_grid([100, 1e9], [25])
+    results = analyze_session(path, load_onsets(path[:-4] + ".json"), grid, timeout_ms=500)
+
+    by_params = {p: [r for r in results if r.parameters == p] for p in grid}
+    sensitive, blind = by_params[grid[0]], by_params[grid[1]]
+    assert [r.trial for r in sensitive] == [0, 1]
+    assert 150 <= sensitive[0].reaction_time <= 200
+    assert sensitive[1].reaction_time is None
+    assert all(r.reaction_time is None for r in blind)
+
+def test_batch_pool_matches_serial(tmp_path):
+    """Test the process pool returns the same results as a serial run"""
+    sessions = []
+    for i, motion in enumerate((30, 45)):
+        path = _record_session(tmp_path, f"s{i}", (motion,), [0.8])
+        sessions.append((path, load_onsets(path[:-4] + ".json")))
+    grid = parameter_grid([100, 200], [15, 25])
+
+    serial = run_batch(sessions, grid, processes=1)
+    pooled = run_batch(sessions, grid, processes=3)
+    assert pooled == serial
+
+    table = summarize(pooled)
+    assert len(table) == len(grid)
+    assert all(row["trials"] == 2 for row in table)
+
+    write_trials_csv(str(tmp_path / "trials.csv"), pooled)
+    write_sweep_csv(str(tmp_path / "sweep.csv"), table)
+    assert len((tmp_path / "trials.csv").read_text().splitlines()) == len(pooled) + 1
+    assert len((tmp_path / "sweep.csv").read_text().splitlines()) == len(grid) + 1
+
+def test_recorded_session_onsets_from_index(tmp_path):
+    """Test a SessionRecorder session is replayed with onsets from its index and
+    movement on the frame that reaches the timeout still counts, as in the live test"""
+    path = str(tmp_path / "run")
+    recorder = SessionRecorder(path)
+    recorder.start()
+    source = SyntheticSource(320, 240, fps=30, num_frames=90, motion_frames=(40,),
+                             start_time=100.0)
+    source.open()
+    for index in range(90):
+        ret, frame, timestamp = source.read()
+        recorder.record(frame, timestamp, stimulus=1 if 30 <= index < 50 else -1)
+    recorder.stop()
+
+    assert load_recorded_onsets(path) == pytest.approx([1.0])
+    results = analyze_session(path, None, parameter_grid([100]), timeout_ms=300)
+    assert [r.trial for r in results] == [0]
+    assert 300 <= results[0].reaction_time <= 1000 / 3 + 1
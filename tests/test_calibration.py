@@ -0,0 +1,81 @@
+import pytest
+from src.python.calibration import LoopbackSource, LatencyProfile, run_calibration
+from src.python.response_detection import ResponseDetectionModule
+from src.python.frame_sources import SyntheticSource
+
+def test_loopback_motion_starts_at_triggered_time():
+    """Test triggered motion appears on the first frame at or after the trigger"""
+    source = LoopbackSource(160, 120, fps=10, start_time=0.0)
+    source.open()
+    source.trigger(0.45)
+    offsets = [source.square_offset(i) for i in range(8)]
+    assert offsets == [0] * 8
+
+    for _ in range(8):
+        source.read()
+    assert source.motion_frames == [5]
+
+def test_calibration_measures_frame_quantization():
+    """Test per-frame detection latency spans at most one frame interval"""
+    response = ResponseDetectionModule(visualize=False, subframe_onset=False,
+                                       latency_correction_ms=50.0)
+    profile = run_calibration(trials=20, response=response, width=320, height=240)
+
+    assert profile.misses == 0
+    assert len(profile.latencies_ms) == 20
+    assert all(-1e-6 <= v <= 1000 / 30 + 1e-6 for v in profile.latencies_ms)
+    assert 5.0 < profile.correction_ms < 30.0
+    # The detector's own correction is restored after calibrating
+    assert response.latency_correction_ms == 50.0
+
+def test_profile_round_trip(tmp_path):
+    """Test a profile survives export and load"""
+    profile = LatencyProfile([10.0, 20.0, 40.0], misses=1, settings={"fps": 30})
+    path = str(tmp_path / "profile.json")
+    profile.export(path)
+
+    loaded = LatencyProfile.load(path)
+    assert loaded.correction_ms == pytest.approx(20.0)
+    assert loaded.misses == 1
+    assert loaded.settings == {"fps": 30}
+    assert loaded.to_dict()["trials"] == 4
+
+def test_negative_correction_is_applied(tmp_path):
+    """Test the early bias of sub-frame onsets is measured as a negative correction
+    that lengthens reaction times, and a profile is refused by a detector
+    estimating onsets the other way"""
+    response = ResponseDetectionModule(visualize=False, subframe_onset=True)
+    profile = run_calibration(trials=10, response=response)
+    assert profile.correction_ms < 0.0
+    path = str(tmp_path / "profile.json")
+    profile.export(path)
+
+    with pytest.raises(ValueError):
+        LatencyProfile.load(path, ResponseDetectionModule(visualize=False))
+    loaded = LatencyProfile.load(path, response)
+    assert loaded.correction_ms == pytest.approx(profile.correction_ms)
+
+    reaction_times = []
+    for correction in (0.0, loaded.correction_ms):
+        detector = ResponseDetectionModule(visualize=False, subframe_onset=True,
+                                           latency_correction_ms=correction)
+        source = SyntheticSource(320, 240, fps=30, motion_frames=(9,), start_time=0.0)
+        source.open()
+        for index in range(12):
+            _, frame, timestamp = source.read()
+            detector.detect_movement(frame, timestamp)
+            if index == 0:
+                detector.start_response_window(onset_time=timestamp)
+        reaction_times.append(detector.stop_response_window())
+    assert reaction_times[1] == pytest.approx(reaction_times[0] - loaded.correction_ms)
+
+def test_profile_mismatches_live_settings():
+    """Test a profile reports the settings it was not measured with"""
+    response = ResponseDetectionModule(visualize=False, subframe_onset=False)
+    profile = run_calibration(trials=3, response=response, width=160, height=120)
+    assert profile.mismatches(response, 30.0) == []
+
+    live = ResponseDetectionModule(visualize=False, detector='running_average',
+                                   subframe_onset=True)
+    differences = profile.mismatches(live, 60.0)
+    assert [d.split(":")[0] for d in differences] == ["detector", "subframe_onset", "fps"]
@@ -0,0 +1,123 @@
+import time
+import cv2
+import numpy as np
+from src.python.camera_modes import (CameraMode, fourcc_to_str, probe_modes, rank_modes,
+                                     negotiate)
+from src.python.frame_sources import CameraSource
+
+class FakeVideoCapture:
+    """Stands in for cv2.VideoCapture with a fixed table of supported modes"""
+
+    def __init__(self, modes, delivered_fps=None, clock=None):
+        # modes maps (fourcc, width, height) to the highest supported frame rate;
+        # delivered_fps optionally overrides the rate frames really arrive at
+        self.modes = modes
+        self.delivered_fps = delivered_fps or {}
+        self.clock = clock
+        self.fourcc, self.width, self.height = next(iter(modes))
+        self.fps = 30.0
+        self.buffer_size = 4
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC:
+            code = fourcc_to_str(value)
+            if any(m[0] == code for m in self.modes):
+                self.fourcc = code
+        elif prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            size = (value, self.height) if prop == cv2.CAP_PROP_FRAME_WIDTH else (self.width, value)
+            sizes = [(w, h) for f, w, h in self.modes if f == self.fourcc]
+            self.width, self.height = min(sizes, key=lambda s: abs(s[0] - size[0]) + abs(s[1] - size[1]))
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = min(value, self.modes.get((self.fourcc, self.width, self.height), 30.0))
+        elif prop == cv2.CAP_PROP_BUFFERSIZE:
+            self.buffer_size = max(1, int(value))
+        return True
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FOURCC: cv2.VideoWriter_fourcc(*self.fourcc),
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_BUFFERSIZE: self.buffer_size
+        }.get(prop, 0.0)
+
+    def grab(self):
+        rate = self.delivered_fps.get((self.fourcc, self.width, self.height), self.fps)
+        if self.clock is not None:
+            self.clock.now += 1.0 / rate
+        else:
+            time.sleep(1.0 / rate)
+        return True
+
+    def retrieve(self):
+        return True, np.zeros((self.height, self.width, 3), np.uint8)
+
+    def release(self):
+        pass
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+MODES = {
+    ('YUYV', 640, 480): 30.0,
+    ('YUYV', 1280, 720): 10.0,
+    ('MJPG', 640, 480): 60.0,
+    ('MJPG', 1280, 720): 60.0,
+    ('MJPG', 320, 240): 120.0,
+}
+
+def test_probe_finds_accepted_modes():
+    """Test probing records each mode the driver accepts once"""
+    modes = probe_modes(FakeVideoCapture(MODES))
+    assert set(modes) == {CameraMode(w, h, fps, f) for (f, w, h), fps in MODES.items()}
+
+def test_rank_keeps_preferred_size_then_prefers_rate():
+    """Test the preferred size wins over a faster mode at another size"""
+    modes = [CameraMode(*m) for m in [(1280, 720, 60.0, 'MJPG'), (640, 480, 30.0, 'YUYV'),
+                                      (320, 240, 120.0, 'MJPG'), (160, 120, 240.0, 'MJPG'),
+                                      (640, 480, 60.0, 'MJPG')]]
+    ranked = rank_modes(modes, preferred_size=(640, 480), min_size=(320, 240))
+    assert ranked[:2] == [CameraMode(640, 480, 60.0, 'MJPG'), CameraMode(640, 480, 30.0, 'YUYV')]
+    assert ranked[2] == CameraMode(320, 240, 120.0, 'MJPG')
+    assert ranked[-1] == CameraMode(160, 120, 240.0, 'MJPG')
+
+def test_negotiate_falls_back_when_rate_not_delivered():
+    """Test a mode that reports more than it delivers is replaced by a verified one"""
+    clock = FakeClock()
+    # MJPG at 640x480 claims 60 FPS but only delivers 20
+    capture = FakeVideoCapture(MODES, delivered_fps={('MJPG', 640, 480): 20.0}, clock=clock)
+    result = negotiate(capture, clock=clock)
+
+    assert result.mode == CameraMode(640, 480, 30.0, 'YUYV')
+    assert abs(result.measured_fps - 30.0) < 1e-6
+    assert result.buffer_size == 1
+    assert (capture.fourcc, capture.width, capture.height, capture.fps) == ('YUYV', 640, 480, 30.0)
+
+def test_camera_source_with_fake_backend():
+    """Test CameraSource negotiates through an injected capture factory"""
+    source = CameraSource(0, negotiate=True, capture_factory=lambda index: FakeVideoCapture(
+        {('MJPG', 640, 480): 200.0, ('YUYV', 640, 480): 30.0}), measure_frames=5)
+    assert source.open()
+    assert source.mode == CameraMode(640, 480, 200.0, 'MJPG')
+    assert source.measured_fps > 50
+    assert source.buffer_size == 1
+
+    success, frame, _ = source.read()
+    assert success and frame.shape == (480, 640, 3)
+    source.release()
+
+def test_camera_source_without_negotiation():
+    """Test the fixed 640x480 at 30 FPS request without negotiation, the default"""
+    source = CameraSource(0, capture_factory=lambda index: FakeVideoCapture(MODES))
+    assert source.open()
+    assert (source.mode.width, source.mode.height, source.mode.fps) == (640, 480, 30.0)
+    assert source.nominal_fps == 30.0
+    assert source.buffer_size == 1
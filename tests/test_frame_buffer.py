@@ -0,0 +1,26 @@
+import pytest
+import numpy as np
+from src.python.frame_buffer import FrameRingBuffer
+
+def test_ring_buffer_keeps_newest_frames():
+    """Test that the ring overwrites the oldest frame once full"""
+    buffer = FrameRingBuffer(3, (2, 2))
+    for value in range(5):
+        buffer.push(np.full((2, 2), value, dtype=np.uint8))
+
+    assert len(buffer) == 3
+    assert [int(buffer.latest(age)[0, 0]) for age in range(3)] == [4, 3, 2]
+    with pytest.raises(IndexError):
+        buffer.latest(3)
+
+def test_ring_buffer_write_in_place():
+    """Test writing into next_slot() without copying"""
+    buffer = FrameRingBuffer(2, (4,))
+    slot = buffer.next_slot()
+    slot[:] = 7
+    buffer.advance()
+    assert np.shares_memory(buffer.latest(), slot)
+    assert buffer.latest()[0] == 7
+
+    buffer.clear()
+    assert len(buffer) == 0
@@ -0,0 +1,61 @@
+import time
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.frame_sources import SyntheticSource
+from src.python.pipeline import DetectionPipeline
+from src.python.frame_governor import FrameGovernor
+
+def test_governor_sheds_with_hysteresis():
+    """Test that optional work stops above the shed load and resumes below the restore load"""
+    governor = FrameGovernor(budget=0.01, shed_load=0.8, restore_load=0.5, smoothing=1.0)
+    governor.record(0.005)
+    assert governor.allow_optional()
+
+    governor.record(0.012)
+    assert governor.overloaded
+    assert not governor.allow_optional()
+
+    governor.record(0.006)
+    assert governor.overloaded
+    governor.record(0.004)
+    assert governor.allow_optional()
+
+    assert governor.get_stats() == {"frames": 4, "over_budget": 1, "shed": 1}
+
+def test_governor_frame_timer():
+    """Test that the frame timer records the duration of its block"""
+    governor = FrameGovernor(budget=0.001, smoothing=1.0)
+    with governor.frame():
+        time.sleep(0.005)
+    assert governor.frames == 1
+    assert governor.frames_over_budget == 1
+    assert governor.load > 1.0
+
+def test_pipeline_sheds_visualization_under_load():
+    """Test that the pipeline drops the debug view but still analyzes every frame"""
+    seen = []
+    source = SyntheticSource(320, 240, fps=30, num_frames=30, motion_frames=(10,))
+    capture = VideoCaptureModule(source=source)
+    response = ResponseDetectionModule(movement_threshold=100, visualize=True)
+    governor = FrameGovernor(budget=1e-6)
+    pipeline = DetectionPipeline(capture, response, seen.append, governor=governor)
+    assert pipeline.start()
+    assert pipeline.join(timeout=5.0)
+    capture.stop()
+
+    assert len(seen) == 30
+    assert seen[0].motion_frame is not None
+    assert seen[-1].motion_frame is None
+    assert any(r.movement_detected for r in seen)
+    assert governor.get_stats()["shed"] > 0
+
+def test_pipeline_sets_budget_from_source_rate():
+    """Test that an unset budget becomes the source frame interval"""
+    capture = VideoCaptureModule(source=SyntheticSource(64, 48, fps=50, num_frames=3))
+    governor = FrameGovernor()
+    pipeline = DetectionPipeline(capture, ResponseDetectionModule(visualize=False),
+                                 governor=governor)
+    assert pipeline.start()
+    pipeline.stop()
+    capture.stop()
+    assert governor.budget == 1 / 50
@@ -0,0 +1,96 @@
+import pytest
+import cv2
+import time
+import numpy as np
+from src.python.frame_sources import (FrameSource, RawFrameFileSource, SyntheticSource,
+                                      VideoFileSource, write_raw_frames)
+
+def test_synthetic_source_is_deterministic():
+    """Test that two synthetic sources with the same seed match frame for frame"""
+    first = SyntheticSource(width=80, height=60, num_frames=5, noise_level=3.0, seed=7)
+    second = SyntheticSource(width=80, height=60, num_frames=5, noise_level=3.0, seed=7)
+    assert first.open() and second.open()
+
+    for _ in range(5):
+        _, a, _ = first.read()
+        _, b, _ = second.read()
+        assert np.array_equal(a, b)
+
+    success, frame, _ = first.read()
+    assert not success
+    assert first.exhausted
+
+def test_synthetic_motion_at_known_frames():
+    """Test that frames only change at the injected motion indices"""
+    source = SyntheticSource(width=80, height=60, num_frames=10, motion_frames=[4, 7])
+    assert source.open()
+    frames = [source.read()[1] for _ in range(10)]
+
+    changed = [i for i in range(1, 10) if not np.array_equal(frames[i - 1], frames[i])]
+    assert changed == [4, 7]
+
+def test_virtual_timeline_when_unpaced():
+    """Test that unpaced sources stamp frames at exact nominal intervals"""
+    source = SyntheticSource(width=32, height=24, fps=100.0, start_time=5.0)
+    assert source.open()
+    timestamps = [source.read()[2] for _ in range(4)]
+    assert timestamps == pytest.approx([5.0, 5.01, 5.02, 5.03])
+
+def test_paced_source_respects_target_fps():
+    """Test that a paced source does not deliver faster than target_fps"""
+    source = SyntheticSource(width=32, height=24, target_fps=200.0)
+    assert source.open()
+    start = time.perf_counter()
+    for _ in range(11):
+        source.read()
+    assert time.perf_counter() - start >= 0.045
+
+def test_raw_frame_file_round_trip(tmp_path):
+    """Test replaying frames from a memory-mapped raw file"""
+    frames = [np.full((24, 32, 3), i, dtype=np.uint8) for i in range(3)]
+    path = str(tmp_path / "frames.raw")
+    assert write_raw_frames(path, frames) == 3
+
+    source = RawFrameFileSource(path, width=32, height=24)
+    assert source.open()
+    for expected in frames:
+        success, frame, _ = source.read()
+        assert success
+        assert np.array_equal(frame, expected)
+    assert not source.read()[0]
+
+def test_missing_video_file():
+    """Test that a missing video file fails to open"""
+    source = VideoFileSource("does_not_exist.avi")
+    assert not source.open()
+
+def test_video_file_source(tmp_path):
+    """Test reading back a recorded video file"""
+    path = str(tmp_path / "session.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (32, 24))
+    if not writer.isOpened():
+        pytest.skip("No video encoder available")
+    for i in range(4):
+        writer.write(np.full((24, 32, 3), 60 * i, dtype=np.uint8))
+    writer.release()
+
+    source = VideoFileSource(path, start_time=0.0)
+    assert source.open()
+    timestamps = []
+    while True:
+        success, frame, timestamp = source.read()
+        if not success:
+            break
+        assert frame.shape == (24, 32, 3)
+        timestamps.append(timestamp)
+    assert timestamps == pytest.approx([0.0, 0.04, 0.08, 0.12])
+    assert source.exhausted
+
+def test_incomplete_source_cannot_be_instantiated():
+    """Test that a source missing the read hook fails at construction"""
+    class OpenOnly(FrameSource):
+        def _open(self):
+            return True
+
+    with pytest.raises(TypeError):
+        OpenOnly()
@@ -0,0 +1,78 @@
+import json
+import time
+import numpy as np
+import pytest
+from src.python.metrics import LatencyHistogram, MetricsRegistry
+from src.python.frame_sources import SyntheticSource
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.stimuli_display import StimuliDisplayModule
+
+def test_histogram_quantiles_within_bucket_error():
+    """Test histogram quantiles stay within the 25% bucket resolution"""
+    values = np.random.default_rng(0).lognormal(13, 1, 5000).astype(np.int64)
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record_ns(int(value))
+
+    assert histogram.count == len(values)
+    assert histogram.max_ns == values.max()
+    for q in (0.5, 0.9, 0.99):
+        exact = np.quantile(values, q)
+        assert histogram.quantile_ns(q) == pytest.approx(exact, rel=0.25)
+
+def test_histogram_small_and_empty():
+    """Test tiny durations and empty histograms are handled"""
+    histogram = LatencyHistogram()
+    assert histogram.summary()["p50_ms"] is None
+    for value in (0, 1, 2, 3):
+        histogram.record_ns(value)
+    assert histogram.quantile_ns(1.0) <= 3
+
+def test_modules_report_stages_and_counters():
+    """Test instrumented modules fill the snapshot"""
+    metrics = MetricsRegistry()
+    capture = VideoCaptureModule(source=SyntheticSource(160, 120, num_frames=20,
+                                                        motion_frames=(10,)),
+                                 metrics=metrics)
+    response = ResponseDetectionModule(movement_threshold=100, visualize=False,
+                                       metrics=metrics)
+    stimuli = StimuliDisplayModule((160, 120), metrics=metrics)
+    stimuli.activate_random_stimulus()
+
+    assert capture.start()
+    while True:
+        success, frame, timestamp = capture.get_timestamped_frame()
+        if not success:
+            break
+        response.detect_movement(frame, timestamp)
+        stimuli.overlay_stimulus(frame)
+    capture.stop()
+
+    snapshot = metrics.snapshot()
+    stages = snapshot["stages"]
+    assert stages["capture.read"]["count"] == 21
+    assert stages["detect.preprocess"]["count"] == 19
+    assert stages["detect.difference"]["count"] == 19
+    assert stages["detect.contours"]["count"] == 0
+    assert stages["display.overlay"]["count"] == 20
+
+    counters = snapshot["counters"]
+    assert counters["capture.captured"] == 20
+    assert counters["detect.processed"] == 19
+    assert counters["detect.triggered"] >= 1
+    assert counters["display.stimuli"] == 1
+
+def test_periodic_dump_writes_json_lines(tmp_path):
+    """Test the periodic dump appends snapshots to a file"""
+    metrics = MetricsRegistry()
+    with metrics.timer("stage"):
+        pass
+    path = str(tmp_path / "metrics.jsonl")
+    metrics.start_periodic_dump(0.02, path)
+    time.sleep(0.1)
+    metrics.stop_periodic_dump()
+
+    lines = open(path).read().splitlines()
+    assert len(lines) >= 2
+    assert json.loads(lines[-1])["stages"]["stage"]["count"] == 1
@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+from src.python.motion_detectors import (MotionDetector, AccumulatedDifferenceDetector,
+                                         FrameDifferenceDetector,
+                                         RunningAverageDetector)
+from src.python.response_detection import ResponseDetectionModule
+from src.python.frame_sources import SyntheticSource
+
+def _feed(detector, value: int) -> bool:
+    detector.input_buffer()[:] = value
+    return detector.update()
+
+def test_frame_difference():
+    """Test differencing of the two most recent frames"""
+    detector = FrameDifferenceDetector((4, 4))
+    assert not _feed(detector, 10)
+    assert _feed(detector, 30)
+    assert int(detector.diff[0, 0]) == 20
+
+def test_running_average_background():
+    """Test that the background converges towards a static scene"""
+    detector = RunningAverageDetector((4, 4), alpha=0.5)
+    assert not _feed(detector, 100)
+    assert _feed(detector, 140)
+    assert int(detector.diff[0, 0]) == 40
+    for _ in range(20):
+        _feed(detector, 140)
+    assert int(detector.diff[0, 0]) == 0
+
+def test_running_average_leaves_no_ghost():
+    """Test that a target that moved and stopped stops triggering once it settles"""
+    motion_frames = [20, 100]
+    source = SyntheticSource(320, 240, num_frames=180, motion_frames=motion_frames,
+                             motion_duration=15, motion_step=2, noise_level=4.0)
+    source.open()
+    module = ResponseDetectionModule(movement_threshold=250, visualize=False,
+                                     detector='running_average', pyramid_level=0)
+    triggers = []
+    for index in range(180):
+        _, frame, _ = source.read()
+        if module.detect_movement(frame, float(index))[0]:
+            triggers.append(index)
+
+    # Movement may linger for one buffer length after it stops
+    in_motion = {i for onset in motion_frames
+                 for i in range(onset, onset + 15 + module.frame_buffer_size)}
+    assert all(any(t in triggers for t in range(onset, onset + 15)) for onset in motion_frames)
+    assert [t for t in triggers if t not in in_motion] == []
+
+def test_accumulated_difference_window():
+    """Test that slow changes add up across the window and then expire"""
+    detector = AccumulatedDifferenceDetector((4, 4), frame_buffer_size=4)
+    values = [0, 10, 20, 30]
+    for value in values:
+        _feed(detector, value)
+    # Three steps of 10 inside the window
+    assert int(detector.diff[0, 0]) == 30
+
+    for _ in range(3):
+        _feed(detector, 30)
+    assert int(detector.diff[0, 0]) == 0
+
+def test_accumulated_detects_slow_motion():
+    """Test that sub-threshold per-frame changes still trigger when accumulated"""
+    frames = [np.full((60, 80, 3), 50 + 12 * i, dtype=np.uint8) for i in range(4)]
+    single = ResponseDetectionModule(movement_threshold=100, visualize=False)
+    accumulated = ResponseDetectionModule(movement_threshold=100, visualize=False,
+                                          detector='accumulated', frame_buffer_size=4)
+    single_hits = [single.detect_movement(f, 0.0)[0] for f in frames]
+    accumulated_hits = [accumulated.detect_movement(f, 0.0)[0] for f in frames]
+    assert not any(single_hits)
+    assert accumulated_hits[-1]
+
+def test_unknown_detector():
+    """Test that an unknown strategy name is rejected"""
+    with pytest.raises(ValueError):
+        ResponseDetectionModule(detector='optical_flow')
+
+def test_incomplete_detector_cannot_be_instantiated():
+    """Test that a strategy missing update() fails at construction"""
+    class NoUpdate(MotionDetector):
+        pass
+
+    with pytest.raises(TypeError):
+        NoUpdate((48, 64))
@@ -0,0 +1,79 @@
+import functools
+import time
+import numpy as np
+from src.python.frame_sources import SyntheticSource
+from src.python.multi_camera import (CameraSpec, MultiCameraCoordinator, SharedFrameSlots,
+                                     camera_spec)
+
+def _spec(motion_frames, num_frames=60, shape=(120, 160, 3)):
+    factory = functools.partial(SyntheticSource, 160, 120, fps=30, num_frames=num_frames,
+                                motion_frames=motion_frames, start_time=0.0)
+    return CameraSpec(factory, shape, {"movement_threshold": 100})
+
+def _run_until_done(coordinator, timeout=10.0):
+    events = []
+    deadline = time.perf_counter() + timeout
+    while coordinator.is_running and time.perf_counter() < deadline:
+        events.extend(coordinator.poll_events(timeout=0.05))
+    events.extend(coordinator.poll_events())
+    return events
+
+def test_shared_slots_round_trip():
+    """Test frames written to the shared slots read back intact"""
+    ring = SharedFrameSlots.create(3, (4, 5, 3))
+    try:
+        out = np.empty((4, 5, 3), np.uint8)
+        assert not ring.read_latest(out)[0]
+        for value in range(5):
+            ring.write(np.full((4, 5, 3), value, np.uint8), value / 10, value * 2.0, value == 3)
+        success, number, timestamp, score = ring.read_latest(out)
+        assert success and number == 5
+        assert timestamp == 0.4 and score == 8.0
+        assert np.all(out == 4)
+        assert ring.frames_triggered == 1
+
+        # Frames of another size are resized into the slot
+        ring.write(np.full((8, 10, 3), 7, np.uint8), 0.5, 0.0, False)
+        assert ring.read_latest(out)[0] and np.all(out == 7)
+    finally:
+        shm = ring.shm
+        ring.close()
+        shm.unlink()
+
+def test_events_merged_in_timestamp_order():
+    """Test motion events from all workers arrive in one time-ordered stream"""
+    coordinator = MultiCameraCoordinator([_spec((30,)), _spec((10,)), _spec((20, 40))])
+    assert coordinator.start()
+    try:
+        events = _run_until_done(coordinator)
+        stats = coordinator.get_stats()
+    finally:
+        coordinator.stop()
+
+    assert [s["frames"] for s in stats] == [60, 60, 60]
+    timestamps = [e.timestamp for e in events]
+    assert timestamps == sorted(timestamps)
+    first = {}
+    for e in events:
+        first.setdefault(e.camera, e.timestamp)
+    assert first[1] < first[2] < first[0]
+    assert sum(s["triggered"] for s in stats) == len(events)
+
+def test_latest_frame_from_worker():
+    """Test the coordinator reads a worker's newest frame from shared memory"""
+    coordinator = MultiCameraCoordinator([_spec((), num_frames=5, shape=(60, 80, 3))])
+    assert coordinator.start()
+    try:
+        _run_until_done(coordinator)
+        success, frame, timestamp = coordinator.get_latest_frame(0)
+    finally:
+        coordinator.stop()
+    assert success
+    assert frame.shape == (60, 80, 3)
+    assert timestamp == 4 / 30
+
+def test_camera_spec_negotiation_is_opt_in():
+    """Test webcam workers only probe camera modes when asked to"""
+    assert camera_spec(0).source_factory.keywords == {"negotiate": False}
+    assert camera_spec(1, negotiate=True, movement_threshold=500).source_factory.keywords == {
+        "negotiate": True}
@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+from src.python.onset_estimation import MotionTimeSeries, estimate_onset
+
+def test_linear_interpolation_of_crossing():
+    """Test interpolating the threshold crossing between two frames"""
+    timestamps = np.array([0.0, 0.1, 0.2])
+    scores = np.array([0.0, 0.0, 400.0])
+    assert estimate_onset(timestamps, scores, 100.0) == pytest.approx(0.125)
+
+def test_fit_over_rising_edge():
+    """Test that a linear ramp sampled at 10 Hz recovers its crossing time"""
+    timestamps = np.arange(0.0, 1.0, 0.1)
+    scores = np.clip((timestamps - 0.33) * 1000.0, 0.0, None)
+    # The ramp reaches 150 at t = 0.48
+    assert estimate_onset(timestamps, scores, 150.0) == pytest.approx(0.48)
+
+def test_subframe_onset_error_is_bounded():
+    """Test the estimate of a noisy ramp starting anywhere within a frame stays
+    close to its true crossing and well ahead of whole-frame resolution"""
+    rng = np.random.default_rng(0)
+    frame_interval = 1 / 30
+    timestamps = np.arange(30) * frame_interval
+    errors, frame_errors = [], []
+    for fraction in np.linspace(0.0, 1.0, 50, endpoint=False):
+        # Motion starts inside frame 10 and the score rises over two frames
+        start = (10 + fraction) * frame_interval
+        rise = 2 * frame_interval
+        scores = np.clip((timestamps - start) / rise, 0.0, 1.0) * 1000.0
+        scores += rng.normal(0.0, 20.0, timestamps.size)
+        crossing = start + rise * 0.3
+        errors.append(estimate_onset(timestamps, scores, 300.0) - crossing)
+        frame_errors.append(timestamps[np.argmax(scores > 300.0)] - crossing)
+    errors = np.abs(errors) * 1000
+    frame_errors = np.abs(frame_errors) * 1000
+    assert errors.max() < 10.0
+    assert errors.mean() < frame_errors.mean() / 4
+
+def test_onset_respects_start_time():
+    """Test that crossings before the window are ignored and onsets clamped"""
+    timestamps = np.array([0.0, 0.1, 0.2, 0.3])
+    scores = np.array([500.0, 0.0, 0.0, 500.0])
+    assert estimate_onset(timestamps, scores, 100.0, start_time=0.05) == pytest.approx(0.22)
+    assert estimate_onset(timestamps, scores, 100.0, start_time=0.29) == pytest.approx(0.29)
+    assert estimate_onset(timestamps, np.zeros(4), 100.0) is None
+
+def test_time_series_ring_order():
+    """Test that samples come back oldest first after wrapping"""
+    series = MotionTimeSeries(capacity=3)
+    for i in range(5):
+        series.append(float(i), float(10 * i))
+    timestamps, scores = series.arrays()
+    assert list(timestamps) == [2.0, 3.0, 4.0]
+    assert list(scores) == [20.0, 30.0, 40.0]
+    assert len(series) == 3
@@ -0,0 +1,67 @@
+import time
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.frame_sources import SyntheticSource
+from src.python.pipeline import DetectionPipeline
+
+def _make_pipeline(num_frames, target_fps=None, motion_frames=(), on_frame=None):
+    source = SyntheticSource(320, 240, fps=30, num_frames=num_frames,
+                             motion_frames=motion_frames, target_fps=target_fps)
+    capture = VideoCaptureModule(source=source)
+    response = ResponseDetectionModule(movement_threshold=100, visualize=False)
+    return DetectionPipeline(capture, response, on_frame), capture
+
+def test_pipeline_runs_every_frame_through_callback():
+    """Test the detection thread analyzes every frame until the source ends"""
+    seen = []
+    pipeline, capture = _make_pipeline(30, motion_frames=(10,), on_frame=seen.append)
+    assert pipeline.start()
+    assert pipeline.join(timeout=5.0)
+
+    assert not pipeline.is_running
+    assert [r.sequence for r in seen] == list(range(1, 31))
+    assert any(r.movement_detected for r in seen)
+    assert pipeline.get_stats()["processed"] == 30
+    capture.stop()
+
+def test_slow_consumer_gets_latest_result():
+    """Test a display slower than capture only sees the newest results"""
+    pipeline, capture = _make_pipeline(None, target_fps=200)
+    assert pipeline.start()
+
+    first = pipeline.wait_for_result(timeout=1.0)
+    assert first is not None
+    time.sleep(0.1)
+    second = pipeline.wait_for_result(timeout=1.0)
+    pipeline.stop()
+    capture.stop()
+
+    assert second is not None
+    assert second.sequence > first.sequence + 1
+    assert second.timestamp > first.timestamp
+    assert pipeline.get_stats()["skipped"] == second.sequence - first.sequence - 1
+
+def test_result_taken_only_once():
+    """Test get_latest_result does not return the same result twice"""
+    pipeline, capture = _make_pipeline(3)
+    assert pipeline.start()
+    assert pipeline.join(timeout=5.0)
+
+    assert pipeline.get_latest_result().sequence == 3
+    assert pipeline.get_latest_result() is None
+    assert pipeline.wait_for_result(timeout=0.01) is None
+    capture.stop()
+
+def test_threaded_pipeline_never_sees_stale_frames():
+    """Test the detection thread waits for new frames instead of re-reading the last one"""
+    source = SyntheticSource(320, 240, fps=30, num_frames=20, target_fps=100)
+    capture = VideoCaptureModule(source=source, threaded=True)
+    response = ResponseDetectionModule(movement_threshold=100, visualize=False)
+    seen = []
+    pipeline = DetectionPipeline(capture, response, seen.append)
+    assert pipeline.start()
+    assert pipeline.join(timeout=5.0)
+    capture.stop()
+
+    assert capture.get_capture_stats()["stale"] == 0
+    assert len(seen) == len({r.timestamp for r in seen}) > 0
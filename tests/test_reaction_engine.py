@@ -0,0 +1,68 @@
+import pytest
+from src.python.frame_sources import SyntheticSource
+from src.python.response_detection import ResponseDetectionModule
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.adaptive_threshold import AdaptiveThreshold
+from src.python.reaction_engine import (ReactionTestEngine, STATE_WAITING, STATE_FINISHED,
+                                        TRIAL_STIMULUS_ON, TRIAL_RESPONSE, TRIAL_TIMEOUT)
+
+def _run(num_frames, motion_frames):
+    schedule = StimulusSchedule(num_trials=2, min_delay=0.5, max_delay=0.5, seed=1)
+    engine = ReactionTestEngine(StimuliDisplayModule(schedule=schedule),
+                                ResponseDetectionModule(movement_threshold=100,
+                                                        visualize=False))
+    source = SyntheticSource(320, 240, fps=30, num_frames=num_frames,
+                             motion_frames=motion_frames, start_time=0.0)
+    source.open()
+    events = []
+    while True:
+        ret, frame, timestamp = source.read()
+        if not ret:
+            break
+        events.extend(engine.process_frame(frame, timestamp))
+    return engine, events
+
+def test_engine_emits_trial_events_headless():
+    """Test a replayed session produces onset, response and timeout events"""
+    engine, events = _run(120, motion_frames=(24,))
+
+    assert [e.kind for e in events] == [TRIAL_STIMULUS_ON, TRIAL_RESPONSE,
+                                        TRIAL_STIMULUS_ON, TRIAL_TIMEOUT]
+    assert [e.trial for e in events] == [0, 0, 1, 1]
+
+    # The first delay counts from the first frame, later ones from the last offset
+    assert abs(events[0].timestamp - 0.5) < 1 / 30
+    # Whole-frame onsets: motion 9 frames after the onset frame
+    assert events[1].reaction_time == pytest.approx(300.0)
+    assert abs(events[2].timestamp - (events[1].timestamp + 0.5)) < 1 / 30
+    assert events[3].timestamp - events[2].timestamp > 2.0
+    assert events[3].reaction_time is None
+
+    assert engine.statistics.count == 1
+    assert engine.state == STATE_FINISHED
+
+def test_engine_callback_and_sensitivity():
+    """Test events reach the callback and sensitivity scales the threshold"""
+    received = []
+    engine = ReactionTestEngine(on_event=received.append)
+    assert engine.adjust_sensitivity(0.5) == 500
+
+    engine.step(10.0, False)
+    engine.step(12.0, False)
+    engine.step(14.5, False)
+    assert received and received[0].kind == TRIAL_STIMULUS_ON
+
+    engine.reset()
+    assert engine.state == STATE_WAITING
+    assert not engine.stimuli.is_stimulus_active
+
+def test_adjust_sensitivity_scales_auto_threshold_multiplier():
+    """Test that sensitivity keys scale the multiplier when the threshold is automatic"""
+    auto = AdaptiveThreshold(multiplier=3.0, quantile=0.5, warmup=1, min_threshold=0.0)
+    response = ResponseDetectionModule(visualize=False, auto_threshold=auto)
+    engine = ReactionTestEngine(StimuliDisplayModule(), response)
+    auto.update(100.0)
+
+    assert engine.adjust_sensitivity(0.5) == pytest.approx(150.0)
+    assert auto.multiplier == pytest.approx(1.5)
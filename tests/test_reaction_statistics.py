@@ -0,0 +1,57 @@
+import pytest
+import numpy as np
+from src.python.reaction_statistics import P2Quantile, StreamingStatistics
+
+def test_welford_matches_numpy():
+    """Test that the running mean and variance match a batch computation"""
+    rng = np.random.default_rng(0)
+    values = rng.normal(300.0, 50.0, 5000)
+    stats = StreamingStatistics(anticipation_ms=None, lapse_ms=None)
+    for value in values:
+        stats.add(value)
+
+    summary = stats.summary()
+    assert summary["count"] == 5000
+    assert summary["average"] == pytest.approx(values.mean())
+    assert summary["variance"] == pytest.approx(values.var(ddof=1))
+    assert summary["min"] == values.min()
+    assert summary["max"] == values.max()
+
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+def test_p2_quantile_accuracy(q):
+    """Test that P-square estimates land close to the exact quantile"""
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(5.6, 0.3, 20000)
+    estimator = P2Quantile(q)
+    for value in values:
+        estimator.add(value)
+    assert estimator.value() == pytest.approx(np.quantile(values, q), rel=0.02)
+
+def test_p2_exact_for_few_values():
+    """Test the exact fallback before five observations"""
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+    for value in (300.0, 100.0, 200.0):
+        estimator.add(value)
+    assert estimator.value() == 200.0
+
+def test_anticipations_and_lapses_rejected():
+    """Test that out-of-range reaction times are counted but not summarized"""
+    stats = StreamingStatistics()
+    for value in (50.0, 250.0, 350.0, 1500.0):
+        stats.add(value)
+
+    summary = stats.summary()
+    assert summary["count"] == 2
+    assert summary["average"] == 300.0
+    assert summary["anticipations"] == 1
+    assert summary["lapses"] == 1
+    assert summary["p50"] == 300.0
+
+def test_empty_summary():
+    """Test the summary before any value"""
+    summary = StreamingStatistics().summary()
+    assert summary["count"] == 0
+    assert summary["average"] is None
+    assert summary["std"] is None
+    assert summary["p90"] is None
@@ -0,0 +1,109 @@
+import pytest
+import tracemalloc
+import numpy as np
+from src.python.response_detection import ResponseDetectionModule
+
+def _frame(value: int = 0) -> np.ndarray:
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+def _moving_frame() -> np.ndarray:
+    frame = _frame()
+    frame[30:90, 40:120] = 255
+    return frame
+
+def test_reaction_time_uses_capture_timestamps():
+    """Test that reaction time is measured between onset and frame capture time"""
+    detector = ResponseDetectionModule(movement_threshold=100, subframe_onset=False)
+    detector.detect_movement(_frame(), timestamp=10.0)
+    detector.start_response_window(onset_time=10.05)
+
+    detector.detect_movement(_frame(), timestamp=10.1)
+    movement_detected, _ = detector.detect_movement(_moving_frame(), timestamp=10.3)
+    assert movement_detected
+
+    reaction_time = detector.stop_response_window()
+    assert reaction_time == pytest.approx(250.0)
+
+def test_no_response_before_onset():
+    """Test that movement captured before the stimulus onset is ignored"""
+    detector = ResponseDetectionModule(movement_threshold=100)
+    detector.detect_movement(_frame(), timestamp=1.0)
+    detector.detect_movement(_moving_frame(), timestamp=1.1)
+    detector.start_response_window(onset_time=1.2)
+
+    assert detector.stop_response_window() is None
+
+def test_headless_detection_matches_visual_score():
+    """Test that headless mode reports the same score without a visualization"""
+    visual = ResponseDetectionModule(movement_threshold=100)
+    headless = ResponseDetectionModule(movement_threshold=100, visualize=False)
+
+    for frame in (_frame(), _moving_frame()):
+        visual_detected, motion_vis = visual.detect_movement(frame, timestamp=0.0)
+        headless_detected, no_vis = headless.detect_movement(frame, timestamp=0.0)
+
+    assert motion_vis is not None and motion_vis.shape == (120, 160, 3)
+    assert no_vis is None
+    assert visual_detected and headless_detected
+    assert headless.last_motion_score == visual.last_motion_score > 0
+
+def test_roi_ignores_motion_outside_regions():
+    """Test that only movement inside the configured regions is scored"""
+    detector = ResponseDetectionModule(movement_threshold=100, visualize=False,
+                                       rois=[(0, 0, 30, 30)])
+    detector.detect_movement(_frame(), timestamp=0.0)
+    movement_detected, _ = detector.detect_movement(_moving_frame(), timestamp=0.1)
+    assert not movement_detected
+    assert detector.last_motion_score == 0
+
+def test_pyramid_score_in_full_resolution_units():
+    """Test that downscaled detection reports roughly the full-resolution area"""
+    full = ResponseDetectionModule(visualize=False)
+    reduced = ResponseDetectionModule(visualize=False, pyramid_level=1)
+    for frame in (_frame(), _moving_frame()):
+        full.detect_movement(frame, timestamp=0.0)
+        reduced.detect_movement(frame, timestamp=0.0)
+
+    assert reduced.last_motion_score == pytest.approx(full.last_motion_score, rel=0.25)
+
+def test_steady_state_detection_does_not_allocate_frames():
+    """Test that headless detection reuses its preallocated buffers"""
+    detector = ResponseDetectionModule(visualize=False, pyramid_level=1)
+    frames = [_frame(), _moving_frame()]
+    for i in range(4):
+        detector.detect_movement(frames[i % 2], timestamp=float(i))
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(20):
+            detector.detect_movement(frames[i % 2], timestamp=float(i))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Far less than a single 160x120 grayscale image
+    assert peak - baseline < 2000
+
+def test_subframe_onset_interpolates_between_frames():
+    """Test that the reported onset falls between the bracketing frames"""
+    detector = ResponseDetectionModule(movement_threshold=100, visualize=False,
+                                       subframe_onset=True)
+    detector.detect_movement(_frame(), timestamp=10.0)
+    detector.start_response_window(onset_time=10.0)
+    detector.detect_movement(_frame(), timestamp=10.1)
+    detector.detect_movement(_moving_frame(), timestamp=10.2)
+
+    reaction_time = detector.stop_response_window()
+    assert 100.0 < reaction_time < 200.0
+
+def test_latency_correction_subtracted_and_clamped():
+    """Test the calibrated latency is subtracted without going below zero"""
+    for correction, expected in ((30.0, 220.0), (400.0, 0.0)):
+        detector = ResponseDetectionModule(movement_threshold=100, subframe_onset=False,
+                                           latency_correction_ms=correction)
+        detector.detect_movement(_frame(), timestamp=10.0)
+        detector.start_response_window(onset_time=10.05)
+        detector.detect_movement(_moving_frame(), timestamp=10.3)
+        assert detector.stop_response_window() == pytest.approx(expected)
@@ -0,0 +1,87 @@
+import time
+import numpy as np
+import pytest
+from src.python.frame_sources import SyntheticSource
+from src.python.session_recorder import SessionRecorder, SessionReader, INDEX_DTYPE
+
+def _record(path, encoding, num_frames=40, queue_size=64):
+    source = SyntheticSource(160, 120, fps=30, num_frames=num_frames, motion_frames=(10,),
+                             start_time=0.0)
+    source.open()
+    recorder = SessionRecorder(path, encoding, queue_size=queue_size)
+    recorder.start()
+    frames = []
+    while True:
+        ret, frame, timestamp = source.read()
+        if not ret:
+            break
+        stimulus = 0 if 10 <= source.frame_index <= 20 else -1
+        recorder.record(frame, timestamp, float(source.frame_index), stimulus)
+        frames.append(frame)
+    recorder.stop()
+    return recorder, frames
+
+def test_index_is_fixed_width():
+    """Test the index records have a fixed little-endian layout"""
+    assert INDEX_DTYPE.itemsize == 40
+
+def test_raw_recording_round_trip(tmp_path):
+    """Test raw frames and index records read back exactly"""
+    path = str(tmp_path / "session")
+    recorder, frames = _record(path, 'raw')
+    assert recorder.frames_written == len(frames)
+
+    reader = SessionReader(path)
+    assert len(reader) == len(frames)
+    assert (tmp_path / "session.index").stat().st_size == len(frames) * INDEX_DTYPE.itemsize
+
+    frame, record = reader.read_frame(25)
+    assert np.array_equal(frame, frames[25])
+    assert record['frame'] == 25
+    assert record['timestamp'] == pytest.approx(25 / 30)
+
+def test_seek_to_trial_and_timestamp(tmp_path):
+    """Test a reader can jump to a trial or a capture time"""
+    path = str(tmp_path / "session")
+    _, frames = _record(path, 'jpg')
+    reader = SessionReader(path)
+
+    assert list(reader.trials()) == [0]
+    positions = reader.trial_frames(0)
+    assert positions[0] == 9 and positions[-1] == 19
+    assert reader.find_timestamp(0.5) == 15
+
+    frame, _ = reader.read_frame(int(positions[0]))
+    assert frame.shape == frames[0].shape
+    assert np.abs(frame.astype(int) - frames[9]).mean() < 3
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """Test a saturated writer drops frames and the index shows the gaps"""
+    path = str(tmp_path / "session")
+    recorder, frames = _record(path, 'png', num_frames=200, queue_size=1)
+    assert recorder.frames_dropped > 0
+    assert recorder.frames_written + recorder.frames_dropped == len(frames)
+
+    reader = SessionReader(path)
+    assert len(reader) == recorder.frames_written
+    assert np.all(np.diff(reader.index['frame']) >= 1)
+
+def test_unfinished_session_can_be_opened(tmp_path):
+    """Test the metadata exists from start() on and a session without stop() reads back"""
+    path = str(tmp_path / "session")
+    recorder = SessionRecorder(path)
+    recorder.start()
+    assert SessionReader(path).complete is False
+
+    frame = np.full((120, 160, 3), 7, np.uint8)
+    for i in range(10):
+        recorder.record(frame, i / 30)
+    deadline = time.perf_counter() + 2.0
+    while len(SessionReader(path)) < 10 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    reader = SessionReader(path)
+    assert len(reader) == 10
+    assert np.array_equal(reader.read_frame(9)[0], frame)
+    recorder.stop()
+    assert SessionReader(path).complete
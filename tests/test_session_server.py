@@ -0,0 +1,112 @@
+import asyncio
+import json
+import sys
+import threading
+import pytest
+from src.python.frame_sources import SyntheticSource
+from src.python.video_capture import VideoCaptureModule
+from src.python.response_detection import ResponseDetectionModule
+from src.python.stimuli_display import StimuliDisplayModule
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.reaction_engine import ReactionTestEngine
+from src.python.session_server import SessionServer
+
+def _server(**kwargs):
+    source = SyntheticSource(320, 240, fps=30, num_frames=150, motion_frames=(24, 60),
+                             start_time=0.0)
+    schedule = StimulusSchedule(num_trials=2, min_delay=0.5, max_delay=0.5, seed=1)
+    engine = ReactionTestEngine(StimuliDisplayModule(schedule=schedule),
+                                ResponseDetectionModule(movement_threshold=100,
+                                                        visualize=False))
+    return SessionServer(VideoCaptureModule(source=source), engine, port=0, **kwargs)
+
+async def _read_messages(reader):
+    messages = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            return messages
+        messages.append(json.loads(line))
+
+async def _run_with_client(server, connect):
+    await server.start()
+    reader, writer = await connect(server.address)
+    client = asyncio.ensure_future(_read_messages(reader))
+    # Let the connection be accepted before the session starts
+    while not server.get_stats()["subscribers"]:
+        await asyncio.sleep(0.01)
+    summary = await server.run()
+    await server.close()
+    messages = await asyncio.wait_for(client, 5.0)
+    writer.close()
+    return summary, messages
+
+def test_session_streams_trial_events_over_tcp():
+    """Test that a subscriber receives trial events, statistics and the final summary"""
+    server = _server(stats_interval=0.0)
+    summary, messages = asyncio.run(_run_with_client(
+        server, lambda address: asyncio.open_connection(*address)))
+
+    types = [m["type"] for m in messages]
+    assert types[0] == "hello" and types[-1] == "end"
+    assert "stats" in types
+    trials = [m for m in messages if m["type"] == "trial"]
+    assert [(m["kind"], m["trial"]) for m in trials] == [
+        ("stimulus_on", 0), ("response", 0), ("stimulus_on", 1), ("response", 1)]
+    assert all(m["reaction_time"] > 0 for m in trials if m["kind"] == "response")
+    assert messages[-1]["statistics"]["count"] == summary["count"] == 2
+    assert server.get_stats()["dropped"] == 0
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets only")
+def test_session_serves_unix_socket(tmp_path):
+    """Test that the session can be served on a Unix socket, which is removed afterwards"""
+    path = str(tmp_path / "session.sock")
+    server = _server(unix_path=path)
+    summary, messages = asyncio.run(_run_with_client(server, asyncio.open_unix_connection))
+
+    assert sum(m["type"] == "trial" for m in messages) == 4
+    assert summary["count"] == 2
+    assert not (tmp_path / "session.sock").exists()
+
+def test_slow_subscriber_drops_oldest_messages():
+    """Test that publishing never waits on a subscriber and reports what was dropped"""
+    async def scenario():
+        server = _server(queue_size=2)
+        await server.start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        while not server.get_stats()["subscribers"]:
+            await asyncio.sleep(0.01)
+
+        # Published without yielding, so the subscriber cannot keep up
+        for i in range(10):
+            server.publish({"type": "test", "index": i})
+        assert server.get_stats()["dropped"] == 8
+
+        await server.close()
+        messages = await _read_messages(reader)
+        writer.close()
+        return messages
+
+    messages = asyncio.run(scenario())
+    assert messages[0]["type"] == "hello"
+    assert messages[1] == {"type": "dropped", "count": 8}
+    assert [m["index"] for m in messages[2:]] == [8, 9]
+
+def test_display_drawn_on_event_loop_thread(monkeypatch):
+    """Test that the window is drawn by the loop's thread, not the frame executor"""
+    server = _server(display=True)
+    drawn = []
+    monkeypatch.setattr(server, "_show", lambda frame: drawn.append(
+        (threading.get_ident(), frame.shape)))
+    monkeypatch.setattr("cv2.destroyAllWindows", lambda: None)
+
+    async def session():
+        summary = await server.run(max_frames=20)
+        await server.close()
+        return summary
+    asyncio.run(session())
+
+    assert server.frames_processed == 20
+    assert len(drawn) == 20
+    assert {thread for thread, _ in drawn} == {threading.get_ident()}
+    assert drawn[0][1] == (240, 320, 3)
@@ -0,0 +1,58 @@
+import pytest
+import cv2
+import numpy as np
+from src.python.stimuli_display import StimuliDisplayModule
+
+def _reference_overlay(stimuli: StimuliDisplayModule, frame: np.ndarray) -> np.ndarray:
+    # Full-frame draw and blend, as the overlay was originally implemented
+    overlay = frame.copy()
+    stimulus_func = stimuli.stimulus_types[stimuli.current_stimulus['type']]
+    overlay = stimulus_func(overlay, stimuli.colors[stimuli.current_stimulus['color']])
+    return cv2.addWeighted(overlay, 0.5, frame, 0.5, 0)
+
+@pytest.mark.parametrize("stimulus_type", ["circle", "square", "cross"])
+def test_sprite_overlay_matches_full_frame_blend(stimulus_type):
+    """Test that the cached sprite blend is pixel-identical to a full-frame blend"""
+    stimuli = StimuliDisplayModule()
+    stimuli.activate_random_stimulus(timestamp=0.0)
+    stimuli.current_stimulus = {'type': stimulus_type, 'color': 'yellow'}
+
+    rng = np.random.default_rng(1)
+    frame = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    expected = _reference_overlay(stimuli, frame)
+
+    result = stimuli.overlay_stimulus(frame.copy())
+    assert np.array_equal(result, expected)
+
+def test_overlay_in_place_and_copy():
+    """Test that the caller's frame is copied by default and blended only on request"""
+    stimuli = StimuliDisplayModule(window_size=(160, 120))
+    stimuli.activate_random_stimulus(timestamp=0.0)
+    frame = np.zeros((120, 160, 3), np.uint8)
+
+    copied = stimuli.overlay_stimulus(frame)
+    assert copied is not frame
+    assert not frame.any()
+    assert copied.any()
+
+    result = stimuli.overlay_stimulus(frame, in_place=True)
+    assert result is frame
+    assert np.array_equal(frame, copied)
+    assert len(stimuli._sprite_cache) == 1
+
+def test_inactive_stimulus_leaves_frame_untouched():
+    """Test that nothing is drawn while no stimulus is active"""
+    stimuli = StimuliDisplayModule(window_size=(160, 120))
+    frame = np.zeros((120, 160, 3), np.uint8)
+    assert stimuli.overlay_stimulus(frame) is frame
+    assert not frame.any()
+
+def test_overlay_clipped_to_smaller_frame():
+    """Test that a frame smaller than the window gets the clipped stimulus"""
+    stimuli = StimuliDisplayModule()
+    stimuli.activate_random_stimulus(timestamp=0.0)
+    stimuli.current_stimulus = {'type': 'square', 'color': 'red'}
+
+    frame = np.full((300, 400, 3), 90, np.uint8)
+    expected = _reference_overlay(stimuli, frame)
+    assert np.array_equal(stimuli.overlay_stimulus(frame.copy()), expected)
@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+from src.python.stimulus_schedule import StimulusSchedule
+from src.python.stimuli_display import StimuliDisplayModule
+
+def test_schedule_is_reproducible_from_seed():
+    """Test that equal seeds produce identical trial sequences"""
+    first = StimulusSchedule(num_trials=50, seed=42)
+    second = StimulusSchedule(num_trials=50, seed=42)
+    assert first.trials == second.trials
+    assert StimulusSchedule(num_trials=50, seed=43).trials != first.trials
+
+def test_schedule_delays_within_range():
+    """Test that delays are drawn from the configured interval"""
+    schedule = StimulusSchedule(num_trials=1000, min_delay=2.0, max_delay=4.0, seed=1)
+    delays = np.array([trial.delay for trial in schedule.trials])
+    assert delays.min() >= 2.0 and delays.max() < 4.0
+    assert delays.mean() == pytest.approx(3.0, abs=0.1)
+
+def test_display_follows_schedule():
+    """Test that stimuli appear exactly at the scheduled deadlines"""
+    schedule = StimulusSchedule(num_trials=2, min_delay=1.0, max_delay=2.0, seed=5)
+    stimuli = StimuliDisplayModule(schedule=schedule)
+    stimuli.deactivate_stimulus()
+    stimuli.last_stimulus_time = 100.0
+    first, second = schedule.trials
+
+    assert not stimuli.should_show_stimulus(timestamp=100.0 + first.delay - 0.01)
+    assert stimuli.should_show_stimulus(timestamp=100.0 + first.delay)
+    stimuli.activate_random_stimulus(timestamp=100.0 + first.delay)
+    assert stimuli.current_stimulus == {'type': first.stimulus_type, 'color': first.color}
+    assert not stimuli.should_show_stimulus(timestamp=1000.0)
+
+    stimuli.deactivate_stimulus(timestamp=105.0)
+    assert not stimuli.should_show_stimulus(timestamp=105.0 + second.delay - 0.01)
+    assert stimuli.should_show_stimulus(timestamp=105.0 + second.delay)
+    stimuli.activate_random_stimulus(timestamp=106.0)
+    stimuli.deactivate_stimulus(timestamp=107.0)
+
+    # Exhausted schedule shows nothing further
+    assert not stimuli.should_show_stimulus(timestamp=1e6)
+    assert schedule.onsets[1] == 106.0
+
+def test_export_and_load(tmp_path):
+    """Test exporting a schedule with onsets and loading it back"""
+    schedule = StimulusSchedule(num_trials=3, seed=9)
+    schedule.advance(12.5)
+    path = str(tmp_path / "schedule.json")
+    schedule.export(path)
+
+    loaded = StimulusSchedule.load(path)
+    assert loaded.trials == schedule.trials
+    assert loaded.onsets[0] == 12.5
+    assert np.isnan(loaded.onsets[1])
+    assert loaded.position == 1
+
+def test_first_delay_counts_from_session_start():
+    """Test that the first stimulus waits its delay from the first check, not from time 0"""
+    schedule = StimulusSchedule(num_trials=1, min_delay=1.0, max_delay=2.0, seed=3)
+    stimuli = StimuliDisplayModule(schedule=schedule)
+    delay = schedule.trials[0].delay
+
+    assert not stimuli.should_show_stimulus(timestamp=500.0)
+    assert not stimuli.should_show_stimulus(timestamp=500.0 + delay - 0.01)
+    assert stimuli.should_show_stimulus(timestamp=500.0 + delay)
+
+def test_created_schedule_is_regenerated_when_exhausted():
+    """Test that a schedule the module created itself never runs out"""
+    stimuli = StimuliDisplayModule()
+    stimuli.should_show_stimulus(timestamp=0.0)
+    first = stimuli.schedule
+    first.position = len(first) - 1
+    stimuli.activate_random_stimulus(timestamp=10.0)
+    stimuli.deactivate_stimulus(timestamp=11.0)
+    assert first.current() is None
+
+    assert not stimuli.should_show_stimulus(timestamp=11.0)
+    assert stimuli.schedule is not first
+    assert stimuli.schedule.current() is not None
+    assert stimuli.should_show_stimulus(timestamp=100.0)
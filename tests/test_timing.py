@@ -1,5 +1,7 @@
 import pytest
-from src.python.timing import TimingModule
+import numpy as np
+from src.python.timing import (TimingModule, EVENT_CAPTURE, EVENT_DETECT,
+                               EVENT_STIMULUS_ON, EVENT_DISPLAY)
 import time
 
 def test_timing_module_basic():
@@ -24,4 +26,31 @@ def test_timing_module_statistics():
     
     stats = timing.get_statistics()
     assert stats["count"] == 3
-    assert 90 <= stats["average"] <= 110
\ No newline at end of file
+    assert 90 <= stats["average"] <= 110
+
+def test_monotonic_clock_matches_perf_counter():
+    timing = TimingModule()
+    before = time.perf_counter()
+    now = timing.now_ns() / 1e9
+    after = time.perf_counter()
+    assert before - 0.001 <= now <= after + 0.001
+
+def test_event_log():
+    timing = TimingModule(event_capacity=3)
+    assert timing.record_event(EVENT_CAPTURE, timestamp=1.5)
+    assert timing.record_event(EVENT_DETECT)
+    assert timing.record_event(EVENT_DISPLAY)
+    assert not timing.record_event(EVENT_STIMULUS_ON)
+    assert timing.events.dropped == 1
+
+    events = timing.get_events()
+    assert events.shape == (3, 2)
+    assert events.dtype == np.int64
+    assert list(events[:, 0]) == [EVENT_CAPTURE, EVENT_DETECT, EVENT_DISPLAY]
+    assert events[0, 1] == 1_500_000_000
+    assert np.all(np.diff(events[1:, 1]) >= 0)
+
+    # The array is a view of the native log, not a copy
+    timing.clear_events()
+    timing.record_event(EVENT_STIMULUS_ON, timestamp=2.0)
+    assert events[0, 0] == EVENT_STIMULUS_ON
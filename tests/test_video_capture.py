@@ -1,6 +1,8 @@
 import pytest
+import time
 import numpy as np
 from src.python.video_capture import VideoCaptureModule
+from src.python.frame_sources import SyntheticSource
 
 def test_video_capture_initialization():
     """Test basic initialization of the VideoCaptureModule"""
@@ -56,4 +58,123 @@ def test_error_handling():
     # Should handle frame capture when not started
     success, frame = capture.get_frame()
     assert not success
-    assert frame is None
\ No newline at end of file
+    assert frame is None
+
+def test_source_capture_start_stop():
+    """Test starting, reading and stopping against a synthetic source"""
+    capture = VideoCaptureModule(source=SyntheticSource(width=160, height=120))
+    assert capture.start()
+    assert capture.is_running
+
+    success, frame = capture.get_frame()
+    assert success
+    assert frame.shape == (120, 160, 3)
+
+    success, processed_frame = capture.get_processed_frame()
+    assert success
+    assert len(processed_frame.shape) == 2
+
+    capture.stop()
+    assert not capture.is_running
+
+def test_threaded_capture_latest_frame():
+    """Test that threaded mode serves the newest frame and counts drops"""
+    num_frames = 30
+    options = dict(width=320, height=48, num_frames=num_frames, motion_frames=range(num_frames))
+    capture = VideoCaptureModule(threaded=True,
+                                 source=SyntheticSource(target_fps=500, **options))
+    assert capture.start()
+
+    success, first = capture.get_frame()
+    assert success
+
+    # Frames produced while we were busy are overwritten, not queued; once
+    # the source has ended, the slot holds its last frame
+    time.sleep(0.2)
+    success, frame = capture.get_frame()
+    assert success
+
+    reference = SyntheticSource(**options)
+    reference.open()
+    for _ in range(num_frames):
+        _, last, _ = reference.read()
+    assert np.array_equal(frame, last)
+    assert not np.array_equal(frame, first)
+
+    stats = capture.get_capture_stats()
+    assert stats["captured"] == num_frames
+    assert stats["dropped"] == num_frames - 2
+
+    capture.stop()
+    assert not capture.is_running
+
+def test_threaded_capture_timestamps():
+    """Test that frames carry monotonic capture timestamps"""
+    source = SyntheticSource(width=64, height=48, target_fps=500)
+    capture = VideoCaptureModule(threaded=True, source=source)
+    assert capture.start()
+
+    timestamps = []
+    for _ in range(5):
+        time.sleep(0.01)
+        success, frame, timestamp = capture.get_timestamped_frame()
+        assert success
+        timestamps.append(timestamp)
+
+    assert all(b > a for a, b in zip(timestamps, timestamps[1:]))
+    assert timestamps[-1] <= time.perf_counter()
+    capture.stop()
+
+def test_threaded_capture_end_of_source():
+    """Test that a finite source ends the threaded capture cleanly"""
+    capture = VideoCaptureModule(threaded=True,
+                                 source=SyntheticSource(width=64, height=48, num_frames=3))
+    assert capture.start()
+
+    frames = 0
+    while frames < 10:
+        success, frame = capture.get_frame()
+        if not success:
+            break
+        frames += 1
+    assert 1 <= frames <= 3
+    capture.stop()
+
+def test_process_frame_matches_reference():
+    """Test that process_frame computes the edge map of the given frame"""
+    import cv2
+    frame = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    capture = VideoCaptureModule(source=SyntheticSource(width=64, height=48))
+
+    edges = capture.process_frame(frame)
+    assert edges.shape == (48, 64)
+    assert edges.dtype == np.uint8
+
+    gray = cv2.GaussianBlur(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+    reference = np.clip(np.absolute(cv2.Laplacian(gray, cv2.CV_64F)), 0, 255).astype(np.uint8)
+    assert np.array_equal(edges, reference)
+
+def test_process_frame_reuses_buffers():
+    """Test that process_frame writes into the caller's buffer without reading a frame"""
+    source = SyntheticSource(width=64, height=48)
+    capture = VideoCaptureModule(source=source)
+    assert capture.start()
+    success, frame = capture.get_frame()
+    assert success
+    captured = capture.frames_captured
+
+    out = np.empty((48, 64), np.uint8)
+    assert capture.process_frame(frame, out=out) is out
+    assert np.array_equal(out, capture.process_frame(frame))
+    assert capture.process_frame(frame, out=out) is out
+    assert capture.frames_captured == captured
+    capture.stop()
+
+def test_process_frame_rejects_mismatched_out():
+    """Test that an out buffer of the wrong shape or dtype is refused"""
+    frame = np.zeros((48, 64, 3), np.uint8)
+    capture = VideoCaptureModule(source=SyntheticSource(width=64, height=48))
+    with pytest.raises(ValueError):
+        capture.process_frame(frame, out=np.empty((64, 48), np.uint8))
+    with pytest.raises(ValueError):
+        capture.process_frame(frame, out=np.empty((48, 64), np.float32))